@@ -38,6 +38,10 @@ from src import (
     Gender,
     engine,
     CustomerHistoryProducts,
+    ProductSearchIndex,
+    CustomerOneTimePassword,
+    OutboxMessage,
+    DietDayEntry,
     Base,
 )
 
@@ -0,0 +1,37 @@
+"""customer last_plan_end_date
+
+Revision ID: f3a7c1e9d254
+Revises: d8f4a2c6b913
+Create Date: 2026-10-18 21:02:40.583117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a7c1e9d254'
+down_revision = 'd8f4a2c6b913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('customer', sa.Column('last_plan_end_date', sa.Date(), nullable=True))
+    op.execute(
+        """
+        UPDATE customer SET last_plan_end_date = plans.last_plan_end_date
+        FROM (
+            SELECT customer_id, max(end_date) AS last_plan_end_date FROM trainingplan GROUP BY customer_id
+        ) plans
+        WHERE customer.id = plans.customer_id
+        """
+    )
+    op.create_index(
+        'ix_customer_coach_id_last_plan_end_date', 'customer', ['coach_id', 'last_plan_end_date'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_customer_coach_id_last_plan_end_date', table_name='customer')
+    op.drop_column('customer', 'last_plan_end_date')
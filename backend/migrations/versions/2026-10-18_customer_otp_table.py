@@ -0,0 +1,45 @@
+"""customer otp table
+
+Revision ID: 5b1e0f7d3a42
+Revises: c056c3289a75
+Create Date: 2026-10-18 10:12:31.402115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '5b1e0f7d3a42'
+down_revision = 'c056c3289a75'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('customer_otp',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('created', sa.DateTime(), nullable=False),
+    sa.Column('modified', sa.DateTime(), nullable=True),
+    sa.Column('deleted', sa.DateTime(), nullable=True),
+    sa.Column('otp', sa.String(length=10), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('used_at', sa.DateTime(), nullable=True),
+    sa.Column('customer_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['customer.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_customer_otp_id'), 'customer_otp', ['id'], unique=False)
+    op.create_index(
+        'ix_customer_otp_active_otp',
+        'customer_otp',
+        ['otp'],
+        unique=True,
+        postgresql_where=sa.text('used_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_customer_otp_active_otp', table_name='customer_otp')
+    op.drop_index(op.f('ix_customer_otp_id'), table_name='customer_otp')
+    op.drop_table('customer_otp')
@@ -0,0 +1,81 @@
+"""customer otp username
+
+Revision ID: 9c2d4b6e8f13
+Revises: a6c2e8f4b071
+Create Date: 2026-10-18 22:41:07.553180
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2d4b6e8f13'
+down_revision = 'a6c2e8f4b071'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('customer_otp', sa.Column('username', sa.String(length=100), nullable=True))
+
+    # invite is sent to the phone number saved as telegram username until the customer logs in
+    op.execute(
+        """
+        UPDATE customer_otp
+        SET username = coalesce(customer.username, customer.telegram_username)
+        FROM customer
+        WHERE customer.id = customer_otp.customer_id
+        """
+    )
+    op.execute("DELETE FROM customer_otp WHERE username IS NULL")
+
+    op.alter_column('customer_otp', 'username', existing_type=sa.String(length=100), nullable=False)
+    op.drop_index('ix_customer_otp_active_otp', table_name='customer_otp')
+    op.create_index(
+        'ix_customer_otp_active_username_otp',
+        'customer_otp',
+        ['username', 'otp'],
+        unique=True,
+        postgresql_where=sa.text('used_at IS NULL'),
+    )
+
+    # customers who haven't changed password yet keep otp in password column,
+    # each of them gets own otp since it's looked up together with the phone number
+    op.execute(
+        """
+        INSERT INTO customer_otp (id, created, otp, expires_at, customer_id, username)
+        SELECT gen_random_uuid(), now(), password, now() + interval '7 days', id,
+               coalesce(username, telegram_username)
+        FROM customer
+        WHERE length(password) = 4
+          AND coalesce(username, telegram_username) IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM customer_otp
+              WHERE customer_otp.customer_id = customer.id AND customer_otp.used_at IS NULL
+          )
+        ON CONFLICT (username, otp) WHERE used_at IS NULL DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_customer_otp_active_username_otp', table_name='customer_otp')
+    # the same otp can be active for several phone numbers, only one of them is kept
+    op.execute(
+        """
+        UPDATE customer_otp
+        SET used_at = now()
+        WHERE used_at IS NULL AND id NOT IN (
+            SELECT DISTINCT ON (otp) id FROM customer_otp WHERE used_at IS NULL ORDER BY otp, created DESC
+        )
+        """
+    )
+    op.create_index(
+        'ix_customer_otp_active_otp',
+        'customer_otp',
+        ['otp'],
+        unique=True,
+        postgresql_where=sa.text('used_at IS NULL'),
+    )
+    op.drop_column('customer_otp', 'username')
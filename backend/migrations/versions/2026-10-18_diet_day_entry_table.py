@@ -0,0 +1,141 @@
+"""diet day entry table
+
+Revision ID: c71f2b9e84d3
+Revises: a4e8d1b6c0f2
+Create Date: 2026-10-18 18:26:10.402771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'c71f2b9e84d3'
+down_revision = 'a4e8d1b6c0f2'
+branch_labels = None
+depends_on = None
+
+MEALS = ('breakfast', 'lunch', 'dinner', 'snacks')
+NUTRIENTS = ('calories', 'proteins', 'fats', 'carbs')
+
+
+def upgrade() -> None:
+    op.create_table('diet_day_entry',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('created', sa.DateTime(), nullable=False),
+    sa.Column('modified', sa.DateTime(), nullable=True),
+    sa.Column('deleted', sa.DateTime(), nullable=True),
+    sa.Column('diet_day_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('meal_type', sa.String(length=20), nullable=False),
+    sa.Column('barcode', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('vendor_name', sa.String(length=255), nullable=False),
+    sa.Column('portion_size', sa.Integer(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('calories', sa.Float(), nullable=False),
+    sa.Column('proteins', sa.Float(), nullable=False),
+    sa.Column('fats', sa.Float(), nullable=False),
+    sa.Column('carbs', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['diet_day_id'], ['dietday.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_diet_day_entry_id'), 'diet_day_entry', ['id'], unique=False)
+    op.create_index(
+        'ix_diet_day_entry_diet_day_id_meal_type', 'diet_day_entry', ['diet_day_id', 'meal_type'], unique=False
+    )
+
+    for meal in MEALS:
+        for nutrient in NUTRIENTS:
+            op.add_column(
+                'dietday', sa.Column(f'{meal}_{nutrient}', sa.Float(), server_default='0', nullable=False)
+            )
+
+    # meal totals are kept as they were, they aren't recalculated from products
+    op.execute(
+        'UPDATE dietday SET '
+        + ', '.join(
+            f"{meal}_{nutrient} = COALESCE(({meal}->>'total_{nutrient}')::float, 0)"
+            for meal in MEALS
+            for nutrient in NUTRIENTS
+        )
+    )
+
+    # products order within the meal is kept with created column
+    meals = ', '.join(f"('{meal}', d.{meal})" for meal in MEALS)
+    op.execute(
+        f"""
+        INSERT INTO diet_day_entry (
+            id, created, diet_day_id, meal_type, barcode, name, type, vendor_name,
+            portion_size, amount, calories, proteins, fats, carbs
+        )
+        SELECT
+            gen_random_uuid(),
+            COALESCE(d.modified, d.created) + p.position * interval '1 microsecond',
+            d.id,
+            m.meal_type,
+            COALESCE(p.product->>'barcode', ''),
+            COALESCE(p.product->>'name', ''),
+            COALESCE(p.product->>'type', ''),
+            COALESCE(p.product->>'vendor_name', ''),
+            (p.product->>'portion_size')::float::integer,
+            COALESCE((p.product->>'amount')::float, 0),
+            COALESCE((p.product->>'calories')::float, 0),
+            COALESCE((p.product->>'proteins')::float, 0),
+            COALESCE((p.product->>'fats')::float, 0),
+            COALESCE((p.product->>'carbs')::float, 0)
+        FROM dietday d
+        CROSS JOIN LATERAL (VALUES {meals}) AS m(meal_type, meal)
+        CROSS JOIN LATERAL jsonb_array_elements(COALESCE(m.meal->'products', '[]'::jsonb))
+            WITH ORDINALITY AS p(product, position)
+        """
+    )
+
+    for meal in MEALS:
+        op.drop_column('dietday', meal)
+
+
+def downgrade() -> None:
+    for meal in MEALS:
+        op.add_column('dietday', sa.Column(meal, postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+    for meal in MEALS:
+        totals = ', '.join(f"'total_{nutrient}', d.{meal}_{nutrient}" for nutrient in NUTRIENTS)
+        op.execute(
+            f"""
+            UPDATE dietday d SET {meal} = jsonb_build_object(
+                {totals},
+                'products', COALESCE(
+                    (
+                        SELECT jsonb_agg(
+                            jsonb_build_object(
+                                'id', e.id,
+                                'name', e.name,
+                                'barcode', e.barcode,
+                                'portion_size', e.portion_size,
+                                'amount', e.amount,
+                                'type', e.type,
+                                'proteins', e.proteins,
+                                'fats', e.fats,
+                                'carbs', e.carbs,
+                                'calories', e.calories,
+                                'vendor_name', e.vendor_name
+                            )
+                            ORDER BY e.created
+                        )
+                        FROM diet_day_entry e
+                        WHERE e.diet_day_id = d.id AND e.meal_type = '{meal}'
+                    ),
+                    '[]'::jsonb
+                )
+            )
+            """
+        )
+
+    for meal in MEALS:
+        for nutrient in NUTRIENTS:
+            op.drop_column('dietday', f'{meal}_{nutrient}')
+
+    op.drop_index('ix_diet_day_entry_diet_day_id_meal_type', table_name='diet_day_entry')
+    op.drop_index(op.f('ix_diet_day_entry_id'), table_name='diet_day_entry')
+    op.drop_table('diet_day_entry')
@@ -0,0 +1,24 @@
+"""dietday diet_id date index
+
+Revision ID: e2b5a9d7f316
+Revises: c71f2b9e84d3
+Create Date: 2026-10-18 19:05:37.218406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b5a9d7f316'
+down_revision = 'c71f2b9e84d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_dietday_diet_id_date', 'dietday', ['diet_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dietday_diet_id_date', table_name='dietday')
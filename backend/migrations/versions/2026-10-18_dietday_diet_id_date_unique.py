@@ -0,0 +1,58 @@
+"""dietday diet_id date unique
+
+Revision ID: b5d3e8a1f947
+Revises: e2b5a9d7f316
+Create Date: 2026-10-18 19:48:12.604113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d3e8a1f947'
+down_revision = 'e2b5a9d7f316'
+branch_labels = None
+depends_on = None
+
+MEALS = ('breakfast', 'lunch', 'dinner', 'snacks')
+NUTRIENTS = ('calories', 'proteins', 'fats', 'carbs')
+
+
+def upgrade() -> None:
+    # duplicated days are merged into the earliest one, entries and meal totals are moved to it
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE dietday_duplicate ON COMMIT DROP AS
+        SELECT id, keep_id FROM (
+            SELECT id, first_value(id) OVER (PARTITION BY diet_id, date ORDER BY created, id) AS keep_id
+            FROM dietday
+        ) ranked
+        WHERE id <> keep_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE diet_day_entry SET diet_day_id = dup.keep_id
+        FROM dietday_duplicate dup
+        WHERE diet_day_entry.diet_day_id = dup.id
+        """
+    )
+    columns = [f'{meal}_{nutrient}' for meal in MEALS for nutrient in NUTRIENTS]
+    op.execute(
+        'UPDATE dietday SET '
+        + ', '.join(f'{column} = dietday.{column} + merged.{column}' for column in columns)
+        + ' FROM (SELECT dup.keep_id, '
+        + ', '.join(f'SUM(d.{column}) AS {column}' for column in columns)
+        + ' FROM dietday_duplicate dup JOIN dietday d ON d.id = dup.id GROUP BY dup.keep_id) merged'
+        + ' WHERE dietday.id = merged.keep_id'
+    )
+    op.execute('DELETE FROM dietday USING dietday_duplicate dup WHERE dietday.id = dup.id')
+
+    op.drop_index('ix_dietday_diet_id_date', table_name='dietday')
+    op.create_index('ix_dietday_diet_id_date', 'dietday', ['diet_id', 'date'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dietday_diet_id_date', table_name='dietday')
+    op.create_index('ix_dietday_diet_id_date', 'dietday', ['diet_id', 'date'], unique=False)
@@ -0,0 +1,42 @@
+"""dietday meals jsonb
+
+Revision ID: a4e8d1b6c0f2
+Revises: 3f9a7c2e5d18
+Create Date: 2026-10-18 17:03:21.550918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'a4e8d1b6c0f2'
+down_revision = '3f9a7c2e5d18'
+branch_labels = None
+depends_on = None
+
+MEALS = ('breakfast', 'lunch', 'dinner', 'snacks')
+
+
+def upgrade() -> None:
+    for meal in MEALS:
+        op.alter_column(
+            'dietday',
+            meal,
+            existing_type=sa.JSON(),
+            type_=postgresql.JSONB(astext_type=sa.Text()),
+            existing_nullable=True,
+            postgresql_using=f'{meal}::jsonb',
+        )
+
+
+def downgrade() -> None:
+    for meal in MEALS:
+        op.alter_column(
+            'dietday',
+            meal,
+            existing_type=postgresql.JSONB(astext_type=sa.Text()),
+            type_=sa.JSON(),
+            existing_nullable=True,
+            postgresql_using=f'{meal}::json',
+        )
@@ -0,0 +1,26 @@
+"""drop trainingplan customer_id end_date index
+
+Revision ID: 4e7a1c9d2b58
+Revises: 9c2d4b6e8f13
+Create Date: 2026-10-18 23:12:07.481936
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e7a1c9d2b58'
+down_revision = '9c2d4b6e8f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_trainingplan_customer_id_end_date', table_name='trainingplan')
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_trainingplan_customer_id_end_date', 'trainingplan', ['customer_id', 'end_date'], unique=False
+    )
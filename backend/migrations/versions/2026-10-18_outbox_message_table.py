@@ -0,0 +1,47 @@
+"""outbox message table
+
+Revision ID: 8d2c6a41f0b9
+Revises: 5b1e0f7d3a42
+Create Date: 2026-10-18 12:40:05.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '8d2c6a41f0b9'
+down_revision = '5b1e0f7d3a42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox_message',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('created', sa.DateTime(), nullable=False),
+    sa.Column('modified', sa.DateTime(), nullable=True),
+    sa.Column('deleted', sa.DateTime(), nullable=True),
+    sa.Column('channel', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('failed_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outbox_message_id'), 'outbox_message', ['id'], unique=False)
+    op.create_index(
+        'ix_outbox_message_pending',
+        'outbox_message',
+        ['next_attempt_at'],
+        unique=False,
+        postgresql_where=sa.text('sent_at IS NULL AND failed_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_message_pending', table_name='outbox_message')
+    op.drop_index(op.f('ix_outbox_message_id'), table_name='outbox_message')
+    op.drop_table('outbox_message')
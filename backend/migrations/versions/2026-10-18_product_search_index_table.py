@@ -0,0 +1,62 @@
+"""product search index table
+
+Revision ID: 3f9a7c2e5d18
+Revises: 8d2c6a41f0b9
+Create Date: 2026-10-18 15:12:47.604219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '3f9a7c2e5d18'
+down_revision = '8d2c6a41f0b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('product_search_index',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('created', sa.DateTime(), nullable=False),
+    sa.Column('modified', sa.DateTime(), nullable=True),
+    sa.Column('deleted', sa.DateTime(), nullable=True),
+    sa.Column('barcode', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('proteins', sa.Integer(), nullable=False),
+    sa.Column('fats', sa.Integer(), nullable=False),
+    sa.Column('carbs', sa.Integer(), nullable=False),
+    sa.Column('calories', sa.Integer(), nullable=False),
+    sa.Column('vendor_name', sa.String(length=255), nullable=False),
+    sa.Column('user_id', sa.String(length=50), nullable=False),
+    sa.Column('search_name', sa.String(length=255), nullable=False),
+    sa.Column('search_vendor_name', sa.String(length=255), nullable=False),
+    sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('simple', search_name), 'A') || "
+            "setweight(to_tsvector('simple', search_vendor_name), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('barcode')
+    )
+    op.create_index(op.f('ix_product_search_index_id'), 'product_search_index', ['id'], unique=False)
+    op.create_index(
+        'ix_product_search_index_search_vector',
+        'product_search_index',
+        ['search_vector'],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_search_index_search_vector', table_name='product_search_index')
+    op.drop_index(op.f('ix_product_search_index_id'), table_name='product_search_index')
+    op.drop_table('product_search_index')
@@ -0,0 +1,26 @@
+"""training and diet training_plan_id indexes
+
+Revision ID: a6c2e8f4b071
+Revises: f3a7c1e9d254
+Create Date: 2026-10-18 21:36:18.902445
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c2e8f4b071'
+down_revision = 'f3a7c1e9d254'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_training_training_plan_id'), 'training', ['training_plan_id'], unique=False)
+    op.create_index(op.f('ix_diet_training_plan_id'), 'diet', ['training_plan_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_diet_training_plan_id'), table_name='diet')
+    op.drop_index(op.f('ix_training_training_plan_id'), table_name='training')
@@ -0,0 +1,26 @@
+"""trainingplan customer_id end_date index
+
+Revision ID: d8f4a2c6b913
+Revises: b5d3e8a1f947
+Create Date: 2026-10-18 20:31:54.117820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f4a2c6b913'
+down_revision = 'b5d3e8a1f947'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_trainingplan_customer_id_end_date', 'trainingplan', ['customer_id', 'end_date'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trainingplan_customer_id_end_date', table_name='trainingplan')
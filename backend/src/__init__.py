@@ -4,12 +4,17 @@ from src.persistence.models import (
     Gender,
     Coach,
     Customer,
+    CustomerOneTimePassword,
     TrainingPlan,
     Diet,
     DietDays,
+    DietDayEntry,
     Training,
     MuscleGroup,
     Exercise,
     ExercisesOnTraining,
     CustomerHistoryProducts,
+    ProductSearchIndex,
+    OutboxChannel,
+    OutboxMessage,
 )
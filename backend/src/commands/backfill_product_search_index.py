@@ -0,0 +1,34 @@
+"""
+Copies the DynamoDB product catalog to product_search_index.
+Run it once after the product search index migration, then set PRODUCT_SEARCH_BACKEND=index:
+
+    python -m src.commands.backfill_product_search_index
+"""
+import argparse
+import asyncio
+import logging
+
+from src.database import SessionLocal, engine
+from src.repository.product_storage import close_product_storage
+from src.shared.dependencies import provide_product_service
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def backfill_product_search_index(batch_size: int) -> None:
+    product_service = await provide_product_service()
+    try:
+        async with SessionLocal() as uow:
+            indexed = await product_service.backfill_search_index(uow, batch_size)
+    finally:
+        close_product_storage()
+        await engine.dispose()
+    logger.info(f"{indexed} products are added to the search index")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(backfill_product_search_index(args.batch_size))
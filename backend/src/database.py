@@ -3,25 +3,138 @@ Database settings module
 """
 
 import os
+import time
+from dataclasses import dataclass, asdict
 
+from sqlalchemy import event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession  # type: ignore
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 
 from src.shared.config import DATABASE_URL, TEST_ENV
+from src.shared.settings import InfrastructureSettings
+
+infrastructure_settings = InfrastructureSettings()
+
+
+@dataclass
+class PoolMetrics:
+    """
+    Counters collected from the connection pool events
+    """
+    connects: int = 0
+    checkouts: int = 0
+    checkins: int = 0
+    invalidations: int = 0
+    checkout_wait_total_seconds: float = 0.0
+    checkout_wait_max_seconds: float = 0.0
+
+    def observe_checkout_wait(self, seconds: float) -> None:
+        self.checkout_wait_total_seconds += seconds
+        self.checkout_wait_max_seconds = max(self.checkout_wait_max_seconds, seconds)
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool which measures how long a session waits for a free connection
+    """
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_metrics.observe_checkout_wait(time.perf_counter() - started_at)
+
+
+def calculate_pool_limits(settings: InfrastructureSettings) -> tuple[int, int]:
+    """
+    Splits the total connections budget between workers
+
+    Args:
+        settings: infrastructure settings with pool configuration
+
+    Returns:
+        pool size and max overflow for the single worker
+    """
+    pool_size, max_overflow = settings.database_pool_size, settings.database_max_overflow
+    if settings.database_max_connections <= 0:
+        return pool_size, max_overflow
+
+    per_worker_limit = max(settings.database_max_connections // max(settings.web_concurrency, 1), 1)
+    pool_size = min(pool_size, per_worker_limit)
+    max_overflow = min(max_overflow, per_worker_limit - pool_size)
+    return pool_size, max_overflow
+
+
+def create_engine_options(settings: InfrastructureSettings) -> dict:
+    if settings.database_pool_class == "null":
+        return {"poolclass": NullPool}
+
+    pool_size, max_overflow = calculate_pool_limits(settings)
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+    }
 
 
 if TEST_ENV == "active":
+    # every test runs in own event loop so connections can't be shared between them
     TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
     engine = create_async_engine(
         TEST_DATABASE_URL, future=True, echo=False, poolclass=NullPool
     )
 else:
     engine = create_async_engine(
-        DATABASE_URL, future=True, echo=False, poolclass=NullPool
+        DATABASE_URL, future=True, echo=False, **create_engine_options(infrastructure_settings)
     )
 
+
+@event.listens_for(engine.sync_engine, "connect")
+def on_connect(dbapi_connection, connection_record):
+    pool_metrics.connects += 1
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_metrics.checkouts += 1
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def on_checkin(dbapi_connection, connection_record):
+    pool_metrics.checkins += 1
+
+
+@event.listens_for(engine.sync_engine, "invalidate")
+def on_invalidate(dbapi_connection, connection_record, exception):
+    pool_metrics.invalidations += 1
+
+
+def get_pool_status() -> dict:
+    """
+    Returns current pool state together with collected counters
+    """
+    pool = engine.sync_engine.pool
+    status = asdict(pool_metrics)
+    status["pool_class"] = type(pool).__name__
+
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status["size"] = pool.size()
+        status["checked_out"] = pool.checkedout()
+        status["checked_in"] = pool.checkedin()
+        status["overflow"] = pool.overflow()
+
+    return status
+
+
 SessionLocal = sessionmaker(
     engine, expire_on_commit=False, class_=AsyncSession
 )
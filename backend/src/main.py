@@ -4,12 +4,36 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
 
+from src.database import engine, get_pool_status, SessionLocal
+from src.service.outbox_relay_service import start_outbox_relay, stop_outbox_relay
+from src.shared.dependencies import provide_outbox_relay_service, provide_library_service
+from src.service.user_service import principal_cache
+from src.service.product_service import product_cache
+from src.service.training_plan_service import training_plan_cache
+from src.service.library_service import custom_exercise_cache
 from src.shared.config import STATIC_DIR
+from src.shared.settings import InfrastructureSettings
+from src.supplier.kafka_supplier import get_kafka_supplier, close_kafka_supplier
+from src.supplier.firebase_supplier import push_delivery_pool
+from src.repository.product_storage import close_product_storage
+from src.utils import password_hashing_pool
 from src.presentation.authentication_router import auth_router
 from src.presentation.customer_router import customer_router
 from src.presentation.library_router import gym_router
 from src.presentation.nutrition_router import nutrition_router
 
+infrastructure_settings = InfrastructureSettings()
+
+
+async def start_outbox_relay_worker() -> None:
+    start_outbox_relay(await provide_outbox_relay_service(), SessionLocal)
+
+
+async def load_exercise_library() -> None:
+    library_service = await provide_library_service()
+    async with SessionLocal() as uow:
+        await library_service.load_library_snapshot(uow)
+
 
 def get_application() -> FastAPI:
     """
@@ -44,6 +68,16 @@ def get_application() -> FastAPI:
     for router in app_routers:
         as_coach.include_router(router, prefix="/api")
 
+    as_coach.add_event_handler("startup", get_kafka_supplier)
+    as_coach.add_event_handler("startup", start_outbox_relay_worker)
+    as_coach.add_event_handler("startup", load_exercise_library)
+    as_coach.add_event_handler("shutdown", stop_outbox_relay)
+    as_coach.add_event_handler("shutdown", close_kafka_supplier)
+    as_coach.add_event_handler("shutdown", engine.dispose)
+    as_coach.add_event_handler("shutdown", password_hashing_pool.shutdown)
+    as_coach.add_event_handler("shutdown", push_delivery_pool.shutdown)
+    as_coach.add_event_handler("shutdown", close_product_storage)
+
     return as_coach
 
 
@@ -53,3 +87,19 @@ app = get_application()
 @app.get("/health")
 async def check_health():
     return {"version": "AsCoach v1.0.0"}
+
+
+async def get_metrics():
+    return {
+        "database_pool": get_pool_status(),
+        "principal_cache": principal_cache.stats(),
+        "product_cache": product_cache.stats(),
+        "training_plan_cache": training_plan_cache.stats(),
+        "custom_exercise_cache": custom_exercise_cache.stats(),
+        "password_hashing": password_hashing_pool.stats(),
+        "push_delivery": push_delivery_pool.stats(),
+    }
+
+
+if infrastructure_settings.metrics_enabled:
+    app.add_api_route("/metrics", get_metrics, methods=["GET"])
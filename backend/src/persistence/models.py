@@ -3,9 +3,9 @@ import enum
 import uuid
 
 from sqlalchemy import (
-    Column, DateTime, String, Enum, Date, ForeignKey, Text, Integer, JSON, Float
+    Column, DateTime, String, Enum, Date, ForeignKey, Text, Integer, JSON, Float, Index, text, Computed
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.orm import RelationshipProperty, relationship
 
 from src import Base
@@ -29,6 +29,14 @@ class Gender(enum.Enum):
     FEMALE = "female"
 
 
+class OutboxChannel(str, enum.Enum):
+    """
+    Enum for selecting the way outbox message is delivered.
+    """
+    TELEGRAM_CUSTOMER_INVITE = "telegram_customer_invite"
+    PUSH_NOTIFICATION = "push_notification"
+
+
 class Coach(Base, BaseModel):
     """
     Application user model.
@@ -65,7 +73,10 @@ class Customer(Base, BaseModel):
     Customer, created by coach, gets training plan.
     """
     __tablename__ = "customer"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index("ix_customer_coach_id_last_plan_end_date", "coach_id", "last_plan_end_date"),
+        {'extend_existing': True},
+    )
 
     username = Column("username", String(100), nullable=True, index=True, doc="It's phone number")
     telegram_username = Column("telegram_username", String(50), nullable=True, index=True, doc="It's telegram username")
@@ -89,11 +100,45 @@ class Customer(Base, BaseModel):
     photo_path = Column("photo_path", String(255), nullable=True)
     email = Column("email", String(100), nullable=True)
     fcm_token = Column("fcm_token", String(255), nullable=True)
+    # end date of the latest training plan, it's updated with plans in the same transaction
+    last_plan_end_date = Column("last_plan_end_date", Date, nullable=True)
+    one_time_passwords: RelationshipProperty = relationship(
+        "CustomerOneTimePassword",
+        cascade="all,delete-orphan",
+        back_populates="customer"
+    )
 
     def __repr__(self):
         return f"Customer: {self.last_name} {self.first_name}"
 
 
+class CustomerOneTimePassword(Base, BaseModel):
+    """
+    One time password sent to customer in the invite.
+    Active password is unique for the phone number it's sent to, so the first login is resolved by index.
+    """
+    __tablename__ = "customer_otp"
+    __table_args__ = (
+        Index(
+            "ix_customer_otp_active_username_otp",
+            "username",
+            "otp",
+            unique=True,
+            postgresql_where=text("used_at IS NULL"),
+        ),
+    )
+
+    otp = Column("otp", String(10), nullable=False)
+    username = Column("username", String(100), nullable=False, doc="It's phone number the invite is sent to")
+    expires_at = Column("expires_at", DateTime, nullable=False)
+    used_at = Column("used_at", DateTime, nullable=True)
+    customer_id = Column(UUID(as_uuid=True), ForeignKey("customer.id", ondelete="CASCADE"), nullable=False)
+    customer: RelationshipProperty = relationship("Customer", back_populates="one_time_passwords")
+
+    def __repr__(self):
+        return f"Customer one time password: {self.customer_id} expires at {self.expires_at}"
+
+
 class CustomerHistoryProducts(Base, BaseModel):
     """
     Customer consumed products history.
@@ -117,6 +162,41 @@ class CustomerHistoryProducts(Base, BaseModel):
         return f"Product history: {self.customer_id} {self.product_barcode} {self.product_amount}"
 
 
+class ProductSearchIndex(Base, BaseModel):
+    """
+    Copy of DynamoDB product catalog used for product look up.
+    Name and vendor name are normalized before saving, see normalize_search_text.
+    """
+    __tablename__ = "product_search_index"
+    __table_args__ = (
+        Index("ix_product_search_index_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+    barcode = Column("barcode", String(50), nullable=False, unique=True)
+    name = Column("name", String(255), nullable=False)
+    type = Column("type", String(50), nullable=False)
+    proteins = Column("proteins", Integer, nullable=False)
+    fats = Column("fats", Integer, nullable=False)
+    carbs = Column("carbs", Integer, nullable=False)
+    calories = Column("calories", Integer, nullable=False)
+    vendor_name = Column("vendor_name", String(255), nullable=False)
+    user_id = Column("user_id", String(50), nullable=False)
+    search_name = Column("search_name", String(255), nullable=False)
+    search_vendor_name = Column("search_vendor_name", String(255), nullable=False)
+    search_vector = Column(
+        "search_vector",
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', search_name), 'A') || "
+            "setweight(to_tsvector('simple', search_vendor_name), 'B')",
+            persisted=True,
+        ),
+    )
+
+    def __repr__(self):
+        return f"Product search index: {self.barcode} {self.name}"
+
+
 class TrainingPlan(Base, BaseModel):
     """
     Contains training, diets, notes and also relates to customer.
@@ -152,7 +232,7 @@ class Diet(Base, BaseModel):
     total_fats = Column("total_fats", Integer, nullable=False)
     total_carbs = Column("total_carbs", Integer, nullable=False)
     total_calories = Column("total_calories", Integer, nullable=False)
-    training_plan_id = Column(UUID(as_uuid=True), ForeignKey("trainingplan.id", ondelete="CASCADE"))
+    training_plan_id = Column(UUID(as_uuid=True), ForeignKey("trainingplan.id", ondelete="CASCADE"), index=True)
     # TODO: сейчас у нас один уже план, нужно поменять атрибут на training_plan
     training_plans: RelationshipProperty = relationship("TrainingPlan", back_populates="diets")
     diet_days = relationship("DietDays", back_populates="diet", cascade="all, delete-orphan")
@@ -163,22 +243,74 @@ class Diet(Base, BaseModel):
 
 class DietDays(Base, BaseModel):
     __tablename__ = "dietday"
+    __table_args__ = (
+        Index("ix_dietday_diet_id_date", "diet_id", "date", unique=True),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     date = Column(Date, nullable=False)
 
-    breakfast = Column(JSON, default={})
-    lunch = Column(JSON, default={})
-    dinner = Column(JSON, default={})
-    snacks = Column(JSON, default={})
+    # consumed nutrients of each meal, they're incremented with every added entry
+    breakfast_calories = Column("breakfast_calories", Float, nullable=False, default=0, server_default="0")
+    breakfast_proteins = Column("breakfast_proteins", Float, nullable=False, default=0, server_default="0")
+    breakfast_fats = Column("breakfast_fats", Float, nullable=False, default=0, server_default="0")
+    breakfast_carbs = Column("breakfast_carbs", Float, nullable=False, default=0, server_default="0")
+
+    lunch_calories = Column("lunch_calories", Float, nullable=False, default=0, server_default="0")
+    lunch_proteins = Column("lunch_proteins", Float, nullable=False, default=0, server_default="0")
+    lunch_fats = Column("lunch_fats", Float, nullable=False, default=0, server_default="0")
+    lunch_carbs = Column("lunch_carbs", Float, nullable=False, default=0, server_default="0")
+
+    dinner_calories = Column("dinner_calories", Float, nullable=False, default=0, server_default="0")
+    dinner_proteins = Column("dinner_proteins", Float, nullable=False, default=0, server_default="0")
+    dinner_fats = Column("dinner_fats", Float, nullable=False, default=0, server_default="0")
+    dinner_carbs = Column("dinner_carbs", Float, nullable=False, default=0, server_default="0")
+
+    snacks_calories = Column("snacks_calories", Float, nullable=False, default=0, server_default="0")
+    snacks_proteins = Column("snacks_proteins", Float, nullable=False, default=0, server_default="0")
+    snacks_fats = Column("snacks_fats", Float, nullable=False, default=0, server_default="0")
+    snacks_carbs = Column("snacks_carbs", Float, nullable=False, default=0, server_default="0")
 
     diet_id = Column(UUID(as_uuid=True), ForeignKey("diet.id"), nullable=False)
     diet = relationship("Diet", back_populates="diet_days")
+    entries: RelationshipProperty = relationship(
+        "DietDayEntry",
+        cascade="all, delete-orphan",
+        back_populates="diet_day",
+        order_by="DietDayEntry.created",
+    )
 
     def __repr__(self):
         return f"Diet day: {self.date}"
 
 
+class DietDayEntry(Base, BaseModel):
+    """
+    Product consumed by customer within the meal, nutrients are calculated for consumed amount.
+    """
+    __tablename__ = "diet_day_entry"
+    __table_args__ = (
+        Index("ix_diet_day_entry_diet_day_id_meal_type", "diet_day_id", "meal_type"),
+    )
+
+    diet_day_id = Column(UUID(as_uuid=True), ForeignKey("dietday.id", ondelete="CASCADE"), nullable=False)
+    diet_day: RelationshipProperty = relationship("DietDays", back_populates="entries")
+    meal_type = Column("meal_type", String(20), nullable=False)
+    barcode = Column("barcode", String(50), nullable=False)
+    name = Column("name", String(255), nullable=False)
+    type = Column("type", String(50), nullable=False)
+    vendor_name = Column("vendor_name", String(255), nullable=False)
+    portion_size = Column("portion_size", Integer, nullable=True)
+    amount = Column("amount", Float, nullable=False)
+    calories = Column("calories", Float, nullable=False)
+    proteins = Column("proteins", Float, nullable=False)
+    fats = Column("fats", Float, nullable=False)
+    carbs = Column("carbs", Float, nullable=False)
+
+    def __repr__(self):
+        return f"Diet day entry: {self.meal_type} {self.barcode} {self.amount}"
+
+
 class Training(Base, BaseModel):
     """
     Contains training's exercises.
@@ -189,7 +321,8 @@ class Training(Base, BaseModel):
     training_plan_id = Column(
         UUID(as_uuid=True),
         ForeignKey("trainingplan.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=False,
+        index=True,
     )
     training_plan: RelationshipProperty = relationship(
         "TrainingPlan",
@@ -256,3 +389,29 @@ class ExercisesOnTraining(Base, BaseModel):
 
     def __repr__(self):
         return f"Exercise on training: {self.id}"
+
+
+class OutboxMessage(Base, BaseModel):
+    """
+    Message saved in the same transaction with business data,
+    relay worker delivers it to the broker or Firebase later.
+    """
+    __tablename__ = "outbox_message"
+    __table_args__ = (
+        Index(
+            "ix_outbox_message_pending",
+            "next_attempt_at",
+            postgresql_where=text("sent_at IS NULL AND failed_at IS NULL"),
+        ),
+    )
+
+    channel = Column("channel", String(50), nullable=False)
+    payload = Column("payload", JSON, nullable=False)
+    attempts = Column("attempts", Integer, default=0, nullable=False)
+    next_attempt_at = Column("next_attempt_at", DateTime, default=datetime.datetime.now, nullable=False)
+    sent_at = Column("sent_at", DateTime, nullable=True)
+    failed_at = Column("failed_at", DateTime, nullable=True)
+    last_error = Column("last_error", Text, nullable=True)
+
+    def __repr__(self):
+        return f"Outbox message: {self.channel} {self.id}"
@@ -56,8 +56,12 @@ async def register_coach(
         id=str(coach.id),
         first_name=coach.first_name,
         username=coach.username,
-        access_token=await coach_service.profile_service.generate_jwt_token(coach.username, access=True),
-        refresh_token=await coach_service.profile_service.generate_jwt_token(coach.username, refresh=True),
+        access_token=await coach_service.profile_service.generate_jwt_token(
+            coach.username, access=True, user_type=coach_service.user_type
+        ),
+        refresh_token=await coach_service.profile_service.generate_jwt_token(
+            coach.username, refresh=True, user_type=coach_service.user_type
+        ),
     )
 
 
@@ -122,8 +126,12 @@ async def login_user(
         id=str(user.id),
         user_type=service.user_type,
         first_name=user.first_name,
-        access_token=await service.profile_service.generate_jwt_token(user.username, access=True),
-        refresh_token=await service.profile_service.generate_jwt_token(user.username, refresh=True),
+        access_token=await service.profile_service.generate_jwt_token(
+            user.username, access=True, user_type=service.user_type
+        ),
+        refresh_token=await service.profile_service.generate_jwt_token(
+            user.username, refresh=True, user_type=service.user_type
+        ),
         password_changed=bool(password_context.identify(user.password)),
     )
 
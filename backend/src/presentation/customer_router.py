@@ -1,8 +1,8 @@
 import logging
-from typing import Any, List
+from email.utils import formatdate
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from starlette import status
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,18 +12,19 @@ from src.service.training_plan_service import TrainingPlanService, TrainingPlanC
 from src.presentation.schemas.customer_schema import (
     CustomerOut,
     CustomerCreateIn,
+    CustomerListItemOut,
 )
 from src.presentation.schemas.training_plan_schema import TrainingPlanIn, TrainingPlanOut, TrainingPlanOutFull
 from src.presentation.schemas.register_schema import CustomerRegistrationData
+from src.schemas.training_plan_dto import TrainingPlanDetailDtoSchema
 from src.shared.dependencies import (
     provide_database_unit_of_work,
     provide_customer_service,
     provide_user_service,
     provide_training_plan_service,
-    provide_push_notification_service,
 )
-from src.utils import validate_uuid, generate_random_password
-from src.service.notification_service import NotificationService
+from src.shared.exceptions import NotValidCursor, OneTimePasswordGenerationFailed
+from src.utils import validate_uuid, generate_random_password, etag_matches
 from src.shared.config import OTP_LENGTH
 
 logger = logging.getLogger(__name__)
@@ -31,6 +32,11 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 
 customer_router = APIRouter()
 
+# clients send it back as cursor to receive the next page of customers
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# clients send it back as offset to receive the next page of training plans
+NEXT_OFFSET_HEADER = "X-Next-Offset"
+
 
 @customer_router.post(
     "/customers",
@@ -54,6 +60,7 @@ async def create_customer(
     Raises:
         400 in case if customer with the phone number already created
         400 in case if couple last name and first name already exist
+        503 in case if unique one time password couldn't be generated
     Returns:
         dictionary with just created customer
         id, first_name, last_name and phone_number are keys
@@ -92,7 +99,13 @@ async def create_customer(
         last_name=customer_data.last_name,
     )
 
-    customer = await customer_service.register(uow, data=customer_reg_data)
+    try:
+        customer = await customer_service.register(uow, data=customer_reg_data)
+    except OneTimePasswordGenerationFailed:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Couldn't generate one time password for the customer, try again later"
+        )
 
     return CustomerOut(
         id=str(customer.id),
@@ -105,25 +118,46 @@ async def create_customer(
 
 @customer_router.get(
     "/customers",
-    summary="Gets all user's customers",
+    summary="Gets user's customers",
+    response_model=list[CustomerListItemOut],
     status_code=status.HTTP_200_OK)
 async def get_customers(
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=200),
+    cursor: str | None = None,
+    search: str | None = Query(default=None, max_length=100),
     coach_service: CoachService = Depends(provide_user_service),
     customer_service: CustomerService = Depends(provide_customer_service),
     uow: AsyncSession = Depends(provide_database_unit_of_work),
-) -> List[dict[str, Any]]:
+) -> list[CustomerListItemOut]:
     """
-    Gets all customer for current coach
+    Gets customers of current coach, active customers go first and archived ones after them.
+    All customers are returned without limit, otherwise the cursor of the next page is sent
+    in X-Next-Cursor header
 
     Args:
+        response: response to set the next page cursor header on
+        limit: max number of customers on the page
+        cursor: X-Next-Cursor of the previous page, the first page is returned without it
+        search: part of customer's first name, last name or phone number
         coach_service: current application coach
         customer_service: service to work with customer domain
         uow: db session injection
+    Raises:
+        400 in case if cursor isn't valid
     Returns:
         list of customers
     """
     coach = coach_service.user
-    customers = await customer_service.get_customers_by_coach_id(uow, str(coach.id))
+    try:
+        customers, next_cursor = await customer_service.get_customers_by_coach_id(
+            uow, str(coach.id), limit=limit, cursor=cursor, search=search,
+        )
+    except NotValidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Not valid cursor")
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return customers
 
 
@@ -135,7 +169,6 @@ async def get_customer(
     customer_id: str,
     user_service: CoachService = Depends(provide_user_service),
     customer_service: CustomerService = Depends(provide_customer_service),
-    training_plan_service: TrainingPlanService = Depends(provide_training_plan_service),
     uow: AsyncSession = Depends(provide_database_unit_of_work),
 ) -> CustomerOut:
     """
@@ -145,7 +178,6 @@ async def get_customer(
         customer_id: str(UUID) of specified customer.
         user_service: service for interacting with profile
         customer_service: service for interacting with customer
-        training_plan_service: service for interacting with customer training plans
         uow: db session injection
 
     Raise:
@@ -161,25 +193,24 @@ async def get_customer(
 
     customer = await customer_service.get_customer_by_pk(uow, pk=customer_id)
 
-    if str(customer.coach_id) != str(user_service.user.id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="The client belong to another coach"
-        )
-
     if not customer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Customer with id {customer_id} not found"
         )
 
-    training_plans = await training_plan_service.get_customer_training_plans(uow, str(customer.id))
+    if str(customer.coach_id) != str(user_service.user.id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The client belong to another coach"
+        )
+
     return CustomerOut(
         id=str(customer.id),
         first_name=customer.first_name,
         last_name=customer.last_name,
         phone_number=customer.username,
-        last_plan_end_date=training_plans[0].end_date.strftime("%Y-%m-%d") if training_plans else None
+        last_plan_end_date=customer.last_plan_end_date.strftime("%Y-%m-%d") if customer.last_plan_end_date else None
     )
 
 
@@ -194,7 +225,6 @@ async def create_training_plan(
     customer_service: CustomerService = Depends(provide_customer_service),
     user_service: CoachService = Depends(provide_user_service),
     training_plan_service: TrainingPlanService = Depends(provide_training_plan_service),
-    push_notification_service: NotificationService = Depends(provide_push_notification_service),
     uow: AsyncSession = Depends(provide_database_unit_of_work),
 ) -> TrainingPlanOut:
     """
@@ -207,7 +237,6 @@ async def create_training_plan(
         customer_service: service for interacting with customer
         user_service: service for interacting with profile
         training_plan_service: service for interacting with customer training plans
-        push_notification_service: service responsible to send push notification through FireBase service
         uow: db session injection
     """
     customer = await customer_service.get_customer_by_pk(uow, pk=customer_id)
@@ -219,6 +248,7 @@ async def create_training_plan(
             uow=uow,
             customer_id=customer_id,
             data=training_plan_data,
+            recipient_id=customer.fcm_token,
         )
     except TrainingPlanCreationException:
         raise HTTPException(
@@ -226,11 +256,6 @@ async def create_training_plan(
             detail=f"Unknown error during training plan creation",
         )
 
-    push_tittle = "Создан новый тренировочный план"
-    push_body = f"с {training_plan.start_date} до {training_plan.end_date}"
-    notification_data = {"title": push_tittle, "body": push_body}
-    await push_notification_service.send_push_notification(customer.fcm_token, notification_data)
-
     return TrainingPlanOut(
         id=str(training_plan.id),
         start_date=training_plan.start_date.strftime("%Y-%m-%d"),
@@ -249,6 +274,9 @@ async def create_training_plan(
     status_code=status.HTTP_200_OK)
 async def get_all_training_plans(
     customer_id: str,
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
     user_service: CoachService = Depends(provide_user_service),
     customer_service: CustomerService = Depends(provide_customer_service),
     training_plan_service: TrainingPlanService = Depends(provide_training_plan_service),
@@ -256,10 +284,15 @@ async def get_all_training_plans(
 ) -> list[TrainingPlanOut]:
     """
     Returns all training plans for specific customer
-    Endpoint can be used by both the coach and the customer
+    Endpoint can be used by both the coach and the customer.
+    All plans are returned without limit, otherwise the offset of the next page is sent
+    in X-Next-Offset header
 
     Args:
         customer_id: customer's str(UUID)
+        response: response to set the next page offset header on
+        limit: max number of plans in response, the latest plans go first
+        offset: number of plans to skip
         user_service: service for interacting with profile
         customer_service: service for interacting with customer
         training_plan_service: service responsible for training plans creation
@@ -269,9 +302,13 @@ async def get_all_training_plans(
     if customer is None:
         raise HTTPException(status_code=404, detail=f"customer with id={customer_id} doesn't exist")
 
-    training_plans = await training_plan_service.get_customer_training_plans(uow, str(customer.id))
+    training_plans, next_offset = await training_plan_service.get_customer_training_plans(
+        uow, str(customer.id), limit=limit, offset=offset,
+    )
+    if next_offset is not None:
+        response.headers[NEXT_OFFSET_HEADER] = str(next_offset)
 
-    response = [
+    return [
         TrainingPlanOut(
             id=str(training_plan.id),
             start_date=training_plan.start_date.strftime("%Y-%m-%d"),
@@ -285,8 +322,6 @@ async def get_all_training_plans(
         for training_plan in training_plans
     ]
 
-    return response
-
 
 @customer_router.get(
     "/customers/{customer_id}/training_plans/{training_plan_id}",
@@ -295,18 +330,23 @@ async def get_all_training_plans(
 async def get_training_plan(
     training_plan_id: UUID,
     customer_id: str,
+    request: Request,
+    response: Response,
     user_service: CoachService = Depends(provide_user_service),
     training_plan_service: TrainingPlanService = Depends(provide_training_plan_service),
     customer_service: CustomerService = Depends(provide_customer_service),
     uow: AsyncSession = Depends(provide_database_unit_of_work),
-) -> TrainingPlanOutFull:
+) -> TrainingPlanOutFull | Response:
     """
     Gets full info for specific training plan by their ID
-    Endpoint can be used by both the coach and the customer
+    Endpoint can be used by both the coach and the customer.
+    Client revalidates saved plan with If-None-Match header, 304 is returned if the plan isn't changed.
 
     Args:
         training_plan_id: str(UUID) of specified training plan
         customer_id: str(UUID) of specified customer
+        request: request with optional If-None-Match header
+        response: response to set validators
         user_service: service for interacting with profile
         training_plan_service: service for interacting with customer training plans
         customer_service: service for interacting with customer
@@ -315,17 +355,26 @@ async def get_training_plan(
     Raise:
         HTTPException: 404 when customer or training plan are not found
     """
+    if_none_match = request.headers.get("if-none-match")
+    training_plan = await training_plan_service.get_training_plan_by_id(uow, training_plan_id)
+    if (
+        training_plan is not None
+        and str(training_plan.customer_id) == customer_id
+        and etag_matches(if_none_match, training_plan.etag)
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=training_plan_validators(training_plan))
+
     customer = await customer_service.get_customer_by_pk(uow, pk=customer_id)
     if customer is None:
         logger.info(f"customer.does.not.exist, id={customer_id}")
         raise HTTPException(status_code=404, detail=f"Customer with id={customer_id} doesn't exist")
 
-    training_plan = await training_plan_service.get_training_plan_by_id(uow, training_plan_id)
     if training_plan is None:
         logger.info(f"training.plan.does.not.exist, id={training_plan_id}")
         raise HTTPException(status_code=404, detail=f"Training plan with id={training_plan_id} doesn't exist")
 
-    response = TrainingPlanOutFull(
+    response.headers.update(training_plan_validators(training_plan))
+    return TrainingPlanOutFull(
         id=training_plan.id,
         start_date=training_plan.start_date,
         end_date=training_plan.end_date,
@@ -339,8 +388,13 @@ async def get_training_plan(
         notes=training_plan.notes,
     )
 
-    # TODO: сделать на уровне слоя данных, поняв где нарушается сортировка
-    for training in response.trainings:
-        training.exercises.sort(key=lambda x: x.ordering)
 
-    return response
+def training_plan_validators(training_plan: TrainingPlanDetailDtoSchema) -> dict[str, str]:
+    """
+    Client must revalidate saved plan before use
+    """
+    return {
+        "ETag": training_plan.etag,
+        "Last-Modified": formatdate(training_plan.last_modified.timestamp(), usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
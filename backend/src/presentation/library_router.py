@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.service.coach_service import CoachService
@@ -8,6 +8,9 @@ from src.presentation.schemas.training_plan_schema import ExerciseCreateIn, Exer
 
 gym_router = APIRouter()
 
+# clients keep it and send it back as since_version to receive only new library items
+LIBRARY_VERSION_HEADER = "X-Library-Version"
+
 
 @gym_router.post(
     "/exercises",
@@ -51,14 +54,18 @@ async def create_exercise(
     summary="Returns all exercises",
     status_code=status.HTTP_200_OK)
 async def get_exercises(
+    response: Response,
+    since_version: int | None = Query(default=None, ge=0),
     user_service: CoachService = Depends(provide_user_service),
     library_service: LibraryService = Depends(provide_library_service),
     uow: AsyncSession = Depends(provide_database_unit_of_work),
 ) -> list:
     """
-    Returns all exercises for coach
+    Returns all exercises for coach, only the ones created after since_version if it's specified
 
     Args:
+        response: response to set the library version header on
+        since_version: library version the client already has
         user_service: returns current application user
         library_service: service to organize data in gym library
         uow: database unit of work
@@ -67,9 +74,10 @@ async def get_exercises(
         list of exercises
     """
     user = user_service.user
-    exercises = await library_service.get_exercise_list(uow, str(user.id))
+    exercises, version = await library_service.get_exercise_list(uow, user.id, since_version)
+    response.headers[LIBRARY_VERSION_HEADER] = str(version)
 
-    response = [
+    return [
         ExerciseForCoachOut(
             id=str(exercise.id),
             name=exercise.name,
@@ -78,7 +86,6 @@ async def get_exercises(
         )
         for exercise in exercises
     ]
-    return response
 
 
 @gym_router.get(
@@ -86,14 +93,18 @@ async def get_exercises(
     summary="Returns all muscle groups",
     status_code=status.HTTP_200_OK)
 async def get_muscle_groups(
+    response: Response,
+    since_version: int | None = Query(default=None, ge=0),
     user_service: CoachService = Depends(provide_user_service),
     library_service: LibraryService = Depends(provide_library_service),
     uow: AsyncSession = Depends(provide_database_unit_of_work),
 ) -> list:
     """
-    Returns all muscle groups for coach
+    Returns all muscle groups for coach, only the ones created after since_version if it's specified
 
     Args:
+        response: response to set the library version header on
+        since_version: library version the client already has
         user_service: returns current application user
         library_service: service to organize data in gym library
         uow: database unit of work
@@ -101,13 +112,13 @@ async def get_muscle_groups(
     Returns:
         list of muscle groups
     """
-    muscle_groups = await library_service.get_muscle_group_list(uow)
+    muscle_groups, version = await library_service.get_muscle_group_list(uow, since_version)
+    response.headers[LIBRARY_VERSION_HEADER] = str(version)
 
-    response = []
-    for muscle_group in muscle_groups:
-        response.append({
+    return [
+        {
             "id": str(muscle_group.id),
             "name": muscle_group.name
-        })
-
-    return response
+        }
+        for muscle_group in muscle_groups
+    ]
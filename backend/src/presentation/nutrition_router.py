@@ -2,12 +2,14 @@ import logging
 from datetime import date
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.presentation.schemas.nutrition_schema import (
     DailyMealsOut,
     DailyDietOut,
+    DailyDietNutrientsOut,
+    DietRangeOut,
     ProductOut,
     ProductToDietRequest,
     HistoryProductOut,
@@ -31,6 +33,50 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 nutrition_router = APIRouter(prefix="/nutrition")
 
 
+@nutrition_router.get(
+    "/diets",
+    summary="Get customer diet totals for date range",
+    response_model=DietRangeOut,
+    status_code=status.HTTP_200_OK)
+async def get_diet_range(
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    limit: int = Query(default=31, ge=1, le=366),
+    user_service: CoachService | CustomerService = Depends(provide_user_service),
+    diet_service: DietService = Depends(provide_diet_service),
+    uow: AsyncSession = Depends(provide_database_unit_of_work),
+) -> DietRangeOut:
+    """
+    Get consumed and recommended totals of customer's logged days within the range,
+    days without logs are skipped
+
+    Args:
+        date_from: first day of the range
+        date_to: last day of the range
+        limit: max number of days in response, next page starts from next_from
+        user_service: both user roles can access
+        diet_service: service responsible for customer diets
+        uow: db session injection
+    Returns:
+        response: logged days totals ordered by date
+    """
+    if date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="from date must not be after to date")
+
+    user = user_service.user
+    days, next_from = await diet_service.get_customer_diet_range(
+        uow=uow,
+        customer_id=user.id,
+        date_from=date_from,
+        date_to=date_to,
+        limit=limit,
+    )
+    return DietRangeOut(
+        days=[DailyDietNutrientsOut(id=day.diet_day_id, **day.dict(exclude={"diet_day_id"})) for day in days],
+        next_from=next_from,
+    )
+
+
 @nutrition_router.get(
     "/diets/{specific_day}",
     summary="Get customer daily diet",
@@ -93,7 +139,9 @@ async def add_product_to_diet_meal(
 
     updated_daily_diet = await diet_service.put_product_to_diet_meal(
         uow=uow,
+        customer_id=user.id,
         daily_diet_id=request.daily_diet_id,
+        specific_day=request.specific_day,
         meal_type=request.meal_type,
         adding_products_data=request.product_data,
     )
@@ -101,7 +149,7 @@ async def add_product_to_diet_meal(
     if updated_daily_diet is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"couldn't.update.customer.diet.meal {user.id=} {request.daily_diet_id=}",
+            detail=f"couldn't.update.customer.diet.meal {user.id=} {request.daily_diet_id=} {request.specific_day=}",
         )
 
     actual_nutrition = DailyMealsOut.from_diet_dto(updated_daily_diet)
@@ -258,6 +306,8 @@ async def update_product_in_catalog(
     status_code=status.HTTP_200_OK)
 async def find_product_in_catalog(
     query_text: str,
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
     user_service: CoachService | CustomerService = Depends(provide_user_service),
     product_service: ProductService = Depends(provide_product_service),
     uow: AsyncSession = Depends(provide_database_unit_of_work),
@@ -267,6 +317,8 @@ async def find_product_in_catalog(
 
     Args:
         query_text: word for looking up in db
+        limit: max number of products in response
+        offset: number of products to skip
         user_service: both user roles can access
         product_service: service responsible for nutrition product logic
         uow: db session injection
@@ -274,7 +326,7 @@ async def find_product_in_catalog(
         response: list of suitable products
     """
     user = user_service.user
-    products_dto = await product_service.search_products(query_text.lower())
+    products_dto = await product_service.search_products(uow, query_text, limit, offset)
     products_response = [
         ProductOut(
             barcode=p.barcode,
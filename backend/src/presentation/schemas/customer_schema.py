@@ -21,3 +21,7 @@ class CustomerOut(CustomerCreateIn, BaseModel):
     last_name: str
     phone_number: str | None
     last_plan_end_date: str | None
+
+
+class CustomerListItemOut(CustomerOut):
+    is_archived: bool
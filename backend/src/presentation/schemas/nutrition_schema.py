@@ -2,7 +2,7 @@ from datetime import date
 from enum import Enum
 from uuid import UUID
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, root_validator, validator
 
 
 class ProductOut(BaseModel):
@@ -46,6 +46,16 @@ class DailyNutrientsOut(BaseModel):
     consumed_carbs: int
 
 
+class DailyDietNutrientsOut(DailyNutrientsOut):
+    id: UUID
+    date: date
+
+
+class DietRangeOut(BaseModel):
+    days: list[DailyDietNutrientsOut]
+    next_from: date | None
+
+
 class DailyMealsOut(BaseModel):
     date: date
     daily_total: DailyNutrientsOut
@@ -83,7 +93,7 @@ class DailyMealOut(BaseModel):
 
 
 class DailyDietOut(BaseModel):
-    id: UUID
+    id: UUID | None
     date: str
     actual_nutrition: DailyMealsOut | None
 
@@ -101,6 +111,13 @@ class ProductAddInDiet(BaseModel):
 
 
 class ProductToDietRequest(BaseModel):
-    daily_diet_id: UUID
+    daily_diet_id: UUID | None = None
+    specific_day: date | None = None
     meal_type: MealType
     product_data: list[ProductAddInDiet]
+
+    @root_validator(skip_on_failure=True)
+    def check_diet_day(cls, values: dict) -> dict:
+        if values.get("daily_diet_id") is None and values.get("specific_day") is None:
+            raise ValueError("daily_diet_id or specific_day must be specified")
+        return values
@@ -35,6 +35,7 @@ class TokenPayload(BaseModel):
     """
     sub: str
     exp: int
+    user_type: str | None
 
 
 class NewUserPassword(BaseModel):
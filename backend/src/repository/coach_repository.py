@@ -4,7 +4,7 @@ from sqlalchemy import select, update, delete, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
 
-from src import Coach
+from src import Coach, Customer
 from src.presentation.schemas.register_schema import CoachRegistrationData
 from src.schemas.coach_dto import CoachDtoSchema
 
@@ -49,6 +49,14 @@ class CoachRepository:
 
         return CoachDtoSchema.from_coach_dto(coach)
 
+    async def provide_customer_usernames(self, uow: AsyncSession, pk: str) -> list[str]:
+        """
+        Returns usernames of coach customers who have already logged in
+        """
+        query = select(Customer.username).where(Customer.coach_id == pk, Customer.username.is_not(None))
+        result = await uow.execute(query)
+        return list(result.scalars().all())
+
     async def delete_coach(self, uow: AsyncSession, pk: str) -> str | None:
         stmt = delete(Coach).where(Coach.id == pk)
         result = await uow.execute(stmt)
@@ -1,11 +1,34 @@
-from sqlalchemy import select, delete, update, func, nullsfirst, and_, literal_column
-from sqlalchemy.orm import selectinload
+from datetime import date, datetime
+from uuid import UUID
+
+from sqlalchemy import select, delete, update, func, and_, or_, false, tuple_, literal_column
+from sqlalchemy.orm import load_only, noload
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src import Customer, TrainingPlan
+from src import Customer, CustomerOneTimePassword
 from src.presentation.schemas.register_schema import CustomerRegistrationData
-from src.schemas.customer_dto import CustomerDtoSchema, CustomerShortDtoSchema
+from src.schemas.customer_dto import CustomerDtoSchema, CustomerShortDtoSchema, CustomerListCursor
+
+
+# columns of CustomerDtoSchema, relationships like training plans aren't loaded with customer
+CUSTOMER_PROJECTION = (
+    load_only(
+        Customer.id,
+        Customer.username,
+        Customer.first_name,
+        Customer.coach_id,
+        Customer.fcm_token,
+        Customer.last_name,
+        Customer.password,
+        Customer.telegram_username,
+        Customer.gender,
+        Customer.birthday,
+        Customer.email,
+        Customer.last_plan_end_date,
+    ),
+    noload("*"),
+)
 
 
 class CustomerRepository:
@@ -24,12 +47,11 @@ class CustomerRepository:
         )
 
         result = await uow.execute(statement)
-        customer_id = result.scalar_one_or_none()
+        customer = result.fetchone()
 
-        if customer_id is None:
+        if customer is None:
             return None
 
-        customer = await self.provide_by_pk(uow, str(customer_id))
         return CustomerDtoSchema.from_orm(customer)
 
     async def update_customer(self, uow: AsyncSession, **kwargs) -> CustomerDtoSchema | None:
@@ -61,10 +83,7 @@ class CustomerRepository:
     async def provide_by_pk(self, uow: AsyncSession, pk: str) -> CustomerDtoSchema | None:
         query = (
             select(Customer).where(Customer.id == pk)
-            .options(
-                selectinload(Customer.training_plans).subqueryload(TrainingPlan.trainings),
-                selectinload(Customer.training_plans).subqueryload(TrainingPlan.diets)
-            )
+            .options(*CUSTOMER_PROJECTION)
         )
 
         result = await uow.execute(query)
@@ -75,13 +94,19 @@ class CustomerRepository:
 
         return CustomerDtoSchema.from_orm(customer)
 
-    async def provide_by_otp(self, uow: AsyncSession, password: str) -> CustomerDtoSchema | None:
+    async def provide_by_otp(self, uow: AsyncSession, username: str, password: str) -> CustomerDtoSchema | None:
         query = (
-            select(Customer).where(Customer.password == password)
-            .options(
-                selectinload(Customer.training_plans).subqueryload(TrainingPlan.trainings),
-                selectinload(Customer.training_plans).subqueryload(TrainingPlan.diets)
+            select(Customer)
+            .join(CustomerOneTimePassword, CustomerOneTimePassword.customer_id == Customer.id)
+            .where(
+                and_(
+                    CustomerOneTimePassword.username == username,
+                    CustomerOneTimePassword.otp == password,
+                    CustomerOneTimePassword.used_at.is_(None),
+                    CustomerOneTimePassword.expires_at > datetime.now(),
+                )
             )
+            .options(*CUSTOMER_PROJECTION)
         )
 
         result = await uow.execute(query)
@@ -92,9 +117,57 @@ class CustomerRepository:
 
         return CustomerDtoSchema.from_orm(customer)
 
+    async def create_otp(
+        self, uow: AsyncSession, customer_id: UUID, username: str, otp: str, expires_at: datetime
+    ) -> UUID | None:
+        # expired password doesn't hold the value anymore
+        await uow.execute(
+            update(CustomerOneTimePassword)
+            .where(
+                and_(
+                    CustomerOneTimePassword.username == username,
+                    CustomerOneTimePassword.otp == otp,
+                    CustomerOneTimePassword.used_at.is_(None),
+                    CustomerOneTimePassword.expires_at <= datetime.now(),
+                )
+            )
+            .values(used_at=datetime.now())
+        )
+
+        statement = (
+            insert(CustomerOneTimePassword)
+            .values(customer_id=customer_id, username=username, otp=otp, expires_at=expires_at)
+            .on_conflict_do_nothing(
+                index_elements=[CustomerOneTimePassword.username, CustomerOneTimePassword.otp],
+                index_where=CustomerOneTimePassword.used_at.is_(None),
+            )
+            .returning(CustomerOneTimePassword.id)
+        )
+
+        result = await uow.execute(statement)
+        return result.scalar_one_or_none()
+
+    async def consume_otp(self, uow: AsyncSession, customer_id: UUID, otp: str) -> UUID | None:
+        statement = (
+            update(CustomerOneTimePassword)
+            .where(
+                and_(
+                    CustomerOneTimePassword.customer_id == customer_id,
+                    CustomerOneTimePassword.otp == otp,
+                    CustomerOneTimePassword.used_at.is_(None),
+                )
+            )
+            .values(used_at=datetime.now())
+            .returning(CustomerOneTimePassword.id)
+        )
+
+        result = await uow.execute(statement)
+        return result.scalar_one_or_none()
+
     async def provide_by_username(self, uow: AsyncSession, username: str) -> CustomerDtoSchema | None:
         query = (
             select(Customer).where(Customer.username == username)
+            .options(*CUSTOMER_PROJECTION)
         )
         result = await uow.execute(query)
         customer = result.scalar_one_or_none()
@@ -115,6 +188,7 @@ class CustomerRepository:
                     Customer.last_name == last_name,
                 )
             )
+            .options(*CUSTOMER_PROJECTION)
         )
         result = await uow.execute(query)
         customer = result.scalar_one_or_none()
@@ -124,23 +198,60 @@ class CustomerRepository:
 
         return CustomerDtoSchema.from_orm(customer)
 
-    async def provide_customers_by_coach_id(self, uow: AsyncSession, coach_id: str) -> list[CustomerShortDtoSchema]:
+    async def provide_customers_page_by_coach_id(
+        self,
+        uow: AsyncSession,
+        coach_id: str,
+        archived_before: date,
+        limit: int | None = None,
+        after: CustomerListCursor | None = None,
+        search: str | None = None,
+    ) -> list[CustomerShortDtoSchema]:
+        """
+        Returns page of coach customers, active customers go first, then archived ones.
+        Customers are ordered by last plan end date within the partition, without plans first.
+
+        Args:
+            uow: db session injection
+            coach_id: customers' coach str(UUID)
+            archived_before: customer is archived if the last plan ended before the date
+            limit: max number of customers on the page, all customers are returned if it isn't set
+            after: sort key of the last customer on the previous page
+            search: part of customer's first name, last name or phone number
+        """
+        is_archived = func.coalesce(Customer.last_plan_end_date < archived_before, false())
+        # customers without plans go first within active ones
+        sort_date = func.coalesce(Customer.last_plan_end_date, date.min)
+
         query = (
             select(
                 Customer.id,
                 Customer.first_name,
-                Customer.coach_id,
-                Customer.password,
                 Customer.last_name,
                 Customer.username,
-                func.max(TrainingPlan.end_date).label("last_plan_end_date")
+                Customer.last_plan_end_date,
+                is_archived.label("is_archived"),
             )
-            .join(TrainingPlan, Customer.id == TrainingPlan.customer_id, isouter=True)
             .where(Customer.coach_id == coach_id)
-            .group_by(Customer.id)
-            .order_by(nullsfirst(func.max(TrainingPlan.end_date).asc()))
+            .order_by(is_archived, sort_date, Customer.id)
+            .limit(limit)
         )
 
+        if search:
+            pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            query = query.where(
+                or_(
+                    Customer.first_name.ilike(pattern),
+                    Customer.last_name.ilike(pattern),
+                    Customer.username.ilike(pattern),
+                )
+            )
+
+        if after is not None:
+            query = query.where(
+                tuple_(is_archived, sort_date, Customer.id)
+                > tuple_(after.is_archived, after.last_plan_end_date, after.id)
+            )
+
         result = await uow.execute(query)
-        customers = result.fetchall()
-        return [CustomerShortDtoSchema.from_orm(customer) for customer in customers]
+        return [CustomerShortDtoSchema.from_orm(customer) for customer in result]
@@ -1,18 +1,28 @@
-from uuid import UUID
+from uuid import UUID, uuid4
 from datetime import date
 
-from sqlalchemy import select, update, and_
+from sqlalchemy import select, update, and_, union_all, literal_column
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import selectinload
 
-from src import Diet, DietDays, TrainingPlan
-from src.schemas.diet_dto import DailyDietDtoSchema
+from src import Diet, DietDays, DietDayEntry, TrainingPlan
+from src.schemas.diet_dto import (
+    DailyDietDtoSchema,
+    DailyDietNutrientsDtoSchema,
+    DietDtoSchema,
+    MEAL_TYPES,
+    NUTRIENTS,
+)
 
 
 class DietRepository:
-    async def insert_diet_templates(self, uow: AsyncSession, training_plan_id: UUID, diets: list) -> list[UUID]:
-        diet_orm = [
-            Diet(
+    async def insert_diet_templates(
+        self, uow: AsyncSession, training_plan_id: UUID, diets: list
+    ) -> list[DietDtoSchema]:
+        diet_rows = [
+            dict(
+                id=uuid4(),
                 total_proteins=diet.proteins,
                 total_fats=diet.fats,
                 total_carbs=diet.carbs,
@@ -21,70 +31,61 @@ class DietRepository:
             )
             for diet in diets
         ]
+        if diet_rows:
+            await uow.execute(insert(Diet).values(diet_rows))
 
-        uow.add_all(diet_orm)
-        await uow.flush()
+        return [DietDtoSchema(**diet_row) for diet_row in diet_rows]
 
-        return diet_orm
+    async def upsert_daily_diet(self, uow: AsyncSession, customer_id: UUID, specific_day: date) -> UUID | None:
+        """
+        Creates customer's diet day for the coach diet active on the day unless it exists.
+        Concurrent requests for the same day get the same row.
 
-    async def create_daily_diet(
-        self,
-        uow: AsyncSession,
-        template_diet_id: UUID,
-        specific_day: date,
-    ) -> DailyDietDtoSchema | None:
-        query = await uow.execute(
-            select(Diet).filter(Diet.id == template_diet_id)
+        Return:
+            diet day id, None if customer doesn't have a diet on the day
+        """
+        result = await uow.execute(
+            select(Diet.id)
+            .join(TrainingPlan, Diet.training_plan_id == TrainingPlan.id)
+            .where(
+                and_(
+                    TrainingPlan.customer_id == customer_id,
+                    TrainingPlan.start_date <= specific_day,
+                    TrainingPlan.end_date >= specific_day,
+                )
+            )
         )
-        template_diet = query.scalars().first()
-
-        daily_diet = DietDays(
-            date=specific_day,
-            diet=template_diet,
-            diet_id=template_diet.id,
-            breakfast={
-                "total_calories": 0,
-                "total_proteins": 0,
-                "total_fats": 0,
-                "total_carbs": 0,
-                "products": [],
-            },
-            lunch={
-                "total_calories": 0,
-                "total_proteins": 0,
-                "total_fats": 0,
-                "total_carbs": 0,
-                "products": [],
-            },
-            dinner={
-                "total_calories": 0,
-                "total_proteins": 0,
-                "total_fats": 0,
-                "total_carbs": 0,
-                "products": [],
-            },
-            snacks={
-                "total_calories": 0,
-                "total_proteins": 0,
-                "total_fats": 0,
-                "total_carbs": 0,
-                "products": [],
-            },
+        template_diet_id = result.scalar_one_or_none()
+        if template_diet_id is None:
+            return None
 
+        result = await uow.execute(
+            insert(DietDays)
+            .values(diet_id=template_diet_id, date=specific_day)
+            .on_conflict_do_nothing(index_elements=[DietDays.diet_id, DietDays.date])
+            .returning(DietDays.id)
         )
+        daily_diet_id = result.scalar_one_or_none()
+        if daily_diet_id is not None:
+            return daily_diet_id
 
-        uow.add(daily_diet)
-        await uow.flush()
-
-        return DailyDietDtoSchema.from_daily_diet_fact(daily_diet)
+        # the day is already created by previous or concurrent request
+        result = await uow.execute(
+            select(DietDays.id).where(and_(DietDays.diet_id == template_diet_id, DietDays.date == specific_day))
+        )
+        return result.scalar_one()
 
     async def get_daily_diet_by_training_plan_date_range(
         self, uow: AsyncSession, customer_id: UUID, specific_day: date
     ) -> DailyDietDtoSchema | None:
+        """
+        Looks up coach diet of the plan active on the day and customer's diet day for the day only
+        """
         query = (
-            select(Diet)
+            select(Diet, DietDays)
             .join(TrainingPlan, Diet.training_plan_id == TrainingPlan.id)
-            .options(selectinload(Diet.diet_days))
+            .outerjoin(DietDays, and_(DietDays.diet_id == Diet.id, DietDays.date == specific_day))
+            .options(selectinload(DietDays.entries))
             .where(
                 and_(
                     TrainingPlan.customer_id == customer_id,
@@ -94,8 +95,49 @@ class DietRepository:
             )
         )
         result = await uow.execute(query)
-        recommended_diet_by_coach = result.scalar_one_or_none()
-        return DailyDietDtoSchema.from_recommended_diet(recommended_diet_by_coach, specific_day)
+        row = result.one_or_none()
+        if row is None:
+            return DailyDietDtoSchema.from_recommended_diet(None, None, specific_day)
+
+        recommended_diet_by_coach, specific_day_fact = row
+        return DailyDietDtoSchema.from_recommended_diet(recommended_diet_by_coach, specific_day_fact, specific_day)
+
+    async def get_daily_nutrients_by_date_range(
+        self, uow: AsyncSession, customer_id: UUID, date_from: date, date_to: date, limit: int
+    ) -> list[DailyDietNutrientsDtoSchema]:
+        """
+        Returns totals of logged days ordered by date, days without logs aren't returned
+        """
+        consumed = {
+            nutrient: sum(getattr(DietDays, f"{meal_type}_{nutrient}") for meal_type in MEAL_TYPES)
+            for nutrient in NUTRIENTS
+        }
+        query = (
+            select(
+                DietDays.id.label("diet_day_id"),
+                DietDays.date,
+                Diet.total_calories,
+                Diet.total_proteins,
+                Diet.total_fats,
+                Diet.total_carbs,
+                *[value.label(f"consumed_{nutrient}") for nutrient, value in consumed.items()],
+            )
+            .join(Diet, DietDays.diet_id == Diet.id)
+            .join(TrainingPlan, Diet.training_plan_id == TrainingPlan.id)
+            .where(
+                and_(
+                    TrainingPlan.customer_id == customer_id,
+                    DietDays.date >= date_from,
+                    DietDays.date <= date_to,
+                    TrainingPlan.start_date <= DietDays.date,
+                    TrainingPlan.end_date >= DietDays.date,
+                )
+            )
+            .order_by(DietDays.date)
+            .limit(limit)
+        )
+        result = await uow.execute(query)
+        return [DailyDietNutrientsDtoSchema.from_orm(row) for row in result]
 
     async def get_daily_diet_by_id(
         self,
@@ -104,7 +146,7 @@ class DietRepository:
     ) -> DailyDietDtoSchema | None:
         query = (
             select(DietDays)
-            .options(selectinload(DietDays.diet))
+            .options(selectinload(DietDays.diet), selectinload(DietDays.entries))
             .where(DietDays.id == daily_diet_id)
         )
 
@@ -116,39 +158,81 @@ class DietRepository:
 
         return DailyDietDtoSchema.from_daily_diet_fact(diet_day)
 
-    async def update_daily_diet_meal(
+    async def append_products_to_meal(
         self,
         uow: AsyncSession,
-        updated_daily_diet: DailyDietDtoSchema,
+        daily_diet_id: UUID,
         meal_type: str,
-        updated_meal: dict,
+        products: list[dict],
+        nutrients: dict[str, float],
     ) -> DailyDietDtoSchema | None:
-        column_to_update = getattr(DietDays, meal_type)
-
-        stmt = (
+        """
+        Increments meal totals and inserts entries for added products.
+        Updated diet day is locked until the end of transaction,
+        concurrent update waits for it and increments fresh totals.
+        Totals come from the update, inserted entries are returned together with the existing ones.
+
+        Args:
+            uow: db session injection
+            daily_diet_id: customer's diet day id
+            meal_type: breakfast, lunch, dinner or snacks
+            products: products with nutrients calculated for consumed amount
+            nutrients: sum of products nutrients by meal total key e.g. total_calories
+        """
+        meal_totals = {}
+        for nutrient in NUTRIENTS:
+            column = getattr(DietDays, f"{meal_type}_{nutrient}")
+            meal_totals[column] = column + nutrients[f"total_{nutrient}"]
+
+        statement = (
             update(DietDays)
-            .where(DietDays.id == updated_daily_diet.diet_day_id)
-            .values({column_to_update: updated_meal})
-            .returning(DietDays.id)
+            .where(and_(DietDays.id == daily_diet_id, Diet.id == DietDays.diet_id))
+            .values(meal_totals)
+            .returning(
+                *DietDays.__table__.columns,
+                Diet.total_calories,
+                Diet.total_proteins,
+                Diet.total_fats,
+                Diet.total_carbs,
+            )
+            .execution_options(synchronize_session=False)
         )
 
-        result = await uow.execute(stmt)
-        updated_record_id = result.scalar_one_or_none()
-        await uow.commit()
+        result = await uow.execute(statement)
+        daily_diet_fact = result.fetchone()
 
-        if updated_record_id is None:
+        if daily_diet_fact is None:
             return None
 
-        query = (
-            select(DietDays)
-            .options(joinedload(DietDays.diet))
-            .where(DietDays.id == updated_record_id)
-        )
-
-        result = await uow.execute(query)
-        daily_diet_fact = result.scalar_one_or_none()
+        entry_columns = DietDayEntry.__table__.columns
+        query = select(*entry_columns).where(DietDayEntry.diet_day_id == daily_diet_id)
+        if products:
+            # rows inserted by the CTE aren't visible to the select of the same statement
+            inserted_entries = (
+                insert(DietDayEntry)
+                .values([
+                    dict(
+                        diet_day_id=daily_diet_id,
+                        meal_type=meal_type,
+                        barcode=product["barcode"],
+                        name=product["name"],
+                        type=product["type"],
+                        vendor_name=product["vendor_name"],
+                        portion_size=product.get("portion_size"),
+                        amount=product["amount"],
+                        calories=product["calories"],
+                        proteins=product["proteins"],
+                        fats=product["fats"],
+                        carbs=product["carbs"],
+                    )
+                    for product in products
+                ])
+                .returning(*entry_columns)
+                .cte("inserted_entries")
+            )
+            query = union_all(query, select(inserted_entries))
 
-        if daily_diet_fact is None:
-            return None
+        result = await uow.execute(query.order_by(literal_column("created")))
+        entries = result.fetchall()
 
-        return DailyDietDtoSchema.from_daily_diet_fact(daily_diet_fact)
+        return DailyDietDtoSchema.from_daily_diet_row(daily_diet_fact, entries)
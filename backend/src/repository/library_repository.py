@@ -1,6 +1,6 @@
 from uuid import UUID
 
-from sqlalchemy import select, or_, literal_column
+from sqlalchemy import select, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
 
@@ -56,22 +56,26 @@ class ExerciseRepository:
         exercise = await self.get_exercise_by_id(uow, exercise_id)
         return exercise
 
-    async def get_coach_exercises(self, uow: AsyncSession, coach_id: str) -> list[ExerciseFullDtoSchema]:
+    async def get_global_exercises(self, uow: AsyncSession) -> list[ExerciseFullDtoSchema]:
+        return await self._get_exercises(uow, Exercise.coach_id.is_(None))
+
+    async def get_custom_exercises(self, uow: AsyncSession, coach_id: UUID) -> list[ExerciseFullDtoSchema]:
+        return await self._get_exercises(uow, Exercise.coach_id == coach_id)
+
+    @staticmethod
+    async def _get_exercises(uow: AsyncSession, *criteria) -> list[ExerciseFullDtoSchema]:
         query = (
             select(
                 Exercise.id,
                 Exercise.name,
                 Exercise.coach_id,
+                Exercise.created,
                 MuscleGroup.id.label('muscle_group_id'),
                 MuscleGroup.name.label('muscle_group_name'),
             )
             .join(MuscleGroup, Exercise.muscle_group_id == MuscleGroup.id)
-            .where(
-                or_(
-                    Exercise.coach_id.is_(None),
-                    Exercise.coach_id == UUID(coach_id),
-                )
-            )
+            .where(*criteria)
+            .order_by(Exercise.created, Exercise.id)
         )
         result = await uow.execute(query)
         exercises = result.fetchall()
@@ -92,7 +96,10 @@ class MuscleGroupRepository:
         return MuscleGroupDto.from_orm(muscle_group)
 
     async def get_all_muscle_groups(self, uow: AsyncSession) -> list[MuscleGroupDto]:
-        query = select(MuscleGroup.id, MuscleGroup.name)
+        query = (
+            select(MuscleGroup.id, MuscleGroup.name, MuscleGroup.created)
+            .order_by(MuscleGroup.created, MuscleGroup.id)
+        )
         result = await uow.execute(query)
         muscle_groups = result.fetchall()
         return [MuscleGroupDto.from_orm(muscle_group) for muscle_group in muscle_groups]
@@ -0,0 +1,84 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import select, update, delete, and_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import OutboxMessage, OutboxChannel
+from src.schemas.outbox_dto import OutboxMessageDtoSchema
+
+
+class OutboxRepository:
+    async def add_message(self, uow: AsyncSession, channel: OutboxChannel, payload: dict) -> UUID:
+        statement = (
+            insert(OutboxMessage)
+            .values(channel=channel.value, payload=payload)
+            .returning(OutboxMessage.id)
+        )
+        result = await uow.execute(statement)
+        return result.scalar_one()
+
+    async def provide_pending_messages(self, uow: AsyncSession, limit: int) -> list[OutboxMessageDtoSchema]:
+        """
+        Locks due messages, other relay workers skip them until the transaction ends
+        """
+        query = (
+            select(OutboxMessage)
+            .where(
+                and_(
+                    OutboxMessage.sent_at.is_(None),
+                    OutboxMessage.failed_at.is_(None),
+                    OutboxMessage.next_attempt_at <= datetime.now(),
+                )
+            )
+            .order_by(OutboxMessage.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await uow.execute(query)
+        messages = result.scalars().all()
+        return [OutboxMessageDtoSchema.from_orm(message) for message in messages]
+
+    async def mark_sent(self, uow: AsyncSession, ids: list[UUID]) -> None:
+        """
+        Payload isn't needed after delivery, it's cleared as it may contain credentials
+        """
+        if not ids:
+            return
+
+        statement = (
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ids))
+            .values(sent_at=datetime.now(), payload={}, modified=datetime.now())
+        )
+        await uow.execute(statement)
+
+    async def delete_sent_messages(self, uow: AsyncSession, sent_before: datetime) -> int:
+        statement = delete(OutboxMessage).where(OutboxMessage.sent_at < sent_before)
+        result = await uow.execute(statement)
+        return result.rowcount
+
+    async def mark_attempt_failed(
+        self,
+        uow: AsyncSession,
+        id_: UUID,
+        attempts: int,
+        next_attempt_at: datetime | None,
+        error: str,
+    ) -> None:
+        """
+        Schedules next attempt, message without next attempt won't be delivered anymore
+        """
+        statement = (
+            update(OutboxMessage)
+            .where(OutboxMessage.id == id_)
+            .values(
+                attempts=attempts,
+                next_attempt_at=next_attempt_at or datetime.now(),
+                failed_at=None if next_attempt_at else datetime.now(),
+                last_error=error,
+                modified=datetime.now(),
+            )
+        )
+        await uow.execute(statement)
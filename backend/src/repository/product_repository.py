@@ -1,36 +1,41 @@
+from typing import AsyncIterator
 from uuid import UUID
 
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, func, literal_column
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src import CustomerHistoryProducts
-from src.persistence.dynamo_db_models import Product
+from src import CustomerHistoryProducts, ProductSearchIndex
 from src.presentation.schemas.product_schema import ProductCreateIn
+from src.repository.product_storage import ProductStorage, get_product_storage
 from src.schemas.product_dto import ProductDtoSchema, HistoryProductDtoSchema
+from src.shared.settings import InfrastructureSettings
+from src.utils import normalize_search_text
+
+infrastructure_settings = InfrastructureSettings()
 
 
 class ProductRepository:
+    def __init__(self, storage: ProductStorage | None = None) -> None:
+        self.storage = storage or get_product_storage()
+
     async def get_product_by_barcode(self, barcode: str) -> ProductDtoSchema | None:
-        try:
-            product = Product.get(barcode)
-        except Product.DoesNotExist:
-            return None
-        return ProductDtoSchema.from_product(product)
+        return await self.storage.get(barcode)
 
     async def get_products_by_barcodes(self, barcodes: list[str]) -> list[ProductDtoSchema]:
-        products = []
-        for product in Product.batch_get(barcodes):
-            if product:
-                products.append(ProductDtoSchema.from_product(product))
-        return products
+        return await self.storage.batch_get(barcodes)
+
+    def get_product_batches(self, batch_size: int) -> AsyncIterator[list[ProductDtoSchema]]:
+        return self.storage.scan_batches(batch_size)
 
     async def insert_product(
         self,
+        uow: AsyncSession,
         user_id: UUID,
         product_data: ProductCreateIn,
         product_calories: int
     ) -> ProductDtoSchema:
-        new_product = Product(
+        new_product = ProductDtoSchema(
             barcode=product_data.barcode,
             name=product_data.name,
             type=product_data.type,
@@ -41,8 +46,39 @@ class ProductRepository:
             vendor_name=product_data.vendor_name,
             user_id=str(user_id),
         )
-        new_product.save()
-        return ProductDtoSchema.from_product(new_product)
+        # search index row is flushed first, so duplicated barcode doesn't get to the storage
+        uow.add(ProductSearchIndex(**self._search_index_values(new_product)))
+        await uow.flush()
+
+        await self.storage.save(new_product)
+        return new_product
+
+    async def index_products(self, uow: AsyncSession, products: list[ProductDtoSchema]) -> int:
+        """
+        Copies products to the search index, already indexed barcodes are skipped
+
+        Return:
+            number of indexed products
+        """
+        if not products:
+            return 0
+
+        statement = (
+            insert(ProductSearchIndex)
+            .values([self._search_index_values(product) for product in products])
+            .on_conflict_do_nothing(index_elements=[ProductSearchIndex.barcode])
+            .returning(ProductSearchIndex.id)
+        )
+        result = await uow.execute(statement)
+        return len(result.fetchall())
+
+    @staticmethod
+    def _search_index_values(product: ProductDtoSchema) -> dict:
+        return {
+            **product.dict(),
+            "search_name": normalize_search_text(product.name),
+            "search_vendor_name": normalize_search_text(product.vendor_name),
+        }
 
     async def insert_products_to_history(
         self,
@@ -95,14 +131,36 @@ class ProductRepository:
         ]
         return product_history_dto
 
-    async def lookup_products(self, query_text: str) -> list[ProductDtoSchema]:
-        condition = (Product.name.contains(query_text)) | (Product.vendor_name.contains(query_text))
-        scan_results = Product.scan(condition)
-        products = [
-            ProductDtoSchema.from_product(product)
-            for product in scan_results
-        ]
-        return products
+    async def lookup_products(
+        self, uow: AsyncSession, query_text: str, limit: int, offset: int = 0
+    ) -> list[ProductDtoSchema]:
+        """
+        Every word of query matches the beginning of a word in product name or vendor name.
+        Products whose name starts with the query go first, then name matches rank higher than vendor ones.
+        """
+        if infrastructure_settings.product_search_backend == "scan":
+            products = await self.storage.scan(query_text.lower())
+            return products[offset:offset + limit]
+
+        normalized_query = normalize_search_text(query_text)
+        if not normalized_query:
+            return []
+
+        ts_query = func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{word}:*" for word in normalized_query.split()))
+        query = (
+            select(ProductSearchIndex)
+            .where(ProductSearchIndex.search_vector.op("@@")(ts_query))
+            .order_by(
+                ProductSearchIndex.search_name.startswith(normalized_query, autoescape=True).desc(),
+                func.ts_rank_cd(ProductSearchIndex.search_vector, ts_query).desc(),
+                ProductSearchIndex.search_name,
+                ProductSearchIndex.barcode,
+            )
+            .limit(limit)
+            .offset(offset)
+        )
+        result = await uow.execute(query)
+        return [ProductDtoSchema.from_product(product) for product in result.scalars()]
 
     async def delete_product(self, _id: str) -> str | None:
         ...
@@ -0,0 +1,164 @@
+import itertools
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+from src.persistence.dynamo_db_models import Product
+from src.schemas.product_dto import ProductDtoSchema
+from src.shared.executor import BlockingCallPool
+from src.shared.settings import InfrastructureSettings
+
+infrastructure_settings = InfrastructureSettings()
+
+
+class ProductStorage(ABC):
+    """
+    Key-value storage of products, barcode is the key
+    """
+
+    @abstractmethod
+    async def get(self, barcode: str) -> ProductDtoSchema | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def batch_get(self, barcodes: list[str]) -> list[ProductDtoSchema]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save(self, product: ProductDtoSchema) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def scan(self, query_text: str) -> list[ProductDtoSchema]:
+        """
+        Reads the whole storage, it's used until the search index is filled
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def scan_batches(self, batch_size: int) -> AsyncIterator[list[ProductDtoSchema]]:
+        """
+        Reads all products batch by batch
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+class DynamoProductStorage(ProductStorage):
+    """
+    PynamoDB is synchronous, its calls run in the thread pool to keep the event loop free
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.pool = BlockingCallPool(max_workers=max_workers, thread_name_prefix="dynamodb")
+
+    async def get(self, barcode: str) -> ProductDtoSchema | None:
+        return await self.pool.run(self._get, barcode)
+
+    async def batch_get(self, barcodes: list[str]) -> list[ProductDtoSchema]:
+        return await self.pool.run(self._batch_get, barcodes)
+
+    async def save(self, product: ProductDtoSchema) -> None:
+        await self.pool.run(self._save, product)
+
+    async def scan(self, query_text: str) -> list[ProductDtoSchema]:
+        return await self.pool.run(self._scan, query_text)
+
+    async def scan_batches(self, batch_size: int) -> AsyncIterator[list[ProductDtoSchema]]:
+        # scan is paginated lazily, every page is read in the thread pool
+        products = Product.scan(page_size=batch_size)
+        while batch := await self.pool.run(self._take, products, batch_size):
+            yield batch
+
+    def close(self) -> None:
+        self.pool.shutdown()
+
+    @staticmethod
+    def _get(barcode: str) -> ProductDtoSchema | None:
+        try:
+            product = Product.get(barcode)
+        except Product.DoesNotExist:
+            return None
+        return ProductDtoSchema.from_product(product)
+
+    @staticmethod
+    def _batch_get(barcodes: list[str]) -> list[ProductDtoSchema]:
+        return [ProductDtoSchema.from_product(product) for product in Product.batch_get(barcodes) if product]
+
+    @staticmethod
+    def _save(product: ProductDtoSchema) -> None:
+        Product(**product.dict()).save()
+
+    @staticmethod
+    def _scan(query_text: str) -> list[ProductDtoSchema]:
+        condition = (Product.name.contains(query_text)) | (Product.vendor_name.contains(query_text))
+        return [ProductDtoSchema.from_product(product) for product in Product.scan(condition)]
+
+    @staticmethod
+    def _take(products, batch_size: int) -> list[ProductDtoSchema]:
+        return [ProductDtoSchema.from_product(product) for product in itertools.islice(products, batch_size)]
+
+
+class InMemoryProductStorage(ProductStorage):
+    """
+    Stand-in for DynamoDB in tests and local development, it's not shared between processes
+    """
+
+    def __init__(self) -> None:
+        self._products: dict[str, ProductDtoSchema] = {}
+
+    async def get(self, barcode: str) -> ProductDtoSchema | None:
+        product = self._products.get(barcode)
+        return product.copy() if product else None
+
+    async def batch_get(self, barcodes: list[str]) -> list[ProductDtoSchema]:
+        return [self._products[barcode].copy() for barcode in set(barcodes) if barcode in self._products]
+
+    async def save(self, product: ProductDtoSchema) -> None:
+        self._products[product.barcode] = product.copy()
+
+    async def scan(self, query_text: str) -> list[ProductDtoSchema]:
+        return [
+            product.copy()
+            for product in self._products.values()
+            if query_text in product.name or query_text in product.vendor_name
+        ]
+
+    async def scan_batches(self, batch_size: int) -> AsyncIterator[list[ProductDtoSchema]]:
+        products = [product.copy() for product in self._products.values()]
+        for offset in range(0, len(products), batch_size):
+            yield products[offset:offset + batch_size]
+
+    def close(self) -> None:
+        ...
+
+    def clear(self) -> None:
+        self._products.clear()
+
+
+_product_storage: ProductStorage | None = None
+
+
+def get_product_storage() -> ProductStorage:
+    """
+    Returns the process-wide storage selected by PRODUCT_STORAGE_BACKEND, creates it on first call
+    """
+    global _product_storage
+    if _product_storage is None:
+        match infrastructure_settings.product_storage_backend:
+            case "dynamodb":
+                _product_storage = DynamoProductStorage(infrastructure_settings.product_storage_workers)
+            case "memory":
+                _product_storage = InMemoryProductStorage()
+            case backend:
+                raise ValueError(f"Unknown product storage backend {backend}")
+    return _product_storage
+
+
+def close_product_storage() -> None:
+    global _product_storage
+    if _product_storage is not None:
+        _product_storage.close()
+        _product_storage = None
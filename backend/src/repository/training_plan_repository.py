@@ -1,16 +1,19 @@
-from datetime import date
+from datetime import date, datetime
 from uuid import UUID
 
-from sqlalchemy import select, desc, literal_column
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, desc, func, cast, literal, true, String
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.dialects.postgresql import insert, aggregate_order_by
 
-from src import TrainingPlan, Training
+from src import Customer, TrainingPlan, Training, Diet, ExercisesOnTraining, Exercise
 from src.schemas.diet_dto import DietDtoSchema
-from src.schemas.exercise_dto import ExerciseShortDtoSchema
+from src.schemas.exercise_dto import ScheduledExerciseDto
 from src.schemas.training_dto import TrainingDtoSchema
-from src.schemas.training_plan_dto import TrainingPlanDtoShortSchema, TrainingPlanDtoSchema
+from src.schemas.training_plan_dto import (
+    TrainingPlanDtoShortSchema,
+    TrainingPlanDtoSchema,
+    TrainingPlanDetailDtoSchema,
+)
 
 
 class TrainingPlanRepository:
@@ -35,99 +38,221 @@ class TrainingPlanRepository:
                 notes=notes
             )
             .on_conflict_do_nothing()
-            .returning(literal_column("*"))
+            .returning(*TrainingPlan.__table__.columns)
         )
 
         result = await uow.execute(statement)
-        training_plan_id = result.scalar_one_or_none()
+        training_plan = result.fetchone()
 
-        if training_plan_id is None:
+        if training_plan is None:
             return None
 
-        training_plan = await self.provide_training_plan_by_id(uow, training_plan_id)
-        return TrainingPlanDtoSchema.from_orm(training_plan)
+        # greatest ignores null, customer without plans gets the plan end date
+        await uow.execute(
+            update(Customer)
+            .where(Customer.id == customer_id)
+            .values(last_plan_end_date=func.greatest(Customer.last_plan_end_date, end_date))
+        )
 
-    async def provide_training_plan_by_id(self, uow: AsyncSession, id_: UUID) -> TrainingPlanDtoSchema | None:
+        # diets and trainings are inserted after the plan
+        return TrainingPlanDtoSchema(
+            id=training_plan.id,
+            start_date=training_plan.start_date,
+            end_date=training_plan.end_date,
+            customer_id=training_plan.customer_id,
+            diets=[],
+            set_rest=training_plan.set_rest,
+            exercise_rest=training_plan.exercise_rest,
+            notes=training_plan.notes,
+            trainings=[],
+        )
+
+    async def provide_training_plan_last_modified(self, uow: AsyncSession, id_: UUID) -> datetime | None:
+        """
+        Returns time of the last plan change, None if the plan doesn't exist
+        """
+        query = select(func.coalesce(TrainingPlan.modified, TrainingPlan.created)).where(TrainingPlan.id == id_)
+        result = await uow.execute(query)
+        return result.scalar_one_or_none()
+
+    async def provide_training_plan_detail_by_id(
+        self, uow: AsyncSession, id_: UUID
+    ) -> TrainingPlanDetailDtoSchema | None:
+        """
+        Loads plan with diets totals and scheduled exercises of its trainings in one query,
+        row per exercise on training ordered by training and exercise ordering
+        """
+        diet_totals = (
+            select(
+                Diet.training_plan_id,
+                *[
+                    func.string_agg(cast(column, String), aggregate_order_by(literal("/"), Diet.created)).label(name)
+                    for name, column in (
+                        ("proteins", Diet.total_proteins),
+                        ("fats", Diet.total_fats),
+                        ("carbs", Diet.total_carbs),
+                        ("calories", Diet.total_calories),
+                    )
+                ],
+            )
+            .where(Diet.training_plan_id == id_)
+            .group_by(Diet.training_plan_id)
+            .subquery()
+        )
         query = (
-            select(TrainingPlan)
-            .where(TrainingPlan.id == id_)
-            .options(
-                selectinload(TrainingPlan.trainings).selectinload(Training.exercises),
-                selectinload(TrainingPlan.diets),
+            select(
+                TrainingPlan.id,
+                TrainingPlan.customer_id,
+                func.coalesce(TrainingPlan.modified, TrainingPlan.created).label("last_modified"),
+                TrainingPlan.start_date,
+                TrainingPlan.end_date,
+                TrainingPlan.set_rest,
+                TrainingPlan.exercise_rest,
+                TrainingPlan.notes,
+                func.coalesce(diet_totals.c.proteins, "").label("proteins"),
+                func.coalesce(diet_totals.c.fats, "").label("fats"),
+                func.coalesce(diet_totals.c.carbs, "").label("carbs"),
+                func.coalesce(diet_totals.c.calories, "").label("calories"),
+                Training.id.label("training_id"),
+                Training.name.label("training_name"),
+                ExercisesOnTraining.exercise_id,
+                ExercisesOnTraining.sets,
+                ExercisesOnTraining.superset_id,
+                ExercisesOnTraining.ordering,
+                Exercise.name.label("exercise_name"),
             )
+            .outerjoin(diet_totals, diet_totals.c.training_plan_id == TrainingPlan.id)
+            .outerjoin(Training, Training.training_plan_id == TrainingPlan.id)
+            .outerjoin(ExercisesOnTraining, ExercisesOnTraining.training_id == Training.id)
+            .outerjoin(Exercise, Exercise.id == ExercisesOnTraining.exercise_id)
+            .where(TrainingPlan.id == id_)
+            .order_by(Training.created, Training.id, ExercisesOnTraining.ordering)
         )
         result = await uow.execute(query)
-        training_plan = result.scalars().first()
+        rows = result.fetchall()
 
-        if training_plan is None:
+        if not rows:
             return None
 
-        def map_exercise_to_dto(exercise):
-            return ExerciseShortDtoSchema(id=exercise.id, name=exercise.name)
+        trainings: dict[UUID, TrainingDtoSchema] = {}
+        for row in rows:
+            if row.training_id is None:
+                continue
 
-        def map_training_to_dto(training):
-            exercises_dto = [map_exercise_to_dto(exercise) for exercise in training.exercises]
-            return TrainingDtoSchema(
-                id=str(training.id),
-                name=training.name,
-                exercises=exercises_dto,
-                number_of_exercises=len(training.exercises),
-            )
+            training = trainings.get(row.training_id)
+            if training is None:
+                training = TrainingDtoSchema(
+                    id=str(row.training_id), name=row.training_name, exercises=[], number_of_exercises=0,
+                )
+                trainings[row.training_id] = training
 
-        def map_diet_to_dto(diet):
-            return DietDtoSchema(
-                id=diet.id,
-                total_proteins=diet.total_proteins,
-                total_fats=diet.total_fats,
-                total_carbs=diet.total_carbs,
-                total_calories=diet.total_calories,
-            )
+            if row.exercise_id is None:
+                continue
 
-        trainings_dto = [map_training_to_dto(training) for training in training_plan.trainings]
-        diets_dto = [map_diet_to_dto(diet) for diet in training_plan.diets]
+            training.exercises.append(
+                ScheduledExerciseDto(
+                    id=row.exercise_id,
+                    name=row.exercise_name,
+                    sets=row.sets,
+                    exercise_id=row.exercise_id,
+                    training_id=row.training_id,
+                    superset_id=row.superset_id,
+                    ordering=row.ordering,
+                )
+            )
+            training.number_of_exercises += 1
 
-        training_plan_dto = TrainingPlanDtoSchema(
-            id=training_plan.id,
-            start_date=training_plan.start_date,
-            end_date=training_plan.end_date,
+        training_plan = rows[0]
+        return TrainingPlanDetailDtoSchema(
+            id=str(training_plan.id),
             customer_id=training_plan.customer_id,
-            diets=diets_dto,
+            last_modified=training_plan.last_modified,
+            start_date=training_plan.start_date.strftime("%Y-%m-%d"),
+            end_date=training_plan.end_date.strftime("%Y-%m-%d"),
+            proteins=training_plan.proteins,
+            fats=training_plan.fats,
+            carbs=training_plan.carbs,
+            calories=training_plan.calories,
+            trainings=list(trainings.values()),
             set_rest=training_plan.set_rest,
             exercise_rest=training_plan.exercise_rest,
             notes=training_plan.notes,
-            trainings=trainings_dto,
         )
 
-        return training_plan_dto
-
     async def provide_customer_plans_by_customer_id(
         self,
         uow: AsyncSession,
-        customer_id: str
+        customer_id: str,
+        limit: int | None = None,
+        offset: int = 0,
     ) -> list[TrainingPlanDtoShortSchema]:
+        """
+        Returns page of customer plans, the latest first.
+        Trainings are counted and diets are aggregated to arrays by the same query.
+        """
+        trainings = (
+            select(func.count(Training.id).label("number_of_trainings"))
+            .where(Training.training_plan_id == TrainingPlan.id)
+            .lateral("trainings")
+        )
+        diets = (
+            select(
+                func.array_agg(aggregate_order_by(Diet.id, Diet.created)).label("diet_ids"),
+                func.array_agg(aggregate_order_by(Diet.total_proteins, Diet.created)).label("diet_proteins"),
+                func.array_agg(aggregate_order_by(Diet.total_fats, Diet.created)).label("diet_fats"),
+                func.array_agg(aggregate_order_by(Diet.total_carbs, Diet.created)).label("diet_carbs"),
+                func.array_agg(aggregate_order_by(Diet.total_calories, Diet.created)).label("diet_calories"),
+            )
+            .where(Diet.training_plan_id == TrainingPlan.id)
+            .lateral("diets")
+        )
         query = (
             select(
-                TrainingPlan
+                TrainingPlan.id,
+                TrainingPlan.start_date,
+                TrainingPlan.end_date,
+                trainings.c.number_of_trainings,
+                diets.c.diet_ids,
+                diets.c.diet_proteins,
+                diets.c.diet_fats,
+                diets.c.diet_carbs,
+                diets.c.diet_calories,
             )
+            .select_from(TrainingPlan)
+            .join(trainings, true())
+            .join(diets, true())
             .where(TrainingPlan.customer_id == UUID(customer_id))
-            .options(
-                selectinload(TrainingPlan.trainings),
-                selectinload(TrainingPlan.diets),
-            )
-            .order_by(desc(TrainingPlan.end_date))
+            .order_by(desc(TrainingPlan.end_date), desc(TrainingPlan.id))
+            .limit(limit)
+            .offset(offset)
         )
 
         result = await uow.execute(query)
-        training_plans = result.scalars().all()
         training_plans_dto = [
             TrainingPlanDtoShortSchema(
-                id=str(training_plan.id),
+                id=training_plan.id,
                 start_date=training_plan.start_date,
                 end_date=training_plan.end_date,
-                number_of_trainings=len(training_plan.trainings),
-                diets=training_plan.diets,
+                number_of_trainings=training_plan.number_of_trainings,
+                diets=[
+                    DietDtoSchema(
+                        id=id_,
+                        total_proteins=total_proteins,
+                        total_fats=total_fats,
+                        total_carbs=total_carbs,
+                        total_calories=total_calories,
+                    )
+                    # plan without diets gets nulls instead of empty arrays
+                    for id_, total_proteins, total_fats, total_carbs, total_calories in zip(
+                        training_plan.diet_ids or [],
+                        training_plan.diet_proteins or [],
+                        training_plan.diet_fats or [],
+                        training_plan.diet_carbs or [],
+                        training_plan.diet_calories or [],
+                    )
+                ],
             )
-            for training_plan in training_plans
+            for training_plan in result
         ]
 
         return training_plans_dto
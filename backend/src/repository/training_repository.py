@@ -1,80 +1,91 @@
+from collections import defaultdict
 from uuid import UUID, uuid4
 
-from sqlalchemy import select, asc
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src import Training, ExercisesOnTraining, Exercise
-from src.schemas.exercise_dto import ScheduledExerciseDto
+from src.schemas.exercise_dto import ExerciseShortDtoSchema
+from src.schemas.training_dto import TrainingDtoSchema
 
 
 class TrainingRepository:
-    def __init__(self) -> None:
-        self.superset_dict = {}
-        self.ordering = 0
+    @staticmethod
+    def _build_superset_ids(exercises: list) -> dict[str, UUID]:
+        """
+        Exercise and exercises of its superset share the same superset id
+        """
+        superset_ids = {}
+        for exercise_item in exercises:
+            if (
+                exercise_item.supersets
+                and isinstance(exercise_item.supersets, list)
+                and str(exercise_item.id) not in superset_ids
+            ):
+                superset_id = uuid4()
+                superset_ids[str(exercise_item.id)] = superset_id
+                for e in exercise_item.supersets:
+                    superset_ids[str(e)] = superset_id
+        return superset_ids
 
-    async def provide_schedule_exercises_by_training_id(
-        self,
-        uow: AsyncSession,
-        training_ids: list[str],
-        exercise_ids: list[str]
-    ) -> list[ScheduledExerciseDto]:
-        query = select(
-            ExercisesOnTraining.id,
-            ExercisesOnTraining.exercise_id,
-            ExercisesOnTraining.training_id,
-            ExercisesOnTraining.sets,
-            ExercisesOnTraining.superset_id,
-            ExercisesOnTraining.ordering,
-            Exercise.name,
-        ).join(
-            Exercise, ExercisesOnTraining.exercise_id == Exercise.id
-        ).where(
-            ExercisesOnTraining.training_id.in_(training_ids),
-            ExercisesOnTraining.exercise_id.in_(exercise_ids),
-        ).order_by(
-            asc(ExercisesOnTraining.ordering)
-        )
+    async def create_personal_trainings(
+        self, uow: AsyncSession, training_plan_id: UUID, customer_trainings: list
+    ) -> list[TrainingDtoSchema]:
+        """
+        Inserts trainings and their exercises with one multi-row statement each,
+        exercise names are selected by the same statement that inserts exercises
+        """
+        if not customer_trainings:
+            return []
 
-        result = await uow.execute(query)
-        schedule_exercises = result.fetchall()
-        res = [ScheduledExerciseDto.from_orm(st) for st in schedule_exercises]
-        return res
-
-    async def _update_superset_dict(self, exercise_item):
-        if (
-            exercise_item.supersets
-            and isinstance(exercise_item.supersets, list)
-            and str(exercise_item.id) not in self.superset_dict
-        ):
-            superset_id = str(uuid4())
-            self.superset_dict[str(exercise_item.id)] = superset_id
-            for e in exercise_item.supersets:
-                self.superset_dict[str(e)] = superset_id
-
-    async def create_personal_trainings(self, uow: AsyncSession, training_plan_id: UUID, customer_trainings: list):
-        trainings_orm = [
-            Training(name=training_item.name, training_plan_id=training_plan_id)
+        # ids are generated here to link exercises without reading them back
+        training_rows = [
+            dict(id=uuid4(), name=training_item.name, training_plan_id=training_plan_id)
             for training_item in customer_trainings
         ]
+        await uow.execute(insert(Training).values(training_rows))
 
-        uow.add_all(trainings_orm)
-        await uow.flush()
-
-        exercises_on_training = []
-        for customer_training, training_item in zip(trainings_orm, customer_trainings):
-            self.superset_dict = {}
-            self.ordering = 0
-            for exercise_item in training_item.exercises:
-                await self._update_superset_dict(exercise_item)
-                exercises_on_training.append(ExercisesOnTraining(
-                    training_id=str(customer_training.id),
-                    exercise_id=str(exercise_item.id),
+        exercise_rows = []
+        for training_row, training_item in zip(training_rows, customer_trainings):
+            superset_ids = self._build_superset_ids(training_item.exercises)
+            for ordering, exercise_item in enumerate(training_item.exercises):
+                exercise_rows.append(dict(
+                    training_id=training_row["id"],
+                    exercise_id=exercise_item.id,
                     sets=exercise_item.sets,
-                    superset_id=self.superset_dict.get(str(exercise_item.id)),
-                    ordering=self.ordering,
+                    superset_id=superset_ids.get(str(exercise_item.id)),
+                    ordering=ordering,
                 ))
-                self.ordering += 1
 
-        uow.add_all(exercises_on_training)
-        await uow.flush()
-        return len(trainings_orm)
+        exercises_by_training = defaultdict(list)
+        if exercise_rows:
+            inserted = (
+                insert(ExercisesOnTraining)
+                .values(exercise_rows)
+                .returning(
+                    ExercisesOnTraining.training_id,
+                    ExercisesOnTraining.exercise_id,
+                    ExercisesOnTraining.ordering,
+                )
+                .cte("inserted_exercises")
+            )
+            result = await uow.execute(
+                select(inserted.c.training_id, Exercise.id, Exercise.name, Exercise.coach_id)
+                .join(Exercise, Exercise.id == inserted.c.exercise_id)
+                .order_by(inserted.c.ordering)
+            )
+            for row in result:
+                exercises_by_training[row.training_id].append(
+                    ExerciseShortDtoSchema(id=row.id, name=row.name, coach_id=row.coach_id)
+                )
+
+        return [
+            TrainingDtoSchema(
+                id=str(training_row["id"]),
+                name=training_row["name"],
+                exercises=exercises_by_training[training_row["id"]],
+                number_of_exercises=len(exercises_by_training[training_row["id"]]),
+            )
+            for training_row in training_rows
+        ]
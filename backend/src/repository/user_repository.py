@@ -0,0 +1,66 @@
+from sqlalchemy import select, literal, null, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import Coach, Customer
+from src.schemas.coach_dto import CoachDtoSchema
+from src.schemas.customer_dto import CustomerDtoSchema
+
+
+class UserRepository:
+    async def provide_by_username(
+        self, uow: AsyncSession, username: str
+    ) -> CoachDtoSchema | CustomerDtoSchema | None:
+        """
+        Looks up both coach and customer tables in the single round-trip,
+        coach has priority if the same username is met in both tables
+        """
+        coach_query = (
+            select(
+                literal(0).label("priority"),
+                literal(Coach.__tablename__).label("user_type"),
+                Coach.id,
+                Coach.username,
+                Coach.password,
+                Coach.first_name,
+                Coach.last_name,
+                Coach.gender,
+                Coach.birthday,
+                Coach.email,
+                Coach.photo_path,
+                Coach.fcm_token,
+                null().label("coach_id"),
+                null().label("telegram_username"),
+            )
+            .where(Coach.username == username)
+        )
+        customer_query = (
+            select(
+                literal(1).label("priority"),
+                literal(Customer.__tablename__).label("user_type"),
+                Customer.id,
+                Customer.username,
+                Customer.password,
+                Customer.first_name,
+                Customer.last_name,
+                Customer.gender,
+                Customer.birthday,
+                Customer.email,
+                Customer.photo_path,
+                Customer.fcm_token,
+                Customer.coach_id,
+                Customer.telegram_username,
+            )
+            .where(Customer.username == username)
+        )
+        query = union_all(coach_query, customer_query).order_by("priority").limit(1)
+
+        result = await uow.execute(query)
+        user = result.fetchone()
+
+        if user is None:
+            return None
+
+        if user.user_type == Coach.__tablename__:
+            return CoachDtoSchema.from_coach_dto(user)
+
+        return CustomerDtoSchema.from_orm(user)
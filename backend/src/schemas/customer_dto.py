@@ -1,9 +1,13 @@
+import base64
+import binascii
+import json
 from datetime import date
 from uuid import UUID
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ValidationError, validator
 
 from src import Gender
+from src.shared.exceptions import NotValidCursor
 
 
 class CustomerDtoSchema(BaseModel):
@@ -19,6 +23,7 @@ class CustomerDtoSchema(BaseModel):
     birthday: date | None
     email: str | None
     photo_link: str | None
+    last_plan_end_date: date | None
 
     class Config:
         orm_mode = True
@@ -37,6 +42,26 @@ class CustomerShortDtoSchema(BaseModel):
     last_name: str | None
     username: str | None
     last_plan_end_date: date | None
+    is_archived: bool = False
 
     class Config:
         orm_mode = True
+
+
+class CustomerListCursor(BaseModel):
+    """
+    Sort key of the last customer on the page, the next page starts after it
+    """
+    is_archived: bool
+    last_plan_end_date: date
+    id: UUID
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(self.json().encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> "CustomerListCursor":
+        try:
+            return cls(**json.loads(base64.urlsafe_b64decode(cursor.encode())))
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, ValidationError) as exc:
+            raise NotValidCursor(cursor) from exc
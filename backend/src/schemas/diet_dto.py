@@ -3,7 +3,46 @@ from datetime import date
 
 from pydantic import BaseModel
 
-from src import Diet, DietDays
+from src import Diet, DietDays, DietDayEntry
+
+MEAL_TYPES = ("breakfast", "lunch", "dinner", "snacks")
+NUTRIENTS = ("calories", "proteins", "fats", "carbs")
+
+
+def build_meals(daily_diet_fact, entries: list[DietDayEntry]) -> dict[str, dict]:
+    """
+    Collects meal totals from diet day aggregate columns and meal products from entries,
+    meals of the day which isn't logged yet have zero totals
+    """
+    meals = {
+        meal_type: {
+            **{
+                f"total_{nutrient}": 0 if daily_diet_fact is None else getattr(daily_diet_fact, f"{meal_type}_{nutrient}")
+                for nutrient in NUTRIENTS
+            },
+            "products": [],
+        }
+        for meal_type in MEAL_TYPES
+    }
+
+    for entry in entries:
+        meals[entry.meal_type]["products"].append(
+            {
+                "id": str(entry.id),
+                "name": entry.name,
+                "barcode": entry.barcode,
+                "portion_size": entry.portion_size,
+                "amount": entry.amount,
+                "type": entry.type,
+                "proteins": entry.proteins,
+                "fats": entry.fats,
+                "carbs": entry.carbs,
+                "calories": entry.calories,
+                "vendor_name": entry.vendor_name,
+            }
+        )
+
+    return meals
 
 
 class DietDtoSchema(BaseModel):
@@ -38,6 +77,17 @@ class DailyNutrients(BaseModel):
     consumed_carbs: int
 
 
+class DailyDietNutrientsDtoSchema(DailyNutrients):
+    """
+    Customer diet day totals without meals
+    """
+    date: date
+    diet_day_id: UUID
+
+    class Config:
+        orm_mode = True
+
+
 class DailyDietDtoSchema(BaseModel):
     """
     This diet fork for customer.
@@ -45,7 +95,7 @@ class DailyDietDtoSchema(BaseModel):
     """
     date: date
 
-    template_diet_id: UUID
+    template_diet_id: UUID | None
     total_calories: int
     total_proteins: int
     total_fats: int
@@ -63,34 +113,45 @@ class DailyDietDtoSchema(BaseModel):
     snacks: dict
 
     @classmethod
-    def from_daily_diet_fact(cls, daily_diet_fact: DietDays) -> "DailyDietDtoSchema":
-        meals = [
-            daily_diet_fact.breakfast, daily_diet_fact.lunch, daily_diet_fact.dinner, daily_diet_fact.snacks,
-        ]
-
+    def from_meals(cls, template_diet, daily_diet_fact, meals: dict[str, dict]) -> "DailyDietDtoSchema":
+        """
+        Args:
+            template_diet: anything with coach recommended totals
+            daily_diet_fact: diet day row
+            meals: meals built by build_meals
+        """
         return DailyDietDtoSchema(
             # recommend amount by coach
             template_diet_id=daily_diet_fact.diet_id,
-            total_calories=daily_diet_fact.diet.total_calories,
-            total_proteins=daily_diet_fact.diet.total_proteins,
-            total_fats=daily_diet_fact.diet.total_fats,
-            total_carbs=daily_diet_fact.diet.total_carbs,
+            total_calories=template_diet.total_calories,
+            total_proteins=template_diet.total_proteins,
+            total_fats=template_diet.total_fats,
+            total_carbs=template_diet.total_carbs,
 
             # fact amount
             diet_day_id=daily_diet_fact.id,
             date=daily_diet_fact.date,
 
-            consumed_calories=sum(meal["total_calories"] for meal in meals),
-            consumed_proteins=sum(meal["total_proteins"] for meal in meals),
-            consumed_fats=sum(meal["total_fats"] for meal in meals),
-            consumed_carbs=sum(meal["total_carbs"] for meal in meals),
+            consumed_calories=sum(meal["total_calories"] for meal in meals.values()),
+            consumed_proteins=sum(meal["total_proteins"] for meal in meals.values()),
+            consumed_fats=sum(meal["total_fats"] for meal in meals.values()),
+            consumed_carbs=sum(meal["total_carbs"] for meal in meals.values()),
 
-            breakfast=daily_diet_fact.breakfast,
-            lunch=daily_diet_fact.lunch,
-            dinner=daily_diet_fact.dinner,
-            snacks=daily_diet_fact.snacks,
+            **meals,
         )
 
+    @classmethod
+    def from_daily_diet_fact(cls, daily_diet_fact: DietDays) -> "DailyDietDtoSchema":
+        meals = build_meals(daily_diet_fact, daily_diet_fact.entries)
+        return cls.from_meals(daily_diet_fact.diet, daily_diet_fact, meals)
+
+    @classmethod
+    def from_daily_diet_row(cls, row, entries: list[DietDayEntry]) -> "DailyDietDtoSchema":
+        """
+        Row has diet day columns and template diet totals
+        """
+        return cls.from_meals(row, row, build_meals(row, entries))
+
     @classmethod
     def create_empty_diet(cls, template_diet: Diet | None, specific_day: date) -> "DailyDietDtoSchema":
         return DailyDietDtoSchema(
@@ -110,52 +171,20 @@ class DailyDietDtoSchema(BaseModel):
             consumed_fats=0,
             consumed_carbs=0,
 
-            breakfast={},
-            lunch={},
-            dinner={},
-            snacks={},
+            **build_meals(None, []),
         )
 
     @classmethod
-    def from_recommended_diet(cls, template_diet: Diet | None, specific_day: date) -> "DailyDietDtoSchema":
+    def from_recommended_diet(
+        cls, template_diet: Diet | None, specific_day_fact: DietDays | None, specific_day: date
+    ) -> "DailyDietDtoSchema":
         if template_diet is None:
             # the customer doesn't have any diet from coach for the date
             return cls.create_empty_diet(None, specific_day)
 
-        customer_fact_days = template_diet.diet_days
-        if not customer_fact_days:
-            # the customer hasn't logged any days from the diet
-            return cls.create_empty_diet(template_diet, specific_day)
-
-        specific_day_fact = next((day for day in customer_fact_days if day.date == specific_day), None)
-
         if specific_day_fact is None:
             # the customer hasn't logged the requested day
             return cls.create_empty_diet(template_diet, specific_day)
 
-        meals = [
-            specific_day_fact.breakfast, specific_day_fact.lunch, specific_day_fact.dinner, specific_day_fact.snacks
-        ]
-
-        return DailyDietDtoSchema(
-            # recommend amount by coach
-            template_diet_id=template_diet.id,
-            total_calories=template_diet.total_calories,
-            total_proteins=template_diet.total_proteins,
-            total_fats=template_diet.total_fats,
-            total_carbs=template_diet.total_carbs,
-
-            # fact amount
-            diet_day_id=specific_day_fact.id,
-            date=specific_day_fact.date,
-
-            consumed_calories=sum(meal["total_calories"] for meal in meals),
-            consumed_proteins=sum(meal["total_proteins"] for meal in meals),
-            consumed_fats=sum(meal["total_fats"] for meal in meals),
-            consumed_carbs=sum(meal["total_carbs"] for meal in meals),
-
-            breakfast=specific_day_fact.breakfast,
-            lunch=specific_day_fact.lunch,
-            dinner=specific_day_fact.dinner,
-            snacks=specific_day_fact.snacks,
-        )
+        meals = build_meals(specific_day_fact, specific_day_fact.entries)
+        return cls.from_meals(template_diet, specific_day_fact, meals)
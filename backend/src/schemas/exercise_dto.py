@@ -1,7 +1,10 @@
+from datetime import datetime
 from uuid import UUID
 
 from pydantic import BaseModel
 
+from src.schemas.muscle_group_dto import MuscleGroupDto
+
 
 class ExerciseShortDtoSchema(BaseModel):
     id: UUID
@@ -15,6 +18,7 @@ class ExerciseShortDtoSchema(BaseModel):
 class ExerciseFullDtoSchema(ExerciseShortDtoSchema):
     muscle_group_id: UUID
     muscle_group_name: str
+    created: datetime | None = None
 
     class Config:
         orm_mode = True
@@ -31,3 +35,12 @@ class ScheduledExerciseDto(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class ExerciseLibraryDtoSchema(BaseModel):
+    """
+    Global exercises and muscle groups, version is the creation time of the newest item in microseconds
+    """
+    version: int
+    exercises: list[ExerciseFullDtoSchema]
+    muscle_groups: list[MuscleGroupDto]
@@ -1,3 +1,4 @@
+from datetime import datetime
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -6,6 +7,7 @@ from pydantic import BaseModel
 class MuscleGroupDto(BaseModel):
     id: UUID
     name: str
+    created: datetime | None = None
 
     class Config:
         orm_mode = True
@@ -0,0 +1,13 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class OutboxMessageDtoSchema(BaseModel):
+    id: UUID
+    channel: str
+    payload: dict
+    attempts: int
+
+    class Config:
+        orm_mode = True
@@ -1,4 +1,5 @@
-from datetime import date
+import hashlib
+from datetime import date, datetime
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -35,6 +36,8 @@ class TrainingPlanDtoSchema(BaseModel):
 
 class TrainingPlanDetailDtoSchema(BaseModel):
     id: str
+    customer_id: UUID
+    last_modified: datetime
     start_date: str
     end_date: str
     proteins: str
@@ -45,3 +48,10 @@ class TrainingPlanDetailDtoSchema(BaseModel):
     set_rest: int
     exercise_rest: int
     notes: str | None
+
+    @property
+    def etag(self) -> str:
+        """
+        Strong entity tag, it changes with any field of the plan
+        """
+        return '"' + hashlib.sha256(self.json().encode()).hexdigest() + '"'
@@ -8,7 +8,7 @@ from src.schemas.coach_dto import CoachDtoSchema
 from src.utils import get_hashed_password, verify_password
 from src.repository.coach_repository import CoachRepository
 from src.shared.exceptions import UsernameIsTaken, NotValidCredentials
-from src.service.user_service import UserService, UserType
+from src.service.user_service import UserService, UserType, principal_cache
 from src.presentation.schemas.login_schema import UserLoginData
 from src.presentation.schemas.register_schema import CoachRegistrationData
 
@@ -22,8 +22,18 @@ class CoachSelectorService:
     def __init__(self, coach_repository: CoachRepository) -> None:
         self.coach_repository = coach_repository
 
-    async def select_coach_by_username(self, uow: AsyncSession, username: str) -> CoachDtoSchema | None:
+    async def select_coach_by_username(
+        self, uow: AsyncSession, username: str, use_cache: bool = True
+    ) -> CoachDtoSchema | None:
+        cache_key = (UserType.COACH.value, username)
+        if use_cache:
+            cached_coach = principal_cache.get(cache_key)
+            if cached_coach is not None:
+                return cached_coach.copy()
+
         coach = await self.coach_repository.provide_by_username(uow, username)
+        if coach is not None:
+            principal_cache.set(cache_key, coach.copy())
         return coach
 
 
@@ -58,6 +68,10 @@ class CoachProfileService(UserService):
         deleted_id = await self.coach_repository.delete_coach(uow, str(user.id))
         return deleted_id
 
+    async def get_customer_usernames(self, uow: AsyncSession, user: Coach) -> list[str]:
+        customer_usernames = await self.coach_repository.provide_customer_usernames(uow, str(user.id))
+        return customer_usernames
+
 
 class CoachService:
     """Contains business rules for Coach domain"""
@@ -88,7 +102,8 @@ class CoachService:
         form_data: OAuth2PasswordRequestForm,
         fcm_token: str
     ) -> CoachDtoSchema | None:
-        existed_coach = await self.get_coach_by_username(uow, username=form_data.username)
+        # password must be checked against the stored one, not the cached one
+        existed_coach = await self.get_coach_by_username(uow, username=form_data.username, use_cache=False)
         if existed_coach is None:
             return None
 
@@ -97,6 +112,7 @@ class CoachService:
         if await self.profile_service.authorize_user(uow, existed_coach, data) is True:
             logger.info(f"Coach with username {existed_coach.username} successfully login")
             await uow.commit()
+            self.invalidate_cached_coach(existed_coach.username)
             return existed_coach
 
         raise NotValidCredentials("Not correct coach password")
@@ -109,19 +125,33 @@ class CoachService:
     async def update_profile(self, uow: AsyncSession, user: Coach, **params) -> CoachDtoSchema | None:
         updated_coach = await self.profile_service.update_user_profile(uow, user, **params)
         await uow.commit()
+        self.invalidate_cached_coach(user.username)
+        if updated_coach is not None:
+            self.invalidate_cached_coach(updated_coach.username)
         return updated_coach
 
     async def delete(self, uow: AsyncSession, user: Coach) -> str | None:
+        # coach customers are deleted by cascade as well
+        customer_usernames = await self.profile_service.get_customer_usernames(uow, user)
         deleted_id = await self.profile_service.delete(uow, user)
         if deleted_id is None:
             logger.info(f"Couldn't delete coach {user.username}")
             return
         await uow.commit()
+        self.invalidate_cached_coach(user.username)
+        for username in customer_usernames:
+            principal_cache.delete((UserType.CUSTOMER.value, username))
         logger.info(f"Coach {user.username} successfully deleted")
 
-    async def get_coach_by_username(self, uow: AsyncSession, username: str) -> CoachDtoSchema | None:
-        coach = await self.selector_service.select_coach_by_username(uow, username)
+    async def get_coach_by_username(
+        self, uow: AsyncSession, username: str, use_cache: bool = True
+    ) -> CoachDtoSchema | None:
+        coach = await self.selector_service.select_coach_by_username(uow, username, use_cache=use_cache)
         if coach is not None:
             self.user = coach
             return self.user
         return None
+
+    @staticmethod
+    def invalidate_cached_coach(username: str) -> None:
+        principal_cache.delete((UserType.COACH.value, username))
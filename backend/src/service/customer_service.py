@@ -1,5 +1,5 @@
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,16 +8,20 @@ from src import Customer
 from src.shared.config import OTP_LENGTH
 from src.presentation.schemas.login_schema import UserLoginData
 from src.presentation.schemas.register_schema import CustomerRegistrationData
-from src.schemas.customer_dto import CustomerDtoSchema
+from src.schemas.customer_dto import CustomerDtoSchema, CustomerListCursor
 from src.service.notification_service import NotificationService
-from src.shared.exceptions import NotValidCredentials
-from src.utils import verify_password
+from src.shared.exceptions import NotValidCredentials, OneTimePasswordGenerationFailed
+from src.utils import verify_password, generate_random_password
 from src.repository.customer_repository import CustomerRepository
-from src.service.user_service import UserService, UserType
+from src.service.user_service import UserService, UserType, principal_cache, auth_settings
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+OTP_GENERATION_ATTEMPTS = 5
+# customer without plans for this number of days goes to archive
+CUSTOMER_ARCHIVE_DAYS = 30
+
 
 class CustomerSelectorService:
     """Responsible for getting customer data from storage"""
@@ -29,40 +33,71 @@ class CustomerSelectorService:
         customer = await self.customer_repository.provide_by_pk(uow, pk=pk)
         return customer
 
-    async def select_customer_by_otp(self, uow: AsyncSession, password) -> CustomerDtoSchema | None:
-        customer = await self.customer_repository.provide_by_otp(uow, password=password)
+    async def select_customer_by_otp(self, uow: AsyncSession, username: str, password) -> CustomerDtoSchema | None:
+        customer = await self.customer_repository.provide_by_otp(uow, username=username, password=password)
         return customer
 
-    async def select_customers_by_coach_id(self, uow: AsyncSession, coach_id: str) -> list[dict[str, str]]:
-        customers_aggregates = await self.customer_repository.provide_customers_by_coach_id(uow, coach_id)
-
-        customers = []
-        archive_customers = []
-        for customer in customers_aggregates:
-            last_plan_end_date = customer.last_plan_end_date
-
-            if last_plan_end_date and datetime.now().date() - last_plan_end_date > timedelta(days=30):
-                archive_customers.append({
-                    "id": str(customer.id),
-                    "first_name": customer.first_name,
-                    "last_name": customer.last_name,
-                    "phone_number": customer.username,
-                    "last_plan_end_date": last_plan_end_date.strftime("%Y-%m-%d")
-                })
-            else:
-                customers.append({
-                    "id": str(customer.id),
-                    "first_name": customer.first_name,
-                    "last_name": customer.last_name,
-                    "phone_number": customer.username,
-                    "last_plan_end_date": last_plan_end_date.strftime("%Y-%m-%d") if last_plan_end_date else None
-                })
-
-        customers.extend(archive_customers)
-        return customers
-
-    async def select_customer_by_username(self, uow: AsyncSession, username: str) -> CustomerDtoSchema | None:
+    async def select_customers_by_coach_id(
+        self,
+        uow: AsyncSession,
+        coach_id: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        search: str | None = None,
+    ) -> tuple[list[dict[str, str]], str | None]:
+        """
+        Returns page of customers and cursor of the next page, it's None on the last page.
+        All remaining customers are returned if limit isn't set
+
+        Raises:
+            NotValidCursor: in case if cursor isn't issued by this method
+        """
+        customers_aggregates = await self.customer_repository.provide_customers_page_by_coach_id(
+            uow=uow,
+            coach_id=coach_id,
+            archived_before=datetime.now().date() - timedelta(days=CUSTOMER_ARCHIVE_DAYS),
+            limit=limit + 1 if limit else None,
+            after=CustomerListCursor.decode(cursor) if cursor else None,
+            search=search,
+        )
+
+        next_cursor = None
+        if limit and len(customers_aggregates) > limit:
+            customers_aggregates = customers_aggregates[:limit]
+            last_customer = customers_aggregates[-1]
+            next_cursor = CustomerListCursor(
+                is_archived=last_customer.is_archived,
+                last_plan_end_date=last_customer.last_plan_end_date or date.min,
+                id=last_customer.id,
+            ).encode()
+
+        customers = [
+            {
+                "id": str(customer.id),
+                "first_name": customer.first_name,
+                "last_name": customer.last_name,
+                "phone_number": customer.username,
+                "last_plan_end_date": (
+                    customer.last_plan_end_date.strftime("%Y-%m-%d") if customer.last_plan_end_date else None
+                ),
+                "is_archived": customer.is_archived,
+            }
+            for customer in customers_aggregates
+        ]
+        return customers, next_cursor
+
+    async def select_customer_by_username(
+        self, uow: AsyncSession, username: str, use_cache: bool = True
+    ) -> CustomerDtoSchema | None:
+        cache_key = (UserType.CUSTOMER.value, username)
+        if use_cache:
+            cached_customer = principal_cache.get(cache_key)
+            if cached_customer is not None:
+                return cached_customer.copy()
+
         customer = await self.customer_repository.provide_by_username(uow, username)
+        if customer is not None:
+            principal_cache.set(cache_key, customer.copy())
         return customer
 
     async def select_customer_by_full_name(
@@ -91,9 +126,36 @@ class CustomerProfileService(UserService):
             logger.warning(f"New customer creation is failed: {data.last_name} {data.first_name}")
             raise
 
+        customer = await self.issue_one_time_password(uow, customer)
         logger.info(f"Customer created successfully: {data.last_name} {data.first_name}")
         return customer
 
+    async def issue_one_time_password(self, uow: AsyncSession, customer: CustomerDtoSchema) -> CustomerDtoSchema:
+        """
+        Active one time passwords are unique for the phone number,
+        the new one is generated if the passed to customer is already sent to this number.
+        Customer without phone number doesn't receive invite, so there is nothing to issue
+        """
+        username = customer.username or customer.telegram_username
+        if username is None:
+            return customer
+
+        expires_at = datetime.now() + timedelta(minutes=auth_settings.otp_expire_minutes)
+        otp = customer.password
+
+        for _ in range(OTP_GENERATION_ATTEMPTS):
+            if await self.customer_repository.create_otp(uow, customer.id, username, otp, expires_at) is not None:
+                break
+            otp = generate_random_password(OTP_LENGTH)
+        else:
+            logger.warning(f"Couldn't generate unique one time password for customer {customer.id}")
+            raise OneTimePasswordGenerationFailed
+
+        if otp != customer.password:
+            customer = await self.customer_repository.update_customer(uow, id=customer.id, password=otp)
+
+        return customer
+
     async def authorize_user(self, uow: AsyncSession, user: CustomerDtoSchema, data: UserLoginData) -> bool:
         """
         Customer logs in with one time password in the first time after receive invite.
@@ -103,6 +165,8 @@ class CustomerProfileService(UserService):
         regular_login = await verify_password(data.received_password, user.password)
 
         if first_login or regular_login:
+            if first_login:
+                await self.customer_repository.consume_otp(uow, user.id, data.received_password)
             if await self.fcm_token_actualize(user, data.fcm_token) is False:
                 await self.customer_repository.update_customer(uow, id=str(user.id), fcm_token=data.fcm_token)
             return True
@@ -142,13 +206,12 @@ class CustomerService:
 
         if customer.telegram_username is not None:
             logger.info(f"Will be invited in application new customer: {customer.telegram_username}")
-            # TODO: pass write_uow to use outbox service
-            await self.notification_service.send_telegram_customer_invite(
+            await self.notification_service.enqueue_telegram_customer_invite(
+                uow,
                 coach_name=data.coach_name,
                 customer_username=customer.telegram_username,
                 customer_password=customer.password,
             )
-            logger.info(f"Customer {customer.telegram_username} successfully invited through Telegram account")
 
         await uow.commit()
         return customer
@@ -169,9 +232,10 @@ class CustomerService:
             NotValidCredentials: in case if credentials aren't valid
         """
         if len(form_data.password) == OTP_LENGTH:
-            self.user = await self.get_customer_by_otp(uow, form_data.password)
+            self.user = await self.get_customer_by_otp(uow, form_data.username, form_data.password)
         else:
-            self.user = await self.get_customer_by_username(uow, form_data.username)
+            # password must be checked against the stored one, not the cached one
+            self.user = await self.get_customer_by_username(uow, form_data.username, use_cache=False)
 
         if self.user is None:
             logger.info(f"neither.coach.nor.client.was.found.in.the.database {form_data.username}")
@@ -181,7 +245,8 @@ class CustomerService:
         if await self.profile_service.authorize_user(uow, self.user, data) is True:
             if self.user.username is None:
                 await self.update_profile(uow, self.user, username=form_data.username)
-                await uow.commit()
+            await uow.commit()
+            self.invalidate_cached_customer(self.user.username)
             logger.info(f"Customer successfully {self.user.last_name} {self.user.first_name} login")
             return self.user
         raise NotValidCredentials("Not correct customer password")
@@ -194,6 +259,9 @@ class CustomerService:
     async def update_profile(self, uow: AsyncSession, user: CustomerDtoSchema, **params) -> None:
         updated_customer = await self.profile_service.update_user_profile(uow, user, **params)
         await uow.commit()
+        self.invalidate_cached_customer(user.username)
+        if updated_customer is not None:
+            self.invalidate_cached_customer(updated_customer.username)
         return updated_customer
 
     async def delete(self, uow: AsyncSession, user: Customer) -> None:
@@ -203,6 +271,7 @@ class CustomerService:
             return
 
         await uow.commit()
+        self.invalidate_cached_customer(user.username)
         logger.info(f"Customer {user.username} successfully deleted")
 
     async def get_customer_by_pk(self, uow: AsyncSession, pk: str) -> CustomerDtoSchema | None:
@@ -212,24 +281,33 @@ class CustomerService:
             return self.user
         return None
 
-    async def get_customer_by_otp(self, uow: AsyncSession, otp: str) -> CustomerDtoSchema | None:
-        customer = await self.selector_service.select_customer_by_otp(uow, password=otp)
+    async def get_customer_by_otp(self, uow: AsyncSession, username: str, otp: str) -> CustomerDtoSchema | None:
+        customer = await self.selector_service.select_customer_by_otp(uow, username=username, password=otp)
         if customer:
             self.user = customer
             return self.user
         return None
 
-    async def get_customers_by_coach_id(self, uow: AsyncSession, coach_id: str) -> list[dict[str, str]]:
-        customers = await self.selector_service.select_customers_by_coach_id(uow, coach_id)
-        return customers
+    async def get_customers_by_coach_id(
+        self, uow: AsyncSession, coach_id: str, limit: int | None = None, cursor: str | None = None, search: str | None = None,
+    ) -> tuple[list[dict[str, str]], str | None]:
+        return await self.selector_service.select_customers_by_coach_id(
+            uow, coach_id, limit=limit, cursor=cursor, search=search,
+        )
 
-    async def get_customer_by_username(self, uow: AsyncSession, username: str) -> CustomerDtoSchema | None:
-        customer = await self.selector_service.select_customer_by_username(uow, username)
+    async def get_customer_by_username(
+        self, uow: AsyncSession, username: str, use_cache: bool = True
+    ) -> CustomerDtoSchema | None:
+        customer = await self.selector_service.select_customer_by_username(uow, username, use_cache=use_cache)
         if customer is not None:
             self.user = customer
             return self.user
         return None
 
+    @staticmethod
+    def invalidate_cached_customer(username: str | None) -> None:
+        principal_cache.delete((UserType.CUSTOMER.value, username))
+
     async def get_customer_by_full_name_for_coach(
         self, uow: AsyncSession, coach_id: str, first_name: str, last_name: str
     ) -> CustomerDtoSchema | None:
@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.presentation.schemas.nutrition_schema import MealType, ProductAddInDiet
 from src.presentation.schemas.training_plan_schema import DietIn
 from src.repository.diet_repository import DietRepository
-from src.schemas.diet_dto import DailyDietDtoSchema
+from src.schemas.diet_dto import DailyDietDtoSchema, DailyDietNutrientsDtoSchema, DietDtoSchema
 from src.service.calories_calculator_service import CaloriesCalculatorService
 from src.service.product_service import ProductService
 
@@ -22,67 +22,78 @@ class DietService:
         self.calories_calculator_service = calories_calculator_service
         self.product_service = product_service
 
-    async def _actualize_daily_diet_fact(
-        self,
-        updating_daily_diet: DailyDietDtoSchema,
-        meal_type: MealType,
-        product_list: list[dict],
-    ) -> tuple[DailyDietDtoSchema, dict]:
-        updating_meal = getattr(updating_daily_diet, meal_type.value)
+    @staticmethod
+    async def _calculate_consumed_nutrients(product_list: list[dict]) -> dict[str, float]:
+        """
+        Recalculates product nutrients from 100 grams to consumed amount
+
+        Return:
+            sum of products nutrients by meal total key
+        """
+        nutrients = {"total_calories": 0, "total_proteins": 0, "total_fats": 0, "total_carbs": 0}
         for item in product_list:
             item["calories"] *= item["amount"] / 100
             item["proteins"] *= item["amount"] / 100
             item["fats"] *= item["amount"] / 100
             item["carbs"] *= item["amount"] / 100
 
-            updating_daily_diet.consumed_calories += item["calories"]
-            updating_daily_diet.consumed_proteins += item["proteins"]
-            updating_daily_diet.consumed_fats += item["fats"]
-            updating_daily_diet.consumed_carbs += item["carbs"]
+            nutrients["total_calories"] += item["calories"]
+            nutrients["total_proteins"] += item["proteins"]
+            nutrients["total_fats"] += item["fats"]
+            nutrients["total_carbs"] += item["carbs"]
 
-            updating_meal["total_calories"] += item["calories"]
-            updating_meal["total_proteins"] += item["proteins"]
-            updating_meal["total_fats"] += item["fats"]
-            updating_meal["total_carbs"] += item["carbs"]
-
-            updating_meal["products"].append(item)
-
-        return updating_daily_diet, updating_meal
+        return nutrients
 
     async def put_product_to_diet_meal(
         self,
         uow: AsyncSession,
-        daily_diet_id: UUID,
+        customer_id: UUID,
+        daily_diet_id: UUID | None,
+        specific_day: date | None,
         meal_type: MealType,
         adding_products_data: list[ProductAddInDiet],
     ) -> DailyDietDtoSchema | None:
+        """
+        Diet day is created with the first products added to it when it's specified by date
+        """
+        if daily_diet_id is None:
+            daily_diet_id = await self.diet_repository.upsert_daily_diet(
+                uow=uow,
+                customer_id=customer_id,
+                specific_day=specific_day,
+            )
+            if daily_diet_id is None:
+                return None
+
         products_full_info = await self.product_service.get_products_by_barcodes(
             barcodes=[item.barcode for item in adding_products_data],
         )
-        updating_daily_diet = await self.diet_repository.get_daily_diet_by_id(
-            uow=uow,
-            daily_diet_id=daily_diet_id,
-        )
         merged_product_list = [
             {**product.dict(), **amount.dict()}
             for product, amount in zip(products_full_info, adding_products_data)
         ]
-        updated_daily_diet, updated_meal = await self._actualize_daily_diet_fact(
-            updating_daily_diet=updating_daily_diet,
-            meal_type=meal_type,
-            product_list=merged_product_list,
-        )
-        result = await self.diet_repository.update_daily_diet_meal(
+        nutrients = await self._calculate_consumed_nutrients(merged_product_list)
+        result = await self.diet_repository.append_products_to_meal(
             uow=uow,
-            updated_daily_diet=updated_daily_diet,
-            meal_type=meal_type,
-            updated_meal=updated_meal,
+            daily_diet_id=daily_diet_id,
+            meal_type=meal_type.value,
+            products=merged_product_list,
+            nutrients=nutrients,
         )
+        if result is None:
+            await uow.rollback()
+            return None
+
         await self.product_service.save_product_to_history(uow, merged_product_list)
         await uow.commit()
         return result
 
-    async def create_diet_templates(self, uow: AsyncSession, training_plan_id: UUID, diets: list[DietIn]) -> int:
+    async def create_diet_templates(
+        self, uow: AsyncSession, training_plan_id: UUID, diets: list[DietIn]
+    ) -> list[DietDtoSchema]:
+        """
+        Inserts coach diets of the plan, the caller commits the transaction
+        """
         for diet in diets:
             diet.calories = await self.calories_calculator_service.calculate_calories(
                 proteins=diet.proteins,
@@ -90,29 +101,40 @@ class DietService:
                 carbs=diet.carbs,
             )
 
-        diet_ids = await self.diet_repository.insert_diet_templates(
+        return await self.diet_repository.insert_diet_templates(
             uow=uow,
             training_plan_id=training_plan_id,
             diets=diets,
         )
-        await uow.commit()
-        return len(diet_ids)
+
+    async def get_customer_diet_range(
+        self, uow: AsyncSession, customer_id: UUID, date_from: date, date_to: date, limit: int,
+    ) -> tuple[list[DailyDietNutrientsDtoSchema], date | None]:
+        """
+        Returns logged days of the range and the date to request the next page from,
+        it's None if there are no more days in the range
+        """
+        days = await self.diet_repository.get_daily_nutrients_by_date_range(
+            uow=uow,
+            customer_id=customer_id,
+            date_from=date_from,
+            date_to=date_to,
+            limit=limit + 1,
+        )
+        if len(days) <= limit:
+            return days, None
+        return days[:limit], days[limit].date
 
     async def get_daily_customer_diet(
         self, uow: AsyncSession, customer_id: UUID, specific_day: date,
     ) -> DailyDietDtoSchema | None:
+        """
+        Day without logged products is returned empty, it isn't saved until products are added
+        """
         diet = await self.diet_repository.get_daily_diet_by_training_plan_date_range(
             uow=uow,
             customer_id=customer_id,
             specific_day=specific_day,
         )
 
-        if diet.diet_day_id is None:
-            diet = await self.diet_repository.create_daily_diet(
-                uow=uow,
-                template_diet_id=diet.template_diet_id,
-                specific_day=specific_day,
-            )
-            await uow.commit()
-
         return diet
@@ -1,10 +1,40 @@
+from datetime import datetime, timedelta
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.repository.library_repository import ExerciseRepository, MuscleGroupRepository
 from src.schemas.muscle_group_dto import MuscleGroupDto
-from src.schemas.exercise_dto import ExerciseFullDtoSchema
+from src.schemas.exercise_dto import ExerciseFullDtoSchema, ExerciseLibraryDtoSchema
+from src.shared.cache import TTLCache
+from src.shared.settings import InfrastructureSettings
+
+infrastructure_settings = InfrastructureSettings()
+
+# coach's custom exercises keyed by coach id
+custom_exercise_cache = TTLCache(
+    maxsize=infrastructure_settings.custom_exercise_cache_size,
+    ttl=infrastructure_settings.custom_exercise_cache_ttl,
+)
+
+# global exercises and muscle groups change only with migrations, they're loaded once per process
+_library_snapshot: ExerciseLibraryDtoSchema | None = None
+
+_VERSION_EPOCH = datetime(1970, 1, 1)
+
+
+def library_version(created: datetime | None) -> int:
+    """
+    Library item version is its creation time in microseconds, clients send the last one to get new items only
+    """
+    if created is None:
+        return 0
+    return (created - _VERSION_EPOCH) // timedelta(microseconds=1)
+
+
+def reset_library_snapshot() -> None:
+    global _library_snapshot
+    _library_snapshot = None
 
 
 class LibraryService:
@@ -16,13 +46,59 @@ class LibraryService:
         self.exercise_repository = exercise_repository
         self.muscle_group_repository = muscle_group_repository
 
-    async def get_exercise_list(self, uow: AsyncSession, coach_id: str) -> list[ExerciseFullDtoSchema]:
-        exercises = await self.exercise_repository.get_coach_exercises(uow, coach_id)
+    async def load_library_snapshot(self, uow: AsyncSession) -> ExerciseLibraryDtoSchema:
+        global _library_snapshot
+        exercises = await self.exercise_repository.get_global_exercises(uow)
+        muscle_groups = await self.muscle_group_repository.get_all_muscle_groups(uow)
+        _library_snapshot = ExerciseLibraryDtoSchema(
+            version=max((library_version(item.created) for item in [*exercises, *muscle_groups]), default=0),
+            exercises=exercises,
+            muscle_groups=muscle_groups,
+        )
+        return _library_snapshot
+
+    async def get_library_snapshot(self, uow: AsyncSession) -> ExerciseLibraryDtoSchema:
+        if _library_snapshot is None:
+            return await self.load_library_snapshot(uow)
+        return _library_snapshot
+
+    async def get_custom_exercises(self, uow: AsyncSession, coach_id: UUID) -> list[ExerciseFullDtoSchema]:
+        exercises = custom_exercise_cache.get(coach_id)
+        if exercises is None:
+            exercises = await self.exercise_repository.get_custom_exercises(uow, coach_id)
+            custom_exercise_cache.set(coach_id, exercises)
         return exercises
 
-    async def get_muscle_group_list(self, uow: AsyncSession) -> list[MuscleGroupDto]:
-        muscle_groups = await self.muscle_group_repository.get_all_muscle_groups(uow)
-        return muscle_groups
+    async def get_exercise_list(
+        self, uow: AsyncSession, coach_id: UUID, since_version: int | None = None
+    ) -> tuple[list[ExerciseFullDtoSchema], int]:
+        """
+        Returns global and coach's exercises created after since_version, all of them if it isn't specified
+
+        Return:
+            exercises and library version to request the next changes with
+        """
+        snapshot = await self.get_library_snapshot(uow)
+        custom_exercises = await self.get_custom_exercises(uow, coach_id)
+
+        version = max([snapshot.version, *(library_version(exercise.created) for exercise in custom_exercises)])
+        exercises = [
+            exercise
+            for exercise in [*snapshot.exercises, *custom_exercises]
+            if since_version is None or library_version(exercise.created) > since_version
+        ]
+        return exercises, version
+
+    async def get_muscle_group_list(
+        self, uow: AsyncSession, since_version: int | None = None
+    ) -> tuple[list[MuscleGroupDto], int]:
+        snapshot = await self.get_library_snapshot(uow)
+        muscle_groups = [
+            muscle_group
+            for muscle_group in snapshot.muscle_groups
+            if since_version is None or library_version(muscle_group.created) > since_version
+        ]
+        return muscle_groups, snapshot.version
 
     async def create_exercise(self, uow: AsyncSession, exercise_name: str, coach_id: UUID, muscle_group_id: str):
         muscle_group = await self.muscle_group_repository.get_specified_muscle_group(uow, muscle_group_id)
@@ -38,4 +114,9 @@ class LibraryService:
         )
 
         await uow.commit()
+        self.invalidate_custom_exercises(coach_id)
         return exercise
+
+    @staticmethod
+    def invalidate_custom_exercises(coach_id: UUID) -> None:
+        custom_exercise_cache.delete(coach_id)
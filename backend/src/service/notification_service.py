@@ -1,7 +1,14 @@
+import asyncio
 import json
 import logging
+from uuid import UUID
 
-from src.supplier.firebase_supplier import PushFirebaseNotificator
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import OutboxChannel
+from src.repository.outbox_repository import OutboxRepository
+from src.schemas.outbox_dto import OutboxMessageDtoSchema
+from src.supplier.firebase_supplier import PushFirebaseNotificator, PushDeliveryStatus
 from src.supplier.kafka_supplier import KafkaSupplier
 
 logger = logging.getLogger(__name__)
@@ -9,9 +16,81 @@ logger = logging.getLogger(__name__)
 
 class NotificationService:
 
-    def __init__(self, notificator: PushFirebaseNotificator, kafka_supplier: KafkaSupplier) -> None:
+    def __init__(
+        self,
+        notificator: PushFirebaseNotificator,
+        kafka_supplier: KafkaSupplier,
+        outbox_repository: OutboxRepository,
+    ) -> None:
         self.push_notificator = notificator
         self.kafka_supplier = kafka_supplier
+        self.outbox_repository = outbox_repository
+
+    async def enqueue_push_notification(
+        self, uow: AsyncSession, recipient_id: str | None, recipient_data: dict[str, str]
+    ) -> None:
+        """
+        Saves push notification in outbox, it's sent after the caller commits the transaction
+        """
+        if recipient_id is None:
+            logger.warning(f"Failed to send notification recipient id is not specified")
+            return
+
+        await self.outbox_repository.add_message(
+            uow,
+            OutboxChannel.PUSH_NOTIFICATION,
+            {"recipient_id": recipient_id, "recipient_data": recipient_data},
+        )
+
+    async def enqueue_telegram_customer_invite(
+        self, uow: AsyncSession, coach_name: str, customer_username: str, customer_password: str
+    ) -> None:
+        """
+        Saves customer invite in outbox, it's sent after the caller commits the transaction
+        """
+        await self.outbox_repository.add_message(
+            uow,
+            OutboxChannel.TELEGRAM_CUSTOMER_INVITE,
+            {"coach_name": coach_name, "customer_username": customer_username, "customer_password": customer_password},
+        )
+
+    async def deliver(self, message: OutboxMessageDtoSchema) -> None:
+        match message.channel:
+            case OutboxChannel.PUSH_NOTIFICATION.value:
+                await self.send_push_notification(**message.payload)
+            case OutboxChannel.TELEGRAM_CUSTOMER_INVITE.value:
+                await self.send_telegram_customer_invite(**message.payload)
+            case _:
+                raise ValueError(f"Unknown outbox channel {message.channel}")
+
+    async def deliver_batch(self, messages: list[OutboxMessageDtoSchema]) -> dict[UUID, Exception | None]:
+        """
+        Push notifications are sent together in FCM batches,
+        other messages are delivered concurrently and wait for the broker acknowledgement
+
+        Return:
+            delivery error for each message id, None if message is delivered
+        """
+        errors: dict[UUID, Exception | None] = {}
+
+        push_messages = [message for message in messages if message.channel == OutboxChannel.PUSH_NOTIFICATION.value]
+        if push_messages:
+            results = await self.push_notificator.send_notifications(
+                [(message.payload["recipient_id"], message.payload["recipient_data"]) for message in push_messages]
+            )
+            for message, result in zip(push_messages, results):
+                if result.status == PushDeliveryStatus.INVALID_TOKEN:
+                    logger.info(f"Push notification isn't delivered, device token is invalid: {result.recipient_id}")
+                errors[message.id] = result.error
+
+        other_messages = [message for message in messages if message.id not in errors]
+        results = await asyncio.gather(
+            *(self.deliver(message) for message in other_messages), return_exceptions=True
+        )
+        for message, result in zip(other_messages, results):
+            errors[message.id] = result if isinstance(result, Exception) else None
+
+        return errors
 
     async def send_push_notification(self, recipient_id: str, recipient_data: dict[str, str]):
         if recipient_id is None:
@@ -29,4 +108,4 @@ class NotificationService:
             {"username": customer_username, "customer_password": customer_password, "coach_name": coach_name},
             ensure_ascii=False,
         )
-        self.kafka_supplier.send_message(message)
+        await self.kafka_supplier.send_message(message)
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from src.repository.outbox_repository import OutboxRepository
+from src.service.notification_service import NotificationService
+from src.shared.settings import OutboxSettings
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxRelayService:
+    """
+    Delivers messages saved in outbox by the committed transactions.
+    Failed message is retried with exponential backoff until max attempts are reached.
+    """
+
+    def __init__(
+        self,
+        outbox_repository: OutboxRepository,
+        notification_service: NotificationService,
+        settings: OutboxSettings,
+    ) -> None:
+        self.outbox_repository = outbox_repository
+        self.notification_service = notification_service
+        self.settings = settings
+
+    def _next_attempt_at(self, attempts: int) -> datetime | None:
+        if attempts >= self.settings.max_attempts:
+            return None
+
+        delay = min(self.settings.backoff_base_seconds ** attempts, self.settings.backoff_max_seconds)
+        return datetime.now() + timedelta(seconds=delay)
+
+    async def relay_batch(self, uow: AsyncSession) -> int:
+        """
+        Delivers one batch of pending messages
+
+        Return:
+            number of messages taken from outbox
+        """
+        messages = await self.outbox_repository.provide_pending_messages(uow, limit=self.settings.relay_batch_size)
+
+        errors = await self.notification_service.deliver_batch(messages)
+
+        sent_ids = []
+        for message in messages:
+            error = errors.get(message.id)
+            if error is None:
+                sent_ids.append(message.id)
+                continue
+
+            attempts = message.attempts + 1
+            # errors like invalid device token won't be fixed by the next attempt
+            next_attempt_at = self._next_attempt_at(attempts) if getattr(error, "retryable", True) else None
+            logger.warning(f"Failed to deliver outbox message {message.id}, attempt {attempts}: {error}")
+            await self.outbox_repository.mark_attempt_failed(
+                uow, message.id, attempts=attempts, next_attempt_at=next_attempt_at, error=str(error),
+            )
+
+        await self.outbox_repository.mark_sent(uow, sent_ids)
+        await uow.commit()
+        return len(messages)
+
+    async def purge_sent_messages(self, uow: AsyncSession) -> int:
+        """
+        Deletes messages sent earlier than the retention period
+
+        Return:
+            number of deleted messages
+        """
+        sent_before = datetime.now() - timedelta(hours=self.settings.sent_retention_hours)
+        deleted = await self.outbox_repository.delete_sent_messages(uow, sent_before=sent_before)
+        await uow.commit()
+        return deleted
+
+    async def run(self, session_factory: sessionmaker) -> None:
+        next_purge_at = time.monotonic()
+        while True:
+            try:
+                async with session_factory() as uow:
+                    if time.monotonic() >= next_purge_at:
+                        next_purge_at = time.monotonic() + self.settings.purge_interval_seconds
+                        await self.purge_sent_messages(uow)
+                    relayed = await self.relay_batch(uow)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception(f"Outbox relay iteration failed: {exc}")
+                relayed = 0
+
+            # full batch means there are more pending messages, take them right away
+            if relayed < self.settings.relay_batch_size:
+                await asyncio.sleep(self.settings.relay_interval_seconds)
+
+
+_relay_task: asyncio.Task | None = None
+
+
+def start_outbox_relay(relay_service: OutboxRelayService, session_factory: sessionmaker) -> None:
+    global _relay_task
+    if _relay_task is None or _relay_task.done():
+        _relay_task = asyncio.create_task(relay_service.run(session_factory))
+
+
+async def stop_outbox_relay() -> None:
+    global _relay_task
+    if _relay_task is None:
+        return
+
+    _relay_task.cancel()
+    try:
+        await _relay_task
+    except asyncio.CancelledError:
+        pass
+    _relay_task = None
@@ -7,6 +7,54 @@ from src.repository.product_repository import ProductRepository
 from src.shared.exceptions import BarcodeAlreadyExistExc
 from src.schemas.product_dto import ProductDtoSchema, HistoryProductDtoSchema
 from src.service.calories_calculator_service import CaloriesCalculatorService
+from src.shared.cache import TTLCache
+from src.shared.settings import InfrastructureSettings
+
+infrastructure_settings = InfrastructureSettings()
+
+_UNKNOWN = object()
+
+
+class ProductCache:
+    """
+    In-process barcode cache in front of product storage.
+    Missing barcodes are cached as None for a shorter time.
+    """
+
+    def __init__(self, settings: InfrastructureSettings) -> None:
+        self.local = TTLCache(maxsize=settings.product_cache_size, ttl=settings.product_cache_ttl)
+        self.missing_ttl = settings.product_missing_cache_ttl
+
+    def get_many(self, barcodes: list[str]) -> tuple[dict[str, ProductDtoSchema | None], list[str]]:
+        """
+        Returns:
+            cached products by barcode (None for missing products) and barcodes which aren't cached
+        """
+        cached: dict[str, ProductDtoSchema | None] = {}
+        unknown = []
+        for barcode in dict.fromkeys(barcodes):
+            product = self.local.get(barcode, _UNKNOWN)
+            if product is _UNKNOWN:
+                unknown.append(barcode)
+            else:
+                cached[barcode] = product.copy() if product is not None else None
+
+        return cached, unknown
+
+    def set_many(self, products: list[ProductDtoSchema], missing_barcodes: list[str]) -> None:
+        for product in products:
+            self.local.set(product.barcode, product.copy())
+        for barcode in missing_barcodes:
+            self.local.set(barcode, None, ttl=self.missing_ttl)
+
+    def clear(self) -> None:
+        self.local.clear()
+
+    def stats(self) -> dict:
+        return self.local.stats()
+
+
+product_cache = ProductCache(infrastructure_settings)
 
 
 class ProductService:
@@ -18,16 +66,35 @@ class ProductService:
         self.product_repository = product_repository
         self.calories_calculator_service = calories_calculator_service
 
-    async def get_product_by_barcode(self, barcode: str) -> ProductDtoSchema | None:
+    async def get_product_by_barcode(self, barcode: str, use_cache: bool = True) -> ProductDtoSchema | None:
+        if use_cache:
+            cached, unknown = product_cache.get_many([barcode])
+            if not unknown:
+                return cached[barcode]
+
         product = await self.product_repository.get_product_by_barcode(barcode)
+        if product is None:
+            product_cache.set_many([], [barcode])
+        else:
+            product_cache.set_many([product], [])
         return product
 
     async def get_products_by_barcodes(self, barcodes: list[str]) -> list[ProductDtoSchema]:
-        products = await self.product_repository.get_products_by_barcodes(barcodes)
-        return products
+        """
+        Returns products in the order of requested barcodes, missing products are skipped
+        """
+        cached, unknown = product_cache.get_many(barcodes)
+        if unknown:
+            products = await self.product_repository.get_products_by_barcodes(unknown)
+            found = {product.barcode: product for product in products}
+            product_cache.set_many(products, [barcode for barcode in unknown if barcode not in found])
+            cached.update(found)
+
+        return [cached[barcode] for barcode in barcodes if cached.get(barcode) is not None]
 
     async def create_product(self, uow: AsyncSession, user_id: UUID, product_data: ProductCreateIn) -> ProductDtoSchema:
-        existed_product = await self.get_product_by_barcode(product_data.barcode)
+        # barcode could be added by another worker after it was cached as missing
+        existed_product = await self.get_product_by_barcode(product_data.barcode, use_cache=False)
         if existed_product is not None:
             raise BarcodeAlreadyExistExc("The product with the same barcode already exist")
 
@@ -37,11 +104,13 @@ class ProductService:
             carbs=product_data.carbs,
         )
         new_product = await self.product_repository.insert_product(
+            uow,
             user_id,
             product_data,
             product_calories,
         )
         await uow.commit()
+        product_cache.set_many([new_product], [])
         return new_product
 
     async def save_product_to_history(self, uow: AsyncSession, product_list: list[dict]) -> None:
@@ -50,6 +119,21 @@ class ProductService:
     async def get_product_history(self, uow: AsyncSession, customer_id: UUID) -> list[HistoryProductDtoSchema]:
         return await self.product_repository.fetch_product_history(uow, customer_id)
 
-    async def search_products(self, query_string: str) -> list[ProductDtoSchema]:
-        expected_products = await self.product_repository.lookup_products(query_string)
+    async def backfill_search_index(self, uow: AsyncSession, batch_size: int) -> int:
+        """
+        Copies products created before the search index appeared, every batch is committed separately
+
+        Return:
+            number of indexed products
+        """
+        indexed = 0
+        async for products in self.product_repository.get_product_batches(batch_size):
+            indexed += await self.product_repository.index_products(uow, products)
+            await uow.commit()
+        return indexed
+
+    async def search_products(
+        self, uow: AsyncSession, query_string: str, limit: int, offset: int = 0
+    ) -> list[ProductDtoSchema]:
+        expected_products = await self.product_repository.lookup_products(uow, query_string, limit, offset)
         return expected_products
@@ -4,21 +4,30 @@ from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.schemas.exercise_dto import ScheduledExerciseDto
 from src.service.training_service import TrainingService
 from src.service.diet_service import DietService
+from src.service.notification_service import NotificationService
 from src.repository.training_plan_repository import TrainingPlanRepository
 from src.schemas.training_plan_dto import (
-    TrainingDtoSchema,
     TrainingPlanDtoSchema,
     TrainingPlanDtoShortSchema,
     TrainingPlanDetailDtoSchema,
 )
 from src.presentation.schemas.training_plan_schema import TrainingPlanIn
+from src.shared.cache import TTLCache
+from src.shared.settings import InfrastructureSettings
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+infrastructure_settings = InfrastructureSettings()
+
+# plan details keyed by plan id and time of its last change
+training_plan_cache = TTLCache(
+    maxsize=infrastructure_settings.training_plan_cache_size,
+    ttl=infrastructure_settings.training_plan_cache_ttl,
+)
+
 
 class TrainingPlanCreationException(Exception):
     ...
@@ -29,18 +38,31 @@ class TrainingPlanService:
         self,
         training_plan_repository: TrainingPlanRepository,
         training_service: TrainingService,
-        diet_service: DietService
+        diet_service: DietService,
+        notification_service: NotificationService,
     ) -> None:
         self.training_plan_repository = training_plan_repository
         self.training_service = training_service
         self.diet_service = diet_service
+        self.notification_service = notification_service
 
     async def create_training_plan(
         self,
         uow: AsyncSession,
         customer_id: str,
-        data: TrainingPlanIn
+        data: TrainingPlanIn,
+        recipient_id: str | None = None,
     ) -> TrainingPlanDtoSchema:
+        """
+        Creates training plan with its diets and trainings and notifies customer about it in one transaction,
+        returned plan is built from the inserted data without reading it back
+
+        Args:
+            uow: db session injection
+            customer_id: customer's str(UUID)
+            data: training plan data from application user
+            recipient_id: customer's fcm token, notification is skipped if it's not specified
+        """
         try:
             training_plan = await self.training_plan_repository.create_training_plan(
                 uow=uow,
@@ -51,90 +73,65 @@ class TrainingPlanService:
                 exercise_rest=data.exercise_rest,
                 notes=data.notes,
             )
-            await self.diet_service.create_diet_templates(
+            training_plan.diets = await self.diet_service.create_diet_templates(
                 uow=uow,
                 training_plan_id=training_plan.id,
                 diets=data.diets,
             )
-            await self.training_service.create_trainings(
+            training_plan.trainings = await self.training_service.create_trainings(
                 uow=uow,
                 training_plan_id=training_plan.id,
                 trainings=data.trainings,
             )
+            notification_data = {
+                "title": "Создан новый тренировочный план",
+                "body": f"с {training_plan.start_date} до {training_plan.end_date}",
+            }
+            await self.notification_service.enqueue_push_notification(uow, recipient_id, notification_data)
+            await uow.commit()
         except Exception as exc:
-            logger.warning("error.occurred.during.execution.training.plan.transaction", str(exc))
+            logger.warning(f"error.occurred.during.execution.training.plan.transaction: {exc}")
             await uow.rollback()
             raise TrainingPlanCreationException from exc
-        else:
-            training_plan_in_db = await self.training_plan_repository.provide_training_plan_by_id(
-                uow=uow, id_=training_plan.id,
-            )
-            await uow.commit()
-            return training_plan_in_db
+
+        return training_plan
 
     async def get_training_plan_by_id(self, uow: AsyncSession, id_: UUID) -> TrainingPlanDetailDtoSchema | None:
-        training_plan = await self.training_plan_repository.provide_training_plan_by_id(uow, id_=id_)
+        """
+        Plan details are loaded only if the plan was changed since it was cached
+        """
+        last_modified = await self.training_plan_repository.provide_training_plan_last_modified(uow, id_=id_)
+        if last_modified is None:
+            logger.info(f"training.plan.not.found: id={id_}")
+            return None
 
-        training_ids = [str(training.id) for training in training_plan.trainings]
-        exercise_ids = [str(exercise.id) for training in training_plan.trainings for exercise in training.exercises]
+        cached_training_plan = training_plan_cache.get((id_, last_modified))
+        if cached_training_plan is not None:
+            return cached_training_plan.copy(deep=True)
 
-        scheduled_trainings = await self.training_service.provide_scheduled_trainings(
-            uow=uow,
-            training_ids=training_ids,
-            exercise_ids=exercise_ids,
-        )
+        training_plan = await self.training_plan_repository.provide_training_plan_detail_by_id(uow, id_=id_)
 
         if training_plan is None:
             logger.info(f"training.plan.not.found: id={id_}")
             return None
 
-        trainings = []
-        for training in training_plan.trainings:
-            training_dto = TrainingDtoSchema(
-                id=str(training.id),
-                name=training.name,
-                number_of_exercises=len(training_plan.trainings),
-                exercises=[],
-            )
-
-            for exercise in training.exercises:
-                scheduled_exercise = scheduled_trainings[str(exercise.id)]
-                superset_id = str(scheduled_exercise.superset_id) if scheduled_exercise.superset_id else None
-
-                exercise_dto = ScheduledExerciseDto(
-                    id=str(exercise.id),
-                    name=exercise.name,
-                    sets=scheduled_exercise.sets,
-                    exercise_id=exercise.id,
-                    training_id=training.id,
-                    superset_id=superset_id,
-                    ordering=scheduled_exercise.ordering,
-                )
-
-                training_dto.exercises.append(exercise_dto)
-
-            trainings.append(training_dto)
-
-        training_plan_dto = TrainingPlanDetailDtoSchema(
-            id=str(training_plan.id),
-            start_date=training_plan.start_date.strftime("%Y-%m-%d"),
-            end_date=training_plan.end_date.strftime("%Y-%m-%d"),
-            proteins="/".join([str(diet.total_proteins) for diet in training_plan.diets]),
-            fats="/".join([str(diet.total_fats) for diet in training_plan.diets]),
-            carbs="/".join([str(diet.total_carbs) for diet in training_plan.diets]),
-            calories="/".join([str(diet.total_calories) for diet in training_plan.diets]),
-            trainings=trainings,
-            set_rest=training_plan.set_rest,
-            exercise_rest=training_plan.exercise_rest,
-            notes=training_plan.notes,
-        )
-
-        return training_plan_dto
+        training_plan_cache.set((id_, training_plan.last_modified), training_plan.copy(deep=True))
+        return training_plan
 
     async def get_customer_training_plans(
-        self, uow: AsyncSession, customer_id: str
-    ) -> list[TrainingPlanDtoShortSchema]:
+        self, uow: AsyncSession, customer_id: str, limit: int | None = None, offset: int = 0,
+    ) -> tuple[list[TrainingPlanDtoShortSchema], int | None]:
+        """
+        Returns page of customer plans and offset of the next page, it's None on the last page.
+        All remaining plans are returned if limit isn't set
+        """
         training_plans = await self.training_plan_repository.provide_customer_plans_by_customer_id(
-            uow=uow, customer_id=customer_id,
+            uow=uow, customer_id=customer_id, limit=limit + 1 if limit else None, offset=offset,
         )
-        return training_plans
+
+        next_offset = None
+        if limit and len(training_plans) > limit:
+            training_plans = training_plans[:limit]
+            next_offset = offset + limit
+
+        return training_plans, next_offset
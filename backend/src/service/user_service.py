@@ -17,6 +17,11 @@ from src.shared.config import (
     STATIC_DIR,
 )
 from src.utils import verify_password
+from src.shared.cache import TTLCache
+from src.shared.settings import AuthSettings
+from src.repository.user_repository import UserRepository
+from src.schemas.coach_dto import CoachDtoSchema
+from src.schemas.customer_dto import CustomerDtoSchema
 from src.presentation.schemas.login_schema import UserLoginData
 from src.presentation.schemas.register_schema import UserRegistrationData
 
@@ -25,12 +30,30 @@ logger = logging.getLogger(__name__)
 
 USER_MODEL = Coach | Customer
 
+auth_settings = AuthSettings()
+
+# authenticated users keyed by (user type, username)
+principal_cache = TTLCache(maxsize=auth_settings.principal_cache_size, ttl=auth_settings.principal_cache_ttl)
+
 
 class UserType(Enum):
     COACH = "coach"
     CUSTOMER = "customer"
 
 
+class UserSelectorService:
+    """Responsible for getting user data when user type is unknown"""
+
+    def __init__(self, user_repository: UserRepository) -> None:
+        self.user_repository = user_repository
+
+    async def select_user_by_username(
+        self, uow: AsyncSession, username: str
+    ) -> CoachDtoSchema | CustomerDtoSchema | None:
+        user = await self.user_repository.provide_by_username(uow, username)
+        return user
+
+
 class UserService(ABC):
     """Contains base user logic"""
 
@@ -47,7 +70,9 @@ class UserService(ABC):
         raise NotImplementedError
 
     @staticmethod
-    async def generate_jwt_token(username: str, access: bool = False, refresh: bool = False) -> str:
+    async def generate_jwt_token(
+        username: str, access: bool = False, refresh: bool = False, user_type: str | None = None
+    ) -> str:
         if not access and not refresh:
             raise ValueError("Specify what token type you're creating")
 
@@ -56,6 +81,9 @@ class UserService(ABC):
         )
         expires_delta = datetime.utcnow() + time_delta
         to_encode = {"exp": expires_delta, "sub": username}
+        if user_type is not None:
+            # lets resolve the token owner without probing both user tables
+            to_encode["user_type"] = user_type
         encoded_jwt = jwt.encode(
             to_encode,
             JWT_SECRET_KEY if access else str(JWT_REFRESH_SECRET_KEY),
@@ -17,6 +17,8 @@ DATABASE_URL = os.environ.get("DATABASE_URL")
 STATIC_DIR = os.path.join(os.getcwd(), "static")
 DYNAMO_DB_PRODUCTS_TABLE_NAME = os.getenv("DYNAMO_DB_PRODUCTS_TABLE_NAME")
 DYNAMO_DB_PRODUCTS_TABLE_REGION = os.getenv("DYNAMO_DB_PRODUCTS_TABLE_REGION")
+# endpoint of DynamoDB Local, AWS endpoint is used if it isn't set
+DYNAMO_DB_HOST = os.getenv("DYNAMO_DB_HOST")
 
 # testing
 TEST_ENV = os.environ.get("TEST_ENV", 0)
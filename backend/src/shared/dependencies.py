@@ -18,14 +18,20 @@ from src.repository.training_repository import TrainingRepository
 from src.repository.training_plan_repository import TrainingPlanRepository
 from src.repository.coach_repository import CoachRepository
 from src.repository.customer_repository import CustomerRepository
+from src.repository.user_repository import UserRepository
+from src.repository.outbox_repository import OutboxRepository
 from src.service.coach_service import CoachService, CoachProfileService, CoachSelectorService
 from src.service.customer_service import CustomerService, CustomerSelectorService, CustomerProfileService
-from src.supplier.kafka_supplier import KafkaSupplier, kafka_settings
+from src.service.user_service import UserSelectorService, UserType
+from src.schemas.coach_dto import CoachDtoSchema
+from src.supplier.kafka_supplier import get_kafka_supplier
 from src.shared.exceptions import TokenExpired, NotValidCredentials
 from src.service.training_plan_service import TrainingPlanService
 from src.service.training_service import TrainingService
 from src.service.diet_service import DietService
 from src.service.notification_service import NotificationService
+from src.service.outbox_relay_service import OutboxRelayService
+from src.shared.settings import OutboxSettings
 from src.supplier.firebase_supplier import PushFirebaseNotificator
 
 
@@ -51,11 +57,16 @@ async def provide_library_service() -> LibraryService:
 
 
 async def provide_push_notification_service() -> NotificationService:
-    kafka_supplier = KafkaSupplier(
-        topic=kafka_settings.customer_invite_topic, config={"bootstrap.servers": kafka_settings.bootstrap_servers}
-    )
     firebase_supplier = PushFirebaseNotificator()
-    return NotificationService(firebase_supplier, kafka_supplier)
+    return NotificationService(firebase_supplier, get_kafka_supplier(), OutboxRepository())
+
+
+async def provide_outbox_relay_service() -> OutboxRelayService:
+    return OutboxRelayService(
+        outbox_repository=OutboxRepository(),
+        notification_service=await provide_push_notification_service(),
+        settings=OutboxSettings(),
+    )
 
 
 async def provide_customer_service(
@@ -69,11 +80,16 @@ async def provide_customer_service(
     )
 
 
+async def provide_user_selector_service() -> UserSelectorService:
+    return UserSelectorService(UserRepository())
+
+
 async def provide_user_service(
     uow: AsyncSession = Depends(provide_database_unit_of_work),
     token: str = Depends(reuseable_oauth),
     coach_service: CoachService = Depends(provide_coach_service),
     customer_service: CustomerService = Depends(provide_customer_service),
+    user_selector_service: UserSelectorService = Depends(provide_user_selector_service),
 ) -> CoachService | CustomerService:
     """
     Checks that token from client request is valid
@@ -83,6 +99,7 @@ async def provide_user_service(
         token: token from client request
         coach_service: service for interacting with coach profile
         customer_service: service for interacting with customer profile
+        user_selector_service: service for looking up user whose type isn't passed in token
 
     Raises:
         401: HTTPException: in case if token is expired
@@ -102,16 +119,22 @@ async def provide_user_service(
     else:
         username = token_data.sub
 
-        coach = await coach_service.get_coach_by_username(uow, username=username)
-        customer = await customer_service.get_customer_by_username(uow, username=username)
-
-        if coach:
-            return coach_service
-        elif customer:
-            return customer_service
+        if token_data.user_type == UserType.COACH.value:
+            user = await coach_service.get_coach_by_username(uow, username=username)
+            service = coach_service
+        elif token_data.user_type == UserType.CUSTOMER.value:
+            user = await customer_service.get_customer_by_username(uow, username=username)
+            service = customer_service
         else:
+            user = await user_selector_service.select_user_by_username(uow, username=username)
+            service = coach_service if isinstance(user, CoachDtoSchema) else customer_service
+            service.user = user
+
+        if user is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
+        return service
+
 
 async def provide_product_service() -> ProductService:
     product_repository = ProductRepository()
@@ -135,7 +158,8 @@ async def provide_diet_service(
 
 
 async def provide_training_plan_service(
-    product_service: ProductService = Depends(provide_product_service)
+    product_service: ProductService = Depends(provide_product_service),
+    notification_service: NotificationService = Depends(provide_push_notification_service),
 ) -> TrainingPlanService:
     diet_service = DietService(
         diet_repository=DietRepository(),
@@ -150,4 +174,5 @@ async def provide_training_plan_service(
         training_plan_repository=training_plan_repository,
         training_service=training_service,
         diet_service=diet_service,
+        notification_service=notification_service,
     )
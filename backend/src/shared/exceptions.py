@@ -16,3 +16,11 @@ class TokenExpired(Exception):
 
 class BarcodeAlreadyExistExc(Exception):
     ...
+
+
+class OneTimePasswordGenerationFailed(Exception):
+    pass
+
+
+class NotValidCursor(Exception):
+    pass
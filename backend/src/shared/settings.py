@@ -1,13 +1,50 @@
 import os
 from dataclasses import dataclass
 
+from dotenv import load_dotenv
 from fastapi.security import OAuth2PasswordBearer
 
+load_dotenv()
+
 
 @dataclass
 class InfrastructureSettings:
     database_url: str = os.environ.get("DATABASE_URL")
     static_dir: str = os.path.join(os.getcwd(), "static")
+    # "queue" keeps warm connections per worker, "null" opens a new connection per session
+    database_pool_class: str = os.environ.get("DATABASE_POOL_CLASS", "queue")
+    database_pool_size: int = int(os.environ.get("DATABASE_POOL_SIZE", 10))
+    database_max_overflow: int = int(os.environ.get("DATABASE_MAX_OVERFLOW", 5))
+    database_pool_timeout: int = int(os.environ.get("DATABASE_POOL_TIMEOUT", 30))
+    database_pool_recycle: int = int(os.environ.get("DATABASE_POOL_RECYCLE", 1800))
+    database_pool_pre_ping: bool = os.environ.get("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+    # total connections budget shared by all workers, 0 means no limit
+    database_max_connections: int = int(os.environ.get("DATABASE_MAX_CONNECTIONS", 0))
+    web_concurrency: int = int(os.environ.get("WEB_CONCURRENCY", 1))
+    # "dynamodb" or "memory", the last one keeps products in the process and is used by tests
+    product_storage_backend: str = os.environ.get(
+        "PRODUCT_STORAGE_BACKEND", "memory" if os.environ.get("TEST_ENV") == "active" else "dynamodb"
+    )
+    # "scan" reads DynamoDB on every look up, switch to "index" after product_search_index is backfilled
+    product_search_backend: str = os.environ.get(
+        "PRODUCT_SEARCH_BACKEND", "index" if os.environ.get("TEST_ENV") == "active" else "scan"
+    )
+    # DynamoDB requests running at the same time, others wait in the queue
+    product_storage_workers: int = int(os.environ.get("PRODUCT_STORAGE_WORKERS", 8))
+    # products don't change after creation, missing barcodes are cached for a shorter time
+    product_cache_size: int = int(os.environ.get("PRODUCT_CACHE_SIZE", 10000))
+    product_cache_ttl: int = int(os.environ.get("PRODUCT_CACHE_TTL", 24 * 60 * 60))
+    product_missing_cache_ttl: int = int(os.environ.get("PRODUCT_MISSING_CACHE_TTL", 60))
+    # plan details are validated by clients with ETag, changed plan gets a new cache key
+    training_plan_cache_size: int = int(os.environ.get("TRAINING_PLAN_CACHE_SIZE", 1000))
+    training_plan_cache_ttl: int = int(os.environ.get("TRAINING_PLAN_CACHE_TTL", 60 * 60))
+    # coach's own exercises merged with the library snapshot, other workers see a new exercise after ttl
+    custom_exercise_cache_size: int = int(os.environ.get("CUSTOM_EXERCISE_CACHE_SIZE", 1000))
+    custom_exercise_cache_ttl: int = int(os.environ.get("CUSTOM_EXERCISE_CACHE_TTL", 60))
+    # /metrics isn't authenticated, enable it only where the app port is reachable from internal network
+    metrics_enabled: bool = os.environ.get(
+        "METRICS_ENABLED", "true" if os.environ.get("TEST_ENV") == "active" else "false"
+    ).lower() == "true"
 
 
 @dataclass
@@ -20,6 +57,13 @@ class AuthSettings:
     # original spelling TODO: fix it
     reuseable_oauth: OAuth2PasswordBearer = OAuth2PasswordBearer(tokenUrl="/api/login", scheme_name="JWT")
     otp_length: int = 4
+    otp_expire_minutes: int = int(os.environ.get("OTP_EXPIRE_MINUTES", 7 * 24 * 60))
+    # every worker keeps own copy, a write drops the principal only in the worker that handled it,
+    # so other workers may still authenticate a deleted or changed coach or customer for up to ttl
+    principal_cache_size: int = int(os.environ.get("PRINCIPAL_CACHE_SIZE", 10000))
+    principal_cache_ttl: int = int(os.environ.get("PRINCIPAL_CACHE_TTL", 60))
+    # bcrypt calls running at the same time, others wait in the queue
+    password_hashing_workers: int = int(os.environ.get("PASSWORD_HASHING_WORKERS", 2))
 
 
 @dataclass
@@ -35,6 +79,22 @@ class FirebaseSettings:
     firebase_auth_provider_cert_url = os.environ.get("FIREBASE_AUTH_PROVIDER_CERT_URL", "")
     firebase_client_cert_url = os.environ.get("FIREBASE_CLIENT_CERT_URL", "")
     firebase_universe_domain = os.environ.get("FIREBASE_UNIVERSE_DOMAIN", "")
+    # FCM accepts up to 500 messages in the single send_each call
+    push_batch_size: int = min(int(os.environ.get("FIREBASE_PUSH_BATCH_SIZE", 500)), 500)
+    # batches sent to FCM at the same time, others wait in the queue
+    push_max_concurrency: int = int(os.environ.get("FIREBASE_PUSH_MAX_CONCURRENCY", 4))
+
+
+@dataclass
+class OutboxSettings:
+    relay_interval_seconds: float = float(os.environ.get("OUTBOX_RELAY_INTERVAL_SECONDS", 1))
+    relay_batch_size: int = int(os.environ.get("OUTBOX_RELAY_BATCH_SIZE", 100))
+    max_attempts: int = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 10))
+    backoff_base_seconds: float = float(os.environ.get("OUTBOX_BACKOFF_BASE_SECONDS", 2))
+    backoff_max_seconds: float = float(os.environ.get("OUTBOX_BACKOFF_MAX_SECONDS", 600))
+    # sent messages are kept for investigation, then deleted by the relay worker
+    sent_retention_hours: float = float(os.environ.get("OUTBOX_SENT_RETENTION_HOURS", 7 * 24))
+    purge_interval_seconds: float = float(os.environ.get("OUTBOX_PURGE_INTERVAL_SECONDS", 60 * 60))
 
 
 @dataclass
@@ -55,4 +115,5 @@ class AppSettings:
     infrastructure_settings: InfrastructureSettings
     auth_settings: AuthSettings
     firebase_settings: FirebaseSettings
+    outbox_settings: OutboxSettings
     testing_settings: TestingSettings
@@ -1,7 +1,11 @@
+import asyncio
+import enum
+import logging
+import threading
 from dataclasses import dataclass, asdict
 
 import firebase_admin
-from firebase_admin import initialize_app, messaging, credentials
+from firebase_admin import initialize_app, messaging, credentials, exceptions
 
 from src.shared.config import (
     FIREBASE_TYPE,
@@ -16,12 +20,46 @@ from src.shared.config import (
     FIREBASE_CLIENT_CERT_URL,
     FIREBASE_UNIVERSE_DOMAIN,
 )
+from src.shared.executor import BlockingCallPool
+from src.shared.settings import FirebaseSettings
+
+logger = logging.getLogger(__name__)
+
+firebase_settings = FirebaseSettings()
 
 
 class PushNotificationEmptyDataMessage(Exception):
     pass
 
 
+class PushDeliveryStatus(str, enum.Enum):
+    SENT = "sent"
+    # token is expired or belongs to another app, it won't work anymore
+    INVALID_TOKEN = "invalid_token"
+    # FCM is overloaded or unavailable, message can be sent later
+    RETRYABLE = "retryable"
+    # message is rejected, sending it again won't help
+    FAILED = "failed"
+
+
+class PushDeliveryError(Exception):
+    def __init__(self, message: str, status: PushDeliveryStatus) -> None:
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def retryable(self) -> bool:
+        return self.status == PushDeliveryStatus.RETRYABLE
+
+
+@dataclass
+class PushDeliveryResult:
+    recipient_id: str
+    status: PushDeliveryStatus
+    message_id: str | None = None
+    error: PushDeliveryError | None = None
+
+
 @dataclass
 class FirebaseConfig:
     """
@@ -40,21 +78,36 @@ class FirebaseConfig:
     universe_domain: str = FIREBASE_UNIVERSE_DOMAIN
 
 
+# FCM batches are sent outside the event loop
+push_delivery_pool = BlockingCallPool(
+    max_workers=firebase_settings.push_max_concurrency, thread_name_prefix="push-delivery"
+)
+
+# FCM app is initialized by the first delivery thread, others wait for it
+_firebase_app_lock = threading.Lock()
+
+
 class PushFirebaseNotificator:
     """
     Implements interface to send push notification
     to user device through Firebase platform
     """
 
-    def __init__(self):
+    def __init__(self, batch_size: int = firebase_settings.push_batch_size):
         """
         Prepares config to connection
         """
         self.firebase_config = asdict(FirebaseConfig())
         self.firebase_config["private_key"] = self.firebase_config["private_key"].replace('\\n', '\n')
+        self.batch_size = batch_size
+
+    def establish_conn_to_firebase(self):
+        if firebase_admin._apps:
+            return
 
-    async def establish_conn_to_firebase(self):
-        initialize_app(credentials.Certificate(self.firebase_config))
+        with _firebase_app_lock:
+            if not firebase_admin._apps:
+                initialize_app(credentials.Certificate(self.firebase_config))
 
     async def send_notification(self, recipient_id: str, recipient_data: dict[str, str]) -> str:
         """
@@ -73,22 +126,100 @@ class PushFirebaseNotificator:
         if not await self._valid_recipient_data(recipient_data):
             raise PushNotificationEmptyDataMessage("Recipient data must have either title and body")
 
-        if not firebase_admin._apps:
-            await self.establish_conn_to_firebase()
+        [result] = await self.send_notifications([(recipient_id, recipient_data)])
+        if result.error is not None:
+            raise result.error
+        return result.message_id
 
+    async def send_multicast(self, recipient_ids: list[str], recipient_data: dict[str, str]) -> list[PushDeliveryResult]:
+        """
+        Sends the same notification on several devices, e.g. to all coach's customers
+        """
+        return await self.send_notifications([(recipient_id, recipient_data) for recipient_id in recipient_ids])
+
+    async def send_notifications(
+        self, notifications: list[tuple[str, dict[str, str]]]
+    ) -> list[PushDeliveryResult]:
+        """
+        Sends notifications with send_each in batches, batches are sent concurrently in push delivery pool
+
+        Args:
+            notifications: pairs of fcm token and message data
+
+        Returns:
+            results: delivery result for each notification in the same order
+        """
+        results: list[PushDeliveryResult | None] = [None] * len(notifications)
+        valid_indexes = []
+        for index, (recipient_id, recipient_data) in enumerate(notifications):
+            if await self._valid_recipient_data(recipient_data):
+                valid_indexes.append(index)
+            else:
+                error = PushDeliveryError("Recipient data must have either title and body", PushDeliveryStatus.FAILED)
+                results[index] = PushDeliveryResult(recipient_id, error.status, error=error)
+
+        batches = [
+            valid_indexes[offset:offset + self.batch_size] for offset in range(0, len(valid_indexes), self.batch_size)
+        ]
+        batch_results = await asyncio.gather(
+            *[self._send_batch([notifications[index] for index in batch]) for batch in batches]
+        )
+
+        for batch, batch_result in zip(batches, batch_results):
+            for index, result in zip(batch, batch_result):
+                results[index] = result
+
+        return results
+
+    async def _send_batch(self, notifications: list[tuple[str, dict[str, str]]]) -> list[PushDeliveryResult]:
+        messages = [self._build_message(recipient_id, recipient_data) for recipient_id, recipient_data in notifications]
+
+        try:
+            response = await push_delivery_pool.run(self._send_each, messages)
+        except Exception as exc:
+            # whole batch is failed e.g. FCM isn't reachable
+            logger.warning(f"Failed to send batch of {len(messages)} push notifications: {exc}")
+            status = self._classify_error(exc)
+            return [
+                PushDeliveryResult(recipient_id, status, error=PushDeliveryError(str(exc), status))
+                for recipient_id, _ in notifications
+            ]
+
+        results = []
+        for (recipient_id, _), send_response in zip(notifications, response.responses):
+            if send_response.success:
+                results.append(PushDeliveryResult(recipient_id, PushDeliveryStatus.SENT, message_id=send_response.message_id))
+            else:
+                status = self._classify_error(send_response.exception)
+                error = PushDeliveryError(str(send_response.exception), status)
+                results.append(PushDeliveryResult(recipient_id, status, error=error))
+        return results
+
+    def _send_each(self, messages: list[messaging.Message]) -> messaging.BatchResponse:
+        self.establish_conn_to_firebase()
+        return messaging.send_each(messages)
+
+    @staticmethod
+    def _build_message(recipient_id: str, recipient_data: dict[str, str]) -> messaging.Message:
         aps_data = messaging.Aps(
             alert=messaging.ApsAlert(title=recipient_data["title"], body=recipient_data["body"]),
             sound="default",
         )
 
-        message = messaging.Message(
+        return messaging.Message(
             token=recipient_id,
             apns=messaging.APNSConfig(payload=messaging.APNSPayload(aps_data)),
         )
 
-        # TODO: make it async
-        result = messaging.send(message)
-        return result
+    @staticmethod
+    def _classify_error(exc: Exception) -> PushDeliveryStatus:
+        if isinstance(exc, (messaging.UnregisteredError, messaging.SenderIdMismatchError)):
+            return PushDeliveryStatus.INVALID_TOKEN
+        if isinstance(exc, exceptions.InvalidArgumentError):
+            return PushDeliveryStatus.INVALID_TOKEN
+        if isinstance(exc, (messaging.ThirdPartyAuthError, exceptions.PermissionDeniedError)):
+            return PushDeliveryStatus.FAILED
+        return PushDeliveryStatus.RETRYABLE
 
     @staticmethod
     async def _valid_recipient_data(recipient_data: dict) -> bool:
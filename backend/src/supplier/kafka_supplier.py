@@ -1,5 +1,8 @@
 import os
+import asyncio
 import logging
+import time
+import threading
 from dataclasses import dataclass
 
 from confluent_kafka import Producer
@@ -12,27 +15,146 @@ logger = logging.getLogger(__name__)
 class KafkaSettings:
     customer_invite_topic: str = os.getenv("KAFKA_CUSTOMER_INVITE_TOPIC", "")
     bootstrap_servers: str = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "")
+    linger_ms: int = int(os.getenv("KAFKA_LINGER_MS", 20))
+    batch_num_messages: int = int(os.getenv("KAFKA_BATCH_NUM_MESSAGES", 1000))
+    poll_interval_seconds: float = float(os.getenv("KAFKA_POLL_INTERVAL_SECONDS", 0.5))
+    flush_timeout_seconds: float = float(os.getenv("KAFKA_FLUSH_TIMEOUT_SECONDS", 10))
+    # time to wait for free space in the full local queue before giving up
+    queue_full_timeout_seconds: float = float(os.getenv("KAFKA_QUEUE_FULL_TIMEOUT_SECONDS", 5))
+    # time to wait for the broker to acknowledge the message
+    delivery_timeout_seconds: float = float(os.getenv("KAFKA_DELIVERY_TIMEOUT_SECONDS", 30))
+
+    def producer_config(self) -> dict:
+        return {
+            "bootstrap.servers": self.bootstrap_servers,
+            "linger.ms": self.linger_ms,
+            "batch.num.messages": self.batch_num_messages,
+        }
+
+
+class KafkaDeliveryError(Exception):
+    pass
 
 
 class KafkaSupplier:
+    """
+    Wraps the single producer of the application process.
+    Delivery callbacks are served by background thread polling the producer.
+    """
 
-    def __init__(self, config, topic):
+    def __init__(
+        self, config, topic, poll_interval: float = 0.5, queue_full_timeout: float = 5, delivery_timeout: float = 30
+    ):
         self.producer = Producer(**config)
         self.topic = topic
+        self.poll_interval = poll_interval
+        self.queue_full_timeout = queue_full_timeout
+        self.delivery_timeout = delivery_timeout
+        self._stop_polling = threading.Event()
+        self._polling_thread: threading.Thread | None = None
 
     def acked(self, err, msg):
         if err is not None:
-            logger.warning(f"Failed to deliver message: {msg.value()}: {err}")
+            logger.warning(f"Failed to deliver message to {msg.topic()}: {err}")
         else:
-            logger.info(f"Message successfully sent in {msg.customer_invite_topic()} [{msg.partition()}]")
+            logger.info(f"Message successfully sent in {msg.topic()} [{msg.partition()}]")
+
+    def _delivery_callback(self, delivered: asyncio.Future):
+        """
+        Delivery report comes in the polling thread, it's passed to the waiting coroutine on the event loop
+        """
+        loop = delivered.get_loop()
+
+        def report(err):
+            if not delivered.done():
+                if err is not None:
+                    delivered.set_exception(KafkaDeliveryError(str(err)))
+                else:
+                    delivered.set_result(None)
+
+        def callback(err, msg):
+            self.acked(err, msg)
+            try:
+                loop.call_soon_threadsafe(report, err)
+            except RuntimeError:
+                # event loop is closed, nobody waits for the report
+                pass
+
+        return callback
+
+    def start(self):
+        if self._polling_thread is not None and self._polling_thread.is_alive():
+            return
+
+        self._stop_polling.clear()
+        self._polling_thread = threading.Thread(target=self._poll_loop, name="kafka-producer-poll", daemon=True)
+        self._polling_thread.start()
+
+    def _poll_loop(self):
+        while not self._stop_polling.is_set():
+            self.producer.poll(self.poll_interval)
 
-    def send_message(self, message):
-        self.producer.produce(self.topic, message.encode('utf-8'), callback=self.acked)
-        self.producer.poll(0)
-        logger.info(f"Message successfully sent in {self.topic}: {message}")
+    async def send_message(self, message):
+        """
+        Returns after the broker acknowledges the message
 
-    def close(self):
-        self.producer.flush()
+        Raises:
+            KafkaDeliveryError: in case if the broker rejected the message or didn't acknowledge it in time
+        """
+        delivered = asyncio.get_running_loop().create_future()
+        callback = self._delivery_callback(delivered)
+
+        deadline = time.monotonic() + self.queue_full_timeout
+        while True:
+            try:
+                self.producer.produce(self.topic, message.encode('utf-8'), callback=callback)
+                break
+            except BufferError:
+                if time.monotonic() >= deadline:
+                    raise
+                # local queue is full, the polling thread frees it while delivered messages are reported
+                await asyncio.sleep(self.poll_interval)
+
+        try:
+            await asyncio.wait_for(delivered, timeout=self.delivery_timeout)
+        except asyncio.TimeoutError:
+            raise KafkaDeliveryError(f"Message isn't acknowledged in {self.delivery_timeout} seconds")
+
+    def close(self, timeout: float = 10):
+        self._stop_polling.set()
+        if self._polling_thread is not None:
+            self._polling_thread.join()
+            self._polling_thread = None
+
+        not_delivered = self.producer.flush(timeout)
+        if not_delivered:
+            logger.warning(f"{not_delivered} messages weren't delivered to {self.topic} before shutdown")
 
 
 kafka_settings = KafkaSettings()
+
+_kafka_supplier: KafkaSupplier | None = None
+
+
+def get_kafka_supplier() -> KafkaSupplier:
+    """
+    Returns the process-wide supplier, creates it on first call
+    """
+    global _kafka_supplier
+    if _kafka_supplier is None:
+        _kafka_supplier = KafkaSupplier(
+            config=kafka_settings.producer_config(),
+            topic=kafka_settings.customer_invite_topic,
+            poll_interval=kafka_settings.poll_interval_seconds,
+            queue_full_timeout=kafka_settings.queue_full_timeout_seconds,
+            delivery_timeout=kafka_settings.delivery_timeout_seconds,
+        )
+        _kafka_supplier.start()
+    return _kafka_supplier
+
+
+def close_kafka_supplier() -> None:
+    global _kafka_supplier
+    if _kafka_supplier is not None:
+        _kafka_supplier.close(kafka_settings.flush_timeout_seconds)
+        _kafka_supplier = None
@@ -3,6 +3,7 @@ Move it to the UserService/CoachService/CustomerService
 """
 
 import random
+import re
 import string
 
 import uuid
@@ -19,8 +20,17 @@ from src.shared.config import (
     JWT_REFRESH_SECRET_KEY
 )
 from src.shared.exceptions import TokenExpired, NotValidCredentials
+from src.shared.executor import BlockingCallPool
+from src.shared.settings import AuthSettings
 
 password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+auth_settings = AuthSettings()
+
+
+# bcrypt is calculated outside the event loop
+password_hashing_pool = BlockingCallPool(
+    max_workers=auth_settings.password_hashing_workers, thread_name_prefix="password-hashing"
+)
 
 
 def validate_phone_number(phone_number: str):
@@ -44,6 +54,36 @@ async def validate_uuid(uuid_value: str):
         return False
 
 
+def normalize_search_text(text: str) -> str:
+    """
+    Folds case (Cyrillic included) and treats ё as е,
+    punctuation is replaced by spaces so only words are left
+
+    Args:
+        text: product name, vendor name or search query
+
+    Returns:
+        words separated by single space
+    """
+    folded = text.casefold().replace("ё", "е")
+    return " ".join(re.sub(r"[\W_]+", " ", folded).split())
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Checks If-None-Match header against the current entity tag, weak tags are compared by value
+
+    Args:
+        if_none_match: header value, list of tags or *
+        etag: quoted entity tag of the current representation
+    """
+    if not if_none_match:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in [tag.removeprefix("W/") for tag in tags]
+
+
 # to UserService
 async def get_hashed_password(password: str) -> str:
     """
@@ -55,7 +95,7 @@ async def get_hashed_password(password: str) -> str:
     Returns:
         hashed password
     """
-    return password_context.hash(password)
+    return await password_hashing_pool.run(password_context.hash, password)
 
 
 async def verify_password(password: str, hashed_password: str) -> bool:
@@ -73,18 +113,19 @@ async def verify_password(password: str, hashed_password: str) -> bool:
     if not is_identified:
         return False
 
-    is_verified = password_context.verify(password, hashed_password)
+    is_verified = await password_hashing_pool.run(password_context.verify, password, hashed_password)
     if is_verified:
         return True
     return False
 
 
-async def create_access_token(subject: str) -> str:
+async def create_access_token(subject: str, user_type: str | None = None) -> str:
     """
     Creates access token
 
     Args:
         subject: user's username
+        user_type: coach or customer, token without it is resolved by username only
 
     Returns:
         access token
@@ -92,6 +133,8 @@ async def create_access_token(subject: str) -> str:
     time_delta = timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES))
     expires_delta = datetime.utcnow() + time_delta
     to_encode = {"exp": expires_delta, "sub": str(subject)}
+    if user_type is not None:
+        to_encode["user_type"] = user_type
     encoded_jwt = jwt.encode(to_encode, str(JWT_SECRET_KEY), str(ALGORITHM))
     return encoded_jwt
 
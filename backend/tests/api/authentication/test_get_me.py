@@ -1,5 +1,6 @@
 import pytest
 
+from src.service.user_service import principal_cache
 from tests.conftest import make_test_http_request
 
 
@@ -31,3 +32,47 @@ async def test_customer_get_me(create_customer):
     assert response_json.get("user_type") == "customer"
     assert response_json.get("username") == create_customer.username
     assert response_json.get("first_name") == create_customer.first_name
+
+
+@pytest.mark.asyncio
+async def test_customer_get_me_with_user_type_in_token(create_customer):
+    """Tests that user type from token claims resolves customer"""
+
+    response = await make_test_http_request("/api/me", "get", create_customer.username, user_type="customer")
+    assert response.status_code == 200
+    assert response.json().get("user_type") == "customer"
+
+
+@pytest.mark.asyncio
+async def test_get_me_with_wrong_user_type_in_token(create_coach):
+    """Coach isn't looked up in customer table"""
+
+    response = await make_test_http_request("/api/me", "get", create_coach.username, user_type="customer")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_coach_get_me_uses_principal_cache(create_coach):
+    """Second request with typed token takes coach from cache"""
+
+    hits_before = principal_cache.hits
+    for _ in range(2):
+        response = await make_test_http_request("/api/me", "get", create_coach.username, user_type="coach")
+        assert response.status_code == 200
+
+    assert principal_cache.hits == hits_before + 1
+
+
+@pytest.mark.asyncio
+async def test_customer_is_not_taken_from_cache_after_coach_deletion(create_customer):
+    """Coach deletion drops cached customers of the coach"""
+
+    response = await make_test_http_request("/api/me", "get", create_customer.username, user_type="customer")
+    assert response.status_code == 200
+
+    response = await make_test_http_request("/api/profiles", "delete", create_customer.coach.username)
+    assert response.status_code == 204
+    assert ("customer", create_customer.username) not in principal_cache
+
+    response = await make_test_http_request("/api/me", "get", create_customer.username, user_type="customer")
+    assert response.status_code == 404
@@ -59,3 +59,34 @@ async def test_customer_login_by_otp_successfully(create_customer):
     assert response_json.get("first_name") is not None
     assert response_json.get("user_type") == "customer"
     assert response_json.get("password_changed") is False
+
+
+@pytest.mark.asyncio
+async def test_customer_login_by_otp_only_once(create_customer):
+    """One time password can't be used after successful login"""
+
+    login_data = {
+        "username": create_customer.username,
+        "password": create_customer.password,  # otp code
+        "fcm_token": "test token value",
+    }
+
+    response = await make_test_http_request("/api/login", "post", data=login_data)
+    assert response.status_code == 200
+
+    response = await make_test_http_request("/api/login", "post", data=login_data)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_customer_login_by_otp_of_another_phone_number(create_customer):
+    """One time password is accepted only with the phone number it's sent to"""
+
+    login_data = {
+        "username": "+79990000000",
+        "password": create_customer.password,  # otp code
+        "fcm_token": "test token value",
+    }
+
+    response = await make_test_http_request("/api/login", "post", data=login_data)
+    assert response.status_code == 404
@@ -19,3 +19,32 @@ async def test_get_all_exercises(create_coach, db):
         )
         # return only user's and default exercises
         assert exercise_in_db.scalar().coach_id in available_coach_ids
+
+
+@pytest.mark.asyncio
+async def test_get_exercises_since_version(create_coach, create_exercises, db):
+    """Check that only exercises created after the known library version are returned"""
+    response = await make_test_http_request(f"/api/exercises", "get", create_coach.username)
+    assert response.status_code == 200
+    assert len(response.json()) == len(create_exercises)
+    version = int(response.headers["X-Library-Version"])
+
+    response = await make_test_http_request(
+        f"/api/exercises?since_version={version}", "get", create_coach.username
+    )
+    assert response.status_code == 200
+    assert response.json() == []
+    assert int(response.headers["X-Library-Version"]) == version
+
+    exercise_data = {"name": "My custom exercise", "muscle_group_id": str(create_exercises[0].muscle_group_id)}
+    response = await make_test_http_request(f"/api/exercises", "post", create_coach.username, json=exercise_data)
+    assert response.status_code == 201
+    created_exercise_id = response.json()["id"]
+
+    # created exercise isn't hidden by the cached coach's exercises
+    response = await make_test_http_request(
+        f"/api/exercises?since_version={version}", "get", create_coach.username
+    )
+    assert response.status_code == 200
+    assert [exercise["id"] for exercise in response.json()] == [created_exercise_id]
+    assert int(response.headers["X-Library-Version"]) > version
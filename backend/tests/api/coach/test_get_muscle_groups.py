@@ -20,3 +20,18 @@ async def test_get_all_muscle_groups(create_coach, create_exercises, db):
     for item in response_json:
         assert item.get("id") is not None
         assert item.get("name") is not None
+
+
+@pytest.mark.asyncio
+async def test_get_muscle_groups_since_version(create_coach, create_exercises, db):
+    """Check that muscle groups aren't returned again for the known library version"""
+    response = await make_test_http_request(f"/api/muscle_groups", "get", create_coach.username)
+    assert response.status_code == 200
+    version = response.headers["X-Library-Version"]
+
+    response = await make_test_http_request(
+        f"/api/muscle_groups?since_version={version}", "get", create_coach.username
+    )
+    assert response.status_code == 200
+    assert response.json() == []
+    assert response.headers["X-Library-Version"] == version
@@ -1,11 +1,16 @@
+from datetime import datetime, timedelta
+
 import pytest
+from sqlalchemy import select
 
+from src import OutboxMessage, OutboxChannel
 from src.shared.config import TEST_CUSTOMER_FIRST_NAME, TEST_CUSTOMER_LAST_NAME
-from tests.conftest import make_test_http_request
+from src.shared.dependencies import provide_outbox_relay_service
+from tests.conftest import make_test_http_request, relay_outbox_messages
 
 
 @pytest.mark.asyncio
-async def test_create_customer_successfully_with_telegram_username(create_coach, mock_send_kafka_message):
+async def test_create_customer_successfully_with_telegram_username(create_coach, db, mock_send_kafka_message):
     customer_data = {
         "first_name": TEST_CUSTOMER_FIRST_NAME,
         "last_name": TEST_CUSTOMER_LAST_NAME,
@@ -15,12 +20,26 @@ async def test_create_customer_successfully_with_telegram_username(create_coach,
     response = await make_test_http_request("/api/customers", "post", create_coach.username, json=customer_data)
     assert response.status_code == 201
 
+    # invite is saved in outbox with the customer and sent to Kafka by relay
+    outbox_messages = await db.execute(
+        select(OutboxMessage).where(OutboxMessage.channel == OutboxChannel.TELEGRAM_CUSTOMER_INVITE.value)
+    )
+    invite = outbox_messages.scalar_one()
+    assert invite.payload["customer_username"] == customer_data["phone_number"]
+    mock_send_kafka_message.assert_not_called()
+
     # check that we sent event to Kafka to invite new customer in the application
+    assert await relay_outbox_messages(db) == 1
     mock_send_kafka_message.assert_called_once()
 
+    # customer password isn't kept in outbox after delivery
+    invite = (await db.execute(select(OutboxMessage).execution_options(populate_existing=True))).scalar_one()
+    assert invite.sent_at is not None
+    assert invite.payload == {}
+
 
 @pytest.mark.asyncio
-async def test_create_customer_successfully_without_telegram_username(create_coach, mock_send_kafka_message):
+async def test_create_customer_successfully_without_telegram_username(create_coach, db, mock_send_kafka_message):
     customer_data = {
         "first_name": TEST_CUSTOMER_FIRST_NAME,
         "last_name": TEST_CUSTOMER_LAST_NAME,
@@ -31,9 +50,55 @@ async def test_create_customer_successfully_without_telegram_username(create_coa
     assert response.status_code == 201
 
     # check that we didn't send event to Kafka to invite new customer in the application
+    assert await relay_outbox_messages(db) == 0
     mock_send_kafka_message.assert_not_called()
 
 
+@pytest.mark.asyncio
+async def test_create_customer_invite_is_retried_after_failure(create_coach, db, mock_send_kafka_message):
+    customer_data = {
+        "first_name": TEST_CUSTOMER_FIRST_NAME,
+        "last_name": TEST_CUSTOMER_LAST_NAME,
+        "phone_number": "@test_telegram_user",
+    }
+    mock_send_kafka_message.side_effect = BufferError("Local: Queue full")
+
+    response = await make_test_http_request("/api/customers", "post", create_coach.username, json=customer_data)
+    assert response.status_code == 201
+
+    # failed invite stays in outbox and is postponed for the next attempt
+    assert await relay_outbox_messages(db) == 1
+    invite = (await db.execute(select(OutboxMessage).execution_options(populate_existing=True))).scalar_one()
+    assert invite.attempts == 1
+    assert invite.sent_at is None
+    assert invite.failed_at is None
+    assert invite.last_error == "Local: Queue full"
+    assert await relay_outbox_messages(db) == 0
+
+
+@pytest.mark.asyncio
+async def test_sent_invites_are_purged_after_retention(create_coach, db, mock_send_kafka_message):
+    customer_data = {
+        "first_name": TEST_CUSTOMER_FIRST_NAME,
+        "last_name": TEST_CUSTOMER_LAST_NAME,
+        "phone_number": "@test_telegram_user",
+    }
+
+    response = await make_test_http_request("/api/customers", "post", create_coach.username, json=customer_data)
+    assert response.status_code == 201
+    assert await relay_outbox_messages(db) == 1
+
+    relay_service = await provide_outbox_relay_service()
+    assert await relay_service.purge_sent_messages(db) == 0
+
+    invite = (await db.execute(select(OutboxMessage))).scalar_one()
+    invite.sent_at = datetime.now() - timedelta(hours=relay_service.settings.sent_retention_hours + 1)
+    await db.commit()
+
+    assert await relay_service.purge_sent_messages(db) == 1
+    assert (await db.execute(select(OutboxMessage))).scalar_one_or_none() is None
+
+
 @pytest.mark.asyncio
 async def test_create_customer_it_already_exists(create_customer):
     customer_data = {
@@ -5,14 +5,14 @@ from sqlalchemy import select, delete
 from sqlalchemy.orm import selectinload
 
 from src import TrainingPlan, MuscleGroup, ExercisesOnTraining
-from tests.conftest import make_test_http_request
+from tests.conftest import make_test_http_request, relay_outbox_messages
 
 
 @pytest.mark.asyncio
 async def test_create_training_plan_successfully(
     create_customer,
     db,
-    mock_send_push_notification,
+    mock_send_push_notifications,
 ):
     muscle_groups = await db.execute(
         select(MuscleGroup).options(selectinload(MuscleGroup.exercises))
@@ -68,20 +68,55 @@ async def test_create_training_plan_successfully(
     expected_calories = (d["proteins"] * 4) + (d["fats"] * 9) + (d["carbs"] * 4)
     assert response["calories"] == str(expected_calories)
 
+    # notification is saved in outbox with training plan and sent by relay
+    mock_send_push_notifications.assert_not_called()
+    assert await relay_outbox_messages(db) == 1
+
     # check that we called firebase notification service with correct args
-    assert create_customer.fcm_token in mock_send_push_notification.call_args.args
     excepted_push_notification_sent_data = {
         "title": "Создан новый тренировочный план",
         "body": f"с {training_plan_data['start_date']} до {training_plan_data['end_date']}",
     }
-    assert excepted_push_notification_sent_data in mock_send_push_notification.call_args.args
+    sent_notifications = mock_send_push_notifications.call_args.args[0]
+    assert sent_notifications == [(create_customer.fcm_token, excepted_push_notification_sent_data)]
+
 
 
+@pytest.mark.asyncio
+async def test_create_training_plan_is_atomic(create_customer, db, mock_send_push_notifications):
+    customer_id = create_customer.id
+    training_plan_data = {
+        "start_date": date.today().strftime('%Y-%m-%d'),
+        "end_date": (date.today() + timedelta(days=7)).strftime('%Y-%m-%d'),
+        "diets": [{"proteins": 200, "fats": 100, "carbs": 400}],
+        "trainings": [
+            {
+                "name": "Unknown exercise",
+                "exercises": [dict(id="00000000-0000-0000-0000-000000000000", sets=[12], supersets=[])],
+            }
+        ],
+        "set_rest": 60,
+        "exercise_rest": 120,
+    }
+
+    response = await make_test_http_request(
+        url=f"/api/customers/{customer_id}/training_plans",
+        method="post",
+        username=create_customer.coach.username,
+        json=training_plan_data
+    )
+
+    assert response.status_code == 500
+
+    # plan and its diets aren't saved when its trainings fail
+    training_plans = await db.execute(select(TrainingPlan).where(TrainingPlan.customer_id == customer_id))
+    assert training_plans.scalars().all() == []
+
 @pytest.mark.asyncio
 async def test_create_training_plan_with_supersets_successfully(
     create_customer,
     db,
-    mock_send_push_notification,
+    mock_send_push_notifications,
 ):
     muscle_groups = await db.execute(
         select(MuscleGroup).options(selectinload(MuscleGroup.exercises))
@@ -142,13 +177,17 @@ async def test_create_training_plan_with_supersets_successfully(
 
     assert response.status_code == 201
 
+    # notification is saved in outbox with training plan and sent by relay
+    mock_send_push_notifications.assert_not_called()
+    assert await relay_outbox_messages(db) == 1
+
     # check that we called firebase notification service with correct args
-    assert create_customer.fcm_token in mock_send_push_notification.call_args.args
     excepted_push_notification_sent_data = {
         "title": "Создан новый тренировочный план",
         "body": f"с {training_plan_data['start_date']} до {training_plan_data['end_date']}",
     }
-    assert excepted_push_notification_sent_data in mock_send_push_notification.call_args.args
+    sent_notifications = mock_send_push_notifications.call_args.args[0]
+    assert sent_notifications == [(create_customer.fcm_token, excepted_push_notification_sent_data)]
 
     superset_exercises_ids = (
         first_exercise_id_in_superset,
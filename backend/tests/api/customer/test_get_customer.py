@@ -1,3 +1,5 @@
+from datetime import date, timedelta
+
 import pytest
 
 from sqlalchemy import delete
@@ -38,6 +40,8 @@ async def test_get_customers(create_coach, db, mock_send_kafka_message):
 
     response = await make_test_http_request("/api/customers", "get", user_username)
     assert response.status_code == 200
+    assert {customer["id"] for customer in response.json()} == set(ids)
+    assert "X-Next-Cursor" not in response.headers
 
     await db.execute(
         delete(Customer).where(Customer.id.in_(ids))
@@ -45,6 +49,66 @@ async def test_get_customers(create_coach, db, mock_send_kafka_message):
     await db.commit()
 
 
+@pytest.mark.asyncio
+async def test_get_customers_page_by_page(create_coach, db, mock_send_kafka_message, mock_send_push_notifications):
+    """
+    Archived customers go after active ones, pages don't overlap
+    """
+    customers_data = [
+        ("Архивный", "Клиент", date.today() - timedelta(days=40)),
+        ("Активный", "Клиент", date.today() + timedelta(days=3)),
+        ("Новый", "Клиент", None),
+    ]
+    ids = {}
+    for first_name, last_name, plan_end_date in customers_data:
+        response = await make_test_http_request(
+            "/api/customers", "post", create_coach.username, json={"first_name": first_name, "last_name": last_name},
+        )
+        assert response.status_code == 201
+        ids[first_name] = response.json()["id"]
+        if plan_end_date is not None:
+            response = await make_test_http_request(
+                f"/api/customers/{ids[first_name]}/training_plans",
+                "post",
+                create_coach.username,
+                json={
+                    "start_date": str(plan_end_date - timedelta(days=7)),
+                    "end_date": str(plan_end_date),
+                    "diets": [],
+                    "trainings": [],
+                    "set_rest": 60,
+                    "exercise_rest": 120,
+                },
+            )
+            assert response.status_code == 201
+
+    pages = []
+    cursor = None
+    while True:
+        url = "/api/customers?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        response = await make_test_http_request(url, "get", create_coach.username)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [2, 1]
+    customers = [customer for page in pages for customer in page]
+    assert [customer["id"] for customer in customers] == [ids["Новый"], ids["Активный"], ids["Архивный"]]
+    assert [customer["is_archived"] for customer in customers] == [False, False, True]
+
+    response = await make_test_http_request("/api/customers?search=архив", "get", create_coach.username)
+    assert [customer["id"] for customer in response.json()] == [ids["Архивный"]]
+
+    response = await make_test_http_request("/api/customers?cursor=not-valid", "get", create_coach.username)
+    assert response.status_code == 400
+
+    # the latest plan end date is kept on customer
+    response = await make_test_http_request(f"/api/customers/{ids['Активный']}", "get", create_coach.username)
+    assert response.json()["last_plan_end_date"] == str(date.today() + timedelta(days=3))
+
+
 @pytest.mark.asyncio
 async def test_get_specific_customer(create_customer, db):
     """
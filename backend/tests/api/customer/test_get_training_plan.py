@@ -1,7 +1,8 @@
 import pytest
 from datetime import datetime
+from unittest.mock import patch
 
-from sqlalchemy import delete
+from sqlalchemy import delete, update
 
 from src import TrainingPlan
 from tests.conftest import make_test_http_request
@@ -26,6 +27,7 @@ async def test_get_all_training_plans(
 
     response_data = response.json()
     assert len(create_training_plans) == len(response_data)
+    assert "X-Next-Offset" not in response.headers
 
     # check descending dates
     first_date_end = datetime.strptime(response_data[0]["end_date"], "%Y-%m-%d").date()
@@ -33,6 +35,33 @@ async def test_get_all_training_plans(
     assert first_date_end > last_date_end
 
 
+
+@pytest.mark.asyncio
+async def test_get_training_plans_page(create_customer, create_trainings, create_diets, db):
+    """
+    Checks plan aggregates and pagination
+    """
+    url = f"/api/customers/{create_customer.id}/training_plans"
+    response = await make_test_http_request(f"{url}?limit=1", "get", create_customer.coach.username)
+    assert response.status_code == 200
+
+    # the latest plan doesn't have trainings
+    latest_plan = response.json()
+    assert len(latest_plan) == 1
+    assert response.headers["X-Next-Offset"] == "1"
+    assert latest_plan[0]["number_of_trainings"] == 0
+    assert latest_plan[0]["proteins"] == "200"
+    assert latest_plan[0]["calories"] == "2500"
+
+    response = await make_test_http_request(f"{url}?limit=1&offset=1", "get", create_customer.coach.username)
+    assert response.status_code == 200
+
+    previous_plan = response.json()
+    assert "X-Next-Offset" not in response.headers
+    assert previous_plan[0]["id"] == str(create_trainings[0].training_plan_id)
+    assert previous_plan[0]["number_of_trainings"] == len(create_trainings)
+    assert previous_plan[0]["carbs"] == "300"
+
 @pytest.mark.asyncio
 async def test_get_specified_training_plan(
     create_customer,
@@ -84,3 +113,113 @@ async def test_get_training_plan_with_supersets(
 
     # exercises have the same superset_id
     assert len(superset_ids_set) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_training_plan_with_exercise_in_several_trainings(
+    create_customer,
+    create_exercises,
+    db,
+    mock_send_push_notifications,
+):
+    """
+    Each training keeps its own sets of the exercise used in both trainings
+    """
+    exercise_id, other_exercise_id = str(create_exercises[0].id), str(create_exercises[1].id)
+    training_plan_data = {
+        "start_date": "2026-01-01",
+        "end_date": "2026-01-07",
+        "diets": [{"proteins": 200, "fats": 100, "carbs": 400}, {"proteins": 150, "fats": 80, "carbs": 300}],
+        "trainings": [
+            {
+                "name": "Первая",
+                "exercises": [
+                    dict(id=other_exercise_id, sets=[8, 8], supersets=[]),
+                    dict(id=exercise_id, sets=[12, 12, 12], supersets=[]),
+                ],
+            },
+            {"name": "Вторая", "exercises": [dict(id=exercise_id, sets=[5, 5], supersets=[])]},
+        ],
+        "set_rest": 60,
+        "exercise_rest": 120,
+    }
+    response = await make_test_http_request(
+        url=f"/api/customers/{create_customer.id}/training_plans",
+        method="post",
+        username=create_customer.coach.username,
+        json=training_plan_data,
+    )
+    assert response.status_code == 201
+
+    response = await make_test_http_request(
+        url=f"/api/customers/{create_customer.id}/training_plans/{response.json()['id']}",
+        method="get",
+        username=create_customer.coach.username,
+    )
+    assert response.status_code == 200
+
+    response_json = response.json()
+    assert sorted(response_json["proteins"].split("/")) == ["150", "200"]
+
+    trainings = {training["name"]: training for training in response_json["trainings"]}
+    assert [exercise["sets"] for exercise in trainings["Первая"]["exercises"]] == [[8, 8], [12, 12, 12]]
+    assert [exercise["sets"] for exercise in trainings["Вторая"]["exercises"]] == [[5, 5]]
+    assert trainings["Первая"]["number_of_exercises"] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_not_existing_training_plan(create_customer, db):
+    response = await make_test_http_request(
+        url=f"/api/customers/{create_customer.id}/training_plans/00000000-0000-0000-0000-000000000000",
+        method="get",
+        username=create_customer.coach.username,
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_not_modified_training_plan(
+    create_customer,
+    create_training_exercises,
+    create_trainings,
+    create_diets,
+    db,
+):
+    """
+    Saved plan is revalidated with ETag without loading its details from database
+    """
+    url = f"/api/customers/{create_customer.id}/training_plans/{create_trainings[0].training_plan_id}"
+    response = await make_test_http_request(url=url, method="get", username=create_customer.coach.username)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["last-modified"]
+
+    with patch(
+        "src.repository.training_plan_repository.TrainingPlanRepository.provide_training_plan_detail_by_id"
+    ) as mock_provide_training_plan, patch(
+        "src.repository.customer_repository.CustomerRepository.provide_by_pk"
+    ) as mock_provide_customer:
+        response = await make_test_http_request(
+            url=url, method="get", username=create_customer.coach.username, headers={"If-None-Match": etag},
+        )
+        mock_provide_training_plan.assert_not_called()
+        mock_provide_customer.assert_not_called()
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    # changed plan is loaded again and gets a new tag
+    await db.execute(
+        update(TrainingPlan)
+        .where(TrainingPlan.id == create_trainings[0].training_plan_id)
+        .values(notes="Новые заметки", modified=datetime.now())
+    )
+    await db.commit()
+
+    response = await make_test_http_request(
+        url=url, method="get", username=create_customer.coach.username, headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.json()["notes"] == "Новые заметки"
+    assert response.headers["etag"] != etag
@@ -2,7 +2,9 @@ from datetime import timedelta
 
 import pytest
 from unittest.mock import patch
+from sqlalchemy import func, select
 
+from src import DietDays
 from src.schemas.product_dto import ProductDtoSchema
 from tests.conftest import make_test_http_request
 
@@ -31,15 +33,22 @@ async def test_get_customer_daily_diet(create_diets):
     assert "dinner" in meals
     assert "snacks" in meals
 
+    # only the requested day is returned, other logged days of the plan aren't mixed in
+    requested_day = next(day for day in create_diets[0].diet_days if day.date == specific_day)
+    assert meals["breakfast"]["total_calories"] == requested_day.breakfast_calories
+    assert len(meals["breakfast"]["products"]) == len(
+        [entry for entry in requested_day.entries if entry.meal_type == "breakfast"]
+    )
+
 
 @pytest.mark.asyncio
 @patch("src.repository.product_repository.ProductRepository.get_products_by_barcodes")
 async def test_add_product_to_diet(mock_insert_product, create_diets):
     updating_daily_diet = create_diets[0].diet_days[0]
-    prev_consumed_calories = updating_daily_diet.breakfast["total_calories"]
-    prev_consumed_proteins = updating_daily_diet.breakfast["total_proteins"]
-    prev_consumed_fats = updating_daily_diet.breakfast["total_fats"]
-    prev_consumed_carbs = updating_daily_diet.breakfast["total_carbs"]
+    prev_consumed_calories = updating_daily_diet.breakfast_calories
+    prev_consumed_proteins = updating_daily_diet.breakfast_proteins
+    prev_consumed_fats = updating_daily_diet.breakfast_fats
+    prev_consumed_carbs = updating_daily_diet.breakfast_carbs
 
     daily_diet_id = str(create_diets[0].diet_days[0].id)
     customer_username = create_diets[0].training_plans.customer.username
@@ -102,3 +111,158 @@ async def test_add_product_to_diet(mock_insert_product, create_diets):
     assert prev_consumed_proteins + added_proteins == response_json["actual_nutrition"][updating_meal]["total_proteins"]
     assert prev_consumed_fats + added_fats == response_json["actual_nutrition"][updating_meal]["total_fats"]
     assert prev_consumed_carbs + added_carbs == response_json["actual_nutrition"][updating_meal]["total_carbs"]
+
+
+@pytest.mark.asyncio
+@patch("src.repository.product_repository.ProductRepository.get_products_by_barcodes")
+async def test_add_products_to_diet_meal_one_by_one(mock_get_products_by_barcodes, create_diets):
+    daily_diet = create_diets[0].diet_days[0]
+    customer = create_diets[0].training_plans.customer
+    prev_products_number = len([entry for entry in daily_diet.entries if entry.meal_type == "lunch"])
+    prev_consumed_calories = daily_diet.lunch_calories
+
+    products = [
+        ProductDtoSchema(
+            name=f"Продукт {barcode}",
+            barcode=barcode,
+            type="gram",
+            proteins=10,
+            fats=10,
+            carbs=10,
+            calories=170,
+            vendor_name="Простаквашино",
+            user_id=str(customer.id),
+        )
+        for barcode in ("111111111", "222222222")
+    ]
+
+    for product in products:
+        mock_get_products_by_barcodes.return_value = [product]
+        response = await make_test_http_request(
+            url=f"api/nutrition/diets",
+            method="post",
+            json={
+                "daily_diet_id": str(daily_diet.id),
+                "meal_type": "lunch",
+                "product_data": [{"barcode": product.barcode, "amount": 200}],
+            },
+            username=customer.username,
+        )
+        assert response.status_code == 201
+
+    # the second product is appended to the meal, it doesn't replace the first one
+    lunch = response.json()["actual_nutrition"]["lunch"]
+    assert [product["barcode"] for product in lunch["products"]][prev_products_number:] == ["111111111", "222222222"]
+    assert lunch["total_calories"] == prev_consumed_calories + 2 * 170 * 2
+
+
+@pytest.mark.asyncio
+async def test_get_customer_diet_range(create_diets):
+    training_plan = create_diets[0].training_plans
+    customer_username = training_plan.customer.username
+    logged_days = sorted(create_diets[0].diet_days, key=lambda day: day.date)
+
+    response = await make_test_http_request(
+        url=f"api/nutrition/diets?from={training_plan.start_date}&to={training_plan.end_date}",
+        method="get",
+        username=customer_username,
+    )
+
+    assert response.status_code == 200
+    response = response.json()
+    # days without logged products aren't returned
+    assert [day["date"] for day in response["days"]] == [str(day.date) for day in logged_days]
+    assert response["next_from"] is None
+
+    first_day = response["days"][0]
+    assert first_day["id"] == str(logged_days[0].id)
+    assert first_day["total_calories"] == create_diets[0].total_calories
+    assert first_day["consumed_calories"] == int(
+        sum(getattr(logged_days[0], f"{meal}_calories") for meal in ("breakfast", "lunch", "dinner", "snacks"))
+    )
+
+    response = await make_test_http_request(
+        url=f"api/nutrition/diets?from={training_plan.start_date}&to={training_plan.end_date}&limit=1",
+        method="get",
+        username=customer_username,
+    )
+
+    assert response.status_code == 200
+    response = response.json()
+    assert [day["date"] for day in response["days"]] == [str(logged_days[0].date)]
+    assert response["next_from"] == str(logged_days[1].date)
+
+    response = await make_test_http_request(
+        url=f"api/nutrition/diets?from={training_plan.end_date}&to={training_plan.start_date}",
+        method="get",
+        username=customer_username,
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@patch("src.repository.product_repository.ProductRepository.get_products_by_barcodes")
+async def test_diet_day_is_created_with_first_products(mock_get_products_by_barcodes, create_diets, db):
+    diet = create_diets[0]
+    customer = diet.training_plans.customer
+    specific_day = diet.training_plans.start_date + timedelta(days=3)
+
+    async def count_diet_days() -> int:
+        result = await db.execute(
+            select(func.count()).select_from(DietDays).where(
+                DietDays.diet_id == diet.id, DietDays.date == specific_day
+            )
+        )
+        return result.scalar_one()
+
+    response = await make_test_http_request(
+        url=f"api/nutrition/diets/{specific_day}",
+        method="get",
+        username=customer.username,
+    )
+
+    # viewing the day doesn't save it
+    assert response.status_code == 200
+    assert response.json()["id"] is None
+    assert response.json()["actual_nutrition"]["daily_total"]["total_calories"] == diet.total_calories
+    # meals of the day have the same shape as logged ones
+    assert response.json()["actual_nutrition"]["breakfast"] == {
+        "total_calories": 0, "total_proteins": 0, "total_fats": 0, "total_carbs": 0, "products": [],
+    }
+    assert await count_diet_days() == 0
+
+    product = ProductDtoSchema(
+        name="Творог",
+        barcode="333333333",
+        type="gram",
+        proteins=18,
+        fats=5,
+        carbs=3,
+        calories=121,
+        vendor_name="Простаквашино",
+        user_id=str(customer.id),
+    )
+    mock_get_products_by_barcodes.return_value = [product]
+
+    daily_diet_ids = set()
+    for _ in range(2):
+        response = await make_test_http_request(
+            url=f"api/nutrition/diets",
+            method="post",
+            json={
+                "specific_day": str(specific_day),
+                "meal_type": "snacks",
+                "product_data": [{"barcode": product.barcode, "amount": 100}],
+            },
+            username=customer.username,
+        )
+        assert response.status_code == 201
+        daily_diet_ids.add(response.json()["id"])
+
+    # the second request adds products to the day created by the first one
+    assert len(daily_diet_ids) == 1
+    assert await count_diet_days() == 1
+    snacks = response.json()["actual_nutrition"]["snacks"]
+    assert [item["barcode"] for item in snacks["products"]] == [product.barcode, product.barcode]
+    assert snacks["total_calories"] == 2 * product.calories
@@ -1,7 +1,9 @@
 import pytest
 from unittest.mock import patch
 
+from src.repository.product_storage import get_product_storage
 from src.schemas.product_dto import ProductDtoSchema
+from src.shared.dependencies import provide_product_service
 from src.service.calories_calculator_service import CaloriesCalculatorService
 from tests.conftest import make_test_http_request
 
@@ -78,6 +80,45 @@ async def test_create_product(mock_get_product_by_barcode, mock_insert_product,
     assert response_json.get("name") is not None
 
 
+@pytest.mark.asyncio
+async def test_create_product_and_get_it_by_barcode(create_customer):
+    product_data = {
+        "name": "Кефир 1%",
+        "barcode": "4607025390015",
+        "type": "milliliter",
+        "proteins": 3,
+        "fats": 1,
+        "carbs": 4,
+        "vendor_name": "Простоквашино",
+    }
+
+    response = await make_test_http_request(
+        url="api/nutrition/products",
+        method="post",
+        username=create_customer.username,
+        json=product_data,
+    )
+    assert response.status_code == 201
+
+    response = await make_test_http_request(
+        url=f"api/nutrition/products/{product_data['barcode']}",
+        method="get",
+        username=create_customer.username,
+    )
+    assert response.status_code == 200
+    assert response.json()["name"] == product_data["name"]
+    assert response.json()["user_id"] == str(create_customer.id)
+
+    # the same barcode can't be added twice
+    response = await make_test_http_request(
+        url="api/nutrition/products",
+        method="post",
+        username=create_customer.username,
+        json=product_data,
+    )
+    assert response.status_code == 409
+
+
 @pytest.mark.asyncio
 @patch("src.repository.product_repository.ProductRepository.lookup_products")
 async def test_search_product(mock_lookup_products, create_customer):
@@ -125,3 +166,103 @@ async def test_search_product(mock_lookup_products, create_customer):
     for item in response_json:
         for field in fields:
             assert field in item
+
+
+@pytest.mark.asyncio
+async def test_search_product_by_word_prefix(create_customer, db):
+    products = [
+        {"name": "Творог 5%", "barcode": "4600000000001", "vendor_name": "Простоквашино"},
+        {"name": "Сырок творожный", "barcode": "4600000000002", "vendor_name": "Б.Ю. Александров"},
+        {"name": "Йогурт", "barcode": "4600000000003", "vendor_name": "Творожная фабрика"},
+        {"name": "Ёжики в тумане", "barcode": "4600000000004", "vendor_name": "Мираторг"},
+    ]
+    for product in products:
+        product_data = {**product, "type": "gram", "proteins": 10, "fats": 5, "carbs": 3}
+        response = await make_test_http_request(
+            url="api/nutrition/products", method="post", username=create_customer.username, json=product_data,
+        )
+        assert response.status_code == 201
+
+    response = await make_test_http_request(
+        url="api/nutrition/products/lookup/ТВОРО", method="get", username=create_customer.username,
+    )
+    assert response.status_code == 200
+    # name starting with query goes first, then name matches, then vendor matches
+    assert [product["barcode"] for product in response.json()] == ["4600000000001", "4600000000002", "4600000000003"]
+
+    response = await make_test_http_request(
+        url="api/nutrition/products/lookup/творо?limit=1&offset=1", method="get", username=create_customer.username,
+    )
+    assert [product["barcode"] for product in response.json()] == ["4600000000002"]
+
+    response = await make_test_http_request(
+        url="api/nutrition/products/lookup/ежики тум", method="get", username=create_customer.username,
+    )
+    assert [product["barcode"] for product in response.json()] == ["4600000000004"]
+
+
+@pytest.mark.asyncio
+async def test_search_product_after_backfill(create_customer, db):
+    # products created before the search index are only in the storage
+    storage = get_product_storage()
+    for index, name in enumerate(["Кефир 1%", "Кефир 3.2%", "Ряженка"]):
+        await storage.save(
+            ProductDtoSchema(
+                barcode=f"460000000002{index}", name=name, type="milliliter", proteins=3, fats=1, carbs=4,
+                calories=40, vendor_name="Простоквашино", user_id=str(create_customer.id),
+            )
+        )
+
+    response = await make_test_http_request(
+        url="api/nutrition/products/lookup/кефир", method="get", username=create_customer.username,
+    )
+    assert response.json() == []
+
+    product_service = await provide_product_service()
+    assert await product_service.backfill_search_index(db, batch_size=2) == 3
+    # indexed products are skipped
+    assert await product_service.backfill_search_index(db, batch_size=2) == 0
+
+    response = await make_test_http_request(
+        url="api/nutrition/products/lookup/кефир", method="get", username=create_customer.username,
+    )
+    assert [product["barcode"] for product in response.json()] == ["4600000000020", "4600000000021"]
+
+
+@pytest.mark.asyncio
+async def test_get_product_is_cached(create_customer):
+    product_data = {
+        "name": "Молоко 2.5%",
+        "barcode": "4600000000010",
+        "type": "milliliter",
+        "proteins": 3,
+        "fats": 2,
+        "carbs": 5,
+        "vendor_name": "Домик в деревне",
+    }
+    response = await make_test_http_request(
+        url="api/nutrition/products", method="post", username=create_customer.username, json=product_data,
+    )
+    assert response.status_code == 201
+
+    with patch("src.repository.product_repository.ProductRepository.get_product_by_barcode") as mock_get_product:
+        mock_get_product.return_value = None
+
+        # created product is cached, storage isn't requested
+        response = await make_test_http_request(
+            url=f"api/nutrition/products/{product_data['barcode']}",
+            method="get",
+            username=create_customer.username,
+        )
+        assert response.status_code == 200
+        mock_get_product.assert_not_called()
+
+        # missing barcode is cached too
+        for _ in range(2):
+            response = await make_test_http_request(
+                url="api/nutrition/products/4600000000011",
+                method="get",
+                username=create_customer.username,
+            )
+            assert response.status_code == 404
+        mock_get_product.assert_called_once()
@@ -3,6 +3,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src import engine
+from src.shared.dependencies import provide_outbox_relay_service
 from src.utils import create_access_token
 from tests.fixtures import *
 from tests.mocks import *
@@ -12,12 +13,25 @@ TestingSessionLocal = sessionmaker(
 )
 
 
+async def relay_outbox_messages(uow: AsyncSession) -> int:
+    """
+    Delivers messages saved in outbox the same way as background relay does
+
+    Args:
+        uow: db session the tested request was served with
+    """
+    relay_service = await provide_outbox_relay_service()
+    return await relay_service.relay_batch(uow)
+
+
 async def make_test_http_request(
     url: str,
     method: str,
     username: str | None = None,
     data: dict | None = None,
     json: dict | None = None,
+    user_type: str | None = None,
+    headers: dict | None = None,
 ) -> Response:
     """
     Make tests http request to server,
@@ -29,11 +43,13 @@ async def make_test_http_request(
         username: authed user who makes http request
         data: data sent to server
         json: data to signup
+        user_type: user type claim put in the auth token
+        headers: additional request headers
     """
-    headers = None
+    headers = dict(headers) if headers else None
     if username:
-        auth_token = await create_access_token(username)
-        headers = dict()
+        auth_token = await create_access_token(username, user_type)
+        headers = headers or dict()
         headers["Authorization"] = f"Bearer {auth_token}"
 
     async with AsyncClient(app=app, base_url="http://as-coach") as ac:
@@ -43,6 +59,8 @@ async def make_test_http_request(
             case "post":
                 kwargs = {"headers": headers, "data": data, "json": json}
                 response = await ac.post(url, **{key: val for key, val in kwargs.items() if val})
+            case "delete":
+                response = await ac.delete(url, headers=headers)
             case _:
                 raise ValueError("Unexpected method")
 
@@ -1,6 +1,6 @@
 import os
 import uuid
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 
 import pytest_asyncio
 from sqlalchemy import select
@@ -17,10 +17,17 @@ from src import (
     Exercise,
     Coach,
     Customer,
+    CustomerOneTimePassword,
     Diet,
     DietDays,
+    DietDayEntry,
 )
 from src.utils import generate_random_password, get_hashed_password
+from src.service.user_service import principal_cache
+from src.service.product_service import product_cache
+from src.service.training_plan_service import training_plan_cache
+from src.service.library_service import custom_exercise_cache, reset_library_snapshot
+from src.repository.product_storage import get_product_storage, InMemoryProductStorage
 from tests.conftest import TestingSessionLocal
 from src.shared.config import (
     TEST_CUSTOMER_FIRST_NAME,
@@ -57,6 +64,33 @@ async def create_training_exercises(create_trainings, create_exercises, db):
     return training_exercises
 
 
+def build_diet_day(date: date, diet: Diet, **meals: dict) -> DietDays:
+    """
+    Makes diet day with entries from meals described the way API returns them
+    """
+    diet_day = DietDays(date=date, diet=diet)
+    for meal_type, meal in meals.items():
+        for nutrient in ("calories", "proteins", "fats", "carbs"):
+            setattr(diet_day, f"{meal_type}_{nutrient}", meal.get(f"total_{nutrient}", 0))
+        for product in meal.get("products", []):
+            diet_day.entries.append(
+                DietDayEntry(
+                    meal_type=meal_type,
+                    barcode=product["barcode"],
+                    name=product["name"],
+                    type=product["type"],
+                    vendor_name=product["vendor_name"],
+                    portion_size=product.get("portion_size"),
+                    amount=product["amount"],
+                    calories=product["calories"],
+                    proteins=product["proteins"],
+                    fats=product["fats"],
+                    carbs=product["carbs"],
+                )
+            )
+    return diet_day
+
+
 @pytest_asyncio.fixture()
 async def create_diets(create_training_plans, db):
     diets_list = [
@@ -79,7 +113,7 @@ async def create_diets(create_training_plans, db):
     db.add_all(diets_list)
 
     diet_days_list = [
-        DietDays(
+        build_diet_day(
             date=create_training_plans[0].start_date + timedelta(days=2),
             diet=diets_list[0],
             breakfast={
@@ -255,7 +289,7 @@ async def create_diets(create_training_plans, db):
                 ],
             },
         ),
-        DietDays(
+        build_diet_day(
             date=create_training_plans[0].start_date + timedelta(days=4),
             diet=diets_list[0],
             breakfast={
@@ -399,7 +433,7 @@ async def create_diets(create_training_plans, db):
 
     await db.commit()
 
-    result = await db.execute(select(Diet).options(selectinload(Diet.diet_days)))
+    result = await db.execute(select(Diet).options(selectinload(Diet.diet_days).selectinload(DietDays.entries)))
     diets = result.scalars().all()
     return diets
 
@@ -499,10 +533,17 @@ async def create_customer(create_coach, db) -> Customer:
         first_name=TEST_CUSTOMER_FIRST_NAME,
         last_name=TEST_CUSTOMER_LAST_NAME,
         password=generate_random_password(OTP_LENGTH),
+        fcm_token="test customer token value",
         coach=create_coach
     )
+    test_customer_otp = CustomerOneTimePassword(
+        otp=test_customer.password,
+        username=test_customer.username,
+        expires_at=datetime.now() + timedelta(days=1),
+        customer=test_customer,
+    )
 
-    db.add(test_customer)
+    db.add_all([test_customer, test_customer_otp])
     await db.commit()
 
     query = select(
@@ -532,6 +573,48 @@ async def create_coach(db) -> Coach:
     return test_coach
 
 
+@pytest_asyncio.fixture(autouse=True)
+async def clear_principal_cache():
+    # every test creates users with the same usernames but new ids
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_product_storage():
+    product_storage = get_product_storage()
+    if isinstance(product_storage, InMemoryProductStorage):
+        product_storage.clear()
+    yield
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_product_cache():
+    # mocked repositories return different products for the same barcodes
+    product_cache.clear()
+    yield
+    product_cache.clear()
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_training_plan_cache():
+    # plans of the previous test are rolled back
+    training_plan_cache.clear()
+    yield
+    training_plan_cache.clear()
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_exercise_library():
+    # library of the previous test is rolled back
+    reset_library_snapshot()
+    custom_exercise_cache.clear()
+    yield
+    reset_library_snapshot()
+    custom_exercise_cache.clear()
+
+
 @pytest_asyncio.fixture()
 async def db_engine():
     engine = create_async_engine(os.environ.get("TEST_DATABASE_URL"))
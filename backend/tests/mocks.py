@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import patch
 
+from src.supplier.firebase_supplier import PushDeliveryResult, PushDeliveryStatus
+
 
 @pytest.fixture
 def mock_send_kafka_message():
@@ -9,6 +11,14 @@ def mock_send_kafka_message():
 
 
 @pytest.fixture
-def mock_send_push_notification():
-    with patch("src.service.notification_service.NotificationService.send_push_notification") as mock:
+def mock_send_push_notifications():
+    async def send_notifications(notifications):
+        return [
+            PushDeliveryResult(recipient_id, PushDeliveryStatus.SENT, message_id="projects/ascoach/messages/test")
+            for recipient_id, _ in notifications
+        ]
+
+    with patch(
+        "src.supplier.firebase_supplier.PushFirebaseNotificator.send_notifications", side_effect=send_notifications
+    ) as mock:
         yield mock
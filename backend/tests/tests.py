@@ -1,7 +1,17 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import firebase_admin
 import pytest
+from confluent_kafka import KafkaError
+from firebase_admin import messaging
 from httpx import AsyncClient
 
 from src.main import app
+from src.supplier.firebase_supplier import PushFirebaseNotificator, PushDeliveryStatus
+from src.supplier.kafka_supplier import get_kafka_supplier, close_kafka_supplier, KafkaDeliveryError
 
 
 @pytest.mark.asyncio
@@ -10,3 +20,96 @@ async def test_root():
         response = await ac.get("/health")
 
     assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_metrics():
+    async with AsyncClient(app=app, base_url="http://as-coach") as ac:
+        response = await ac.get("/metrics")
+
+    assert response.status_code == 200
+    assert "checkouts" in response.json()["database_pool"]
+    assert "queue_depth" in response.json()["password_hashing"]
+
+
+def test_kafka_supplier_is_shared():
+    supplier = get_kafka_supplier()
+    assert get_kafka_supplier() is supplier
+
+    close_kafka_supplier()
+    assert get_kafka_supplier() is not supplier
+    close_kafka_supplier()
+
+
+@pytest.mark.asyncio
+async def test_kafka_message_waits_for_delivery_report():
+    class Producer:
+        def __init__(self, error):
+            self.error = error
+
+        def produce(self, topic, value, callback):
+            # delivery report comes from the polling thread
+            message = SimpleNamespace(topic=lambda: topic, partition=lambda: 0)
+            threading.Thread(target=callback, args=(self.error, message)).start()
+
+    supplier = get_kafka_supplier()
+    try:
+        with patch.object(supplier, "producer", Producer(error=None)):
+            await supplier.send_message("invite")
+
+        with (
+            patch.object(supplier, "producer", Producer(error=KafkaError(KafkaError._MSG_TIMED_OUT))),
+            pytest.raises(KafkaDeliveryError),
+        ):
+            await supplier.send_message("invite")
+    finally:
+        close_kafka_supplier()
+
+
+def test_firebase_app_is_initialized_once():
+    notificator = PushFirebaseNotificator()
+
+    def initialize_app(credential):
+        # other delivery threads come while the app is being initialized
+        time.sleep(0.05)
+        firebase_admin._apps["[DEFAULT]"] = object()
+
+    with (
+        patch.dict(firebase_admin._apps, clear=True),
+        patch("src.supplier.firebase_supplier.credentials.Certificate"),
+        patch("src.supplier.firebase_supplier.initialize_app", side_effect=initialize_app) as mock_initialize_app,
+    ):
+        threads = [threading.Thread(target=notificator.establish_conn_to_firebase) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    mock_initialize_app.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_push_notifications_are_sent_in_batches():
+    invalid_token = "token 3"
+
+    def send_each(messages):
+        return SimpleNamespace(responses=[
+            SimpleNamespace(success=False, message_id=None, exception=messaging.UnregisteredError("Not registered"))
+            if message.token == invalid_token
+            else SimpleNamespace(success=True, message_id=f"projects/ascoach/messages/{message.token}", exception=None)
+            for message in messages
+        ])
+
+    notificator = PushFirebaseNotificator(batch_size=2)
+    recipient_data = {"title": "title", "body": "body"}
+    with (
+        patch.dict(firebase_admin._apps, {"[DEFAULT]": object()}),
+        patch("src.supplier.firebase_supplier.messaging.send_each", side_effect=send_each) as mock_send_each,
+    ):
+        results = await notificator.send_multicast([f"token {i}" for i in range(5)], recipient_data)
+
+    assert [len(call.args[0]) for call in mock_send_each.call_args_list] == [2, 2, 1]
+    assert [result.recipient_id for result in results] == [f"token {i}" for i in range(5)]
+    assert results[3].status == PushDeliveryStatus.INVALID_TOKEN
+    assert not results[3].error.retryable
+    assert all(result.status == PushDeliveryStatus.SENT for index, result in enumerate(results) if index != 3)